@@ -0,0 +1,91 @@
+import base64
+import gzip
+import json
+import os
+import random
+import timeit
+from io import BytesIO
+
+from Crypto.Cipher import ARC4
+
+from mijiaAPI.miutils import (
+    CryptoContext,
+    decrypt_rc4,
+    gen_nonce,
+    generate_enc_params,
+    get_signed_nonce,
+)
+
+
+# 比较旧实现（逐字段初始化 RC4）与 CryptoContext 处理单次请求的 CPU 开销：签名 + 加密请求 + 解密响应，无需联网。
+# 每次调用前固定随机种子，使 nonce 不变，响应密文只需生成一次，计时不包含模拟服务端加密的开销。
+ssecurity = base64.b64encode(os.urandom(16)).decode()
+uri = "/miotspec/prop/get"
+data = json.dumps({"params": [{"did": "123456789", "siid": 2, "piid": i} for i in range(1, 9)]}, separators=(',', ':'))
+response = json.dumps({"code": 0, "result": [{"did": "123456789", "siid": 2, "piid": i, "code": 0, "value": i} for i in range(1, 9)]})
+encrypted = {}
+
+
+def encrypted_response(signed_nonce):
+    if signed_nonce not in encrypted:
+        r = ARC4.new(base64.b64decode(signed_nonce))
+        r.encrypt(bytes(1024))
+        encrypted[signed_nonce] = base64.b64encode(r.encrypt(response.encode())).decode()
+    return encrypted[signed_nonce]
+
+
+def legacy_decrypt(signed_nonce, payload):
+    # 旧版 decrypt：先尝试按 UTF-8 解码，失败后经 BytesIO + GzipFile 解压
+    decrypted = decrypt_rc4(signed_nonce, payload)
+    try:
+        return decrypted.decode("utf-8")
+    except UnicodeDecodeError:
+        return gzip.GzipFile(fileobj=BytesIO(decrypted), mode="rb").read().decode("utf-8")
+
+
+def legacy():
+    random.seed(0)
+    nonce = gen_nonce()
+    signed_nonce = get_signed_nonce(ssecurity, nonce)
+    generate_enc_params(uri, "POST", signed_nonce, nonce, {"data": data}, ssecurity)
+    assert legacy_decrypt(signed_nonce, encrypted_response(signed_nonce)) == response
+
+
+crypto = CryptoContext(ssecurity)
+
+
+def context():
+    random.seed(0)
+    _, request_crypto = crypto.sign_request(uri, {"data": data})
+    assert request_crypto.decrypt(encrypted_response(request_crypto.signed_nonce)) == response
+
+
+def bench_large_response(compressed):
+    # 模拟包含 600 个设备的设备列表响应
+    body = json.dumps({"code": 0, "result": {"list": [
+        {"did": str(i), "name": f"设备{i}", "model": "yeelink.light.lamp4", "extra": "x" * 200} for i in range(600)
+    ]}}).encode()
+    if compressed:
+        body = gzip.compress(body)
+    _, request_crypto = crypto.sign_request(uri, {"data": data})
+    r = ARC4.new(base64.b64decode(request_crypto.signed_nonce))
+    r.encrypt(bytes(1024))
+    payload = base64.b64encode(r.encrypt(body))
+    number = 200
+    label = "gzip" if compressed else "plain"
+    for name, func in (
+            ("legacy", lambda: json.loads(legacy_decrypt(request_crypto.signed_nonce, payload))),
+            ("RequestCrypto", lambda: request_crypto.decrypt_json(payload)),
+    ):
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:>14}: {seconds / number * 1e3:.2f} ms/响应（600 个设备，{label}）")
+
+
+if __name__ == "__main__":
+    number = 5000
+    for name, func in (("legacy", legacy), ("CryptoContext", context)):
+        func()
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:>14}: {seconds / number * 1e6:.1f} µs/请求")
+    bench_large_response(compressed=False)
+    bench_large_response(compressed=True)
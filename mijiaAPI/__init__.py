@@ -1,31 +1,60 @@
 from .apis import mijiaAPI
-from .devices import get_device_info, mijiaDevice
+from .async_apis import AsyncMijiaAPI
+from .async_devices import AsyncMijiaDevice
+from .credentials import CredentialStore, FileCredentialStore
+from .devices import (
+    clear_device_info_cache,
+    device_info_cache_stats,
+    get_device_info,
+    mijiaDevice,
+    prefetch_device_infos,
+)
 from .errors import (
     APIError,
     DeviceActionError,
+    DeviceBatchError,
     DeviceGetError,
     DeviceNotFoundError,
     DeviceSetError,
     GetDeviceInfoError,
     LoginError,
     MultipleDevicesFoundError,
+    PartialFailureError,
+    TransactionError,
 )
 from .miutils import decrypt
+from .registry import DeviceRegistry
+from .spec_store import SpecBundle, SpecStore
+from .transaction import Transaction
 from .version import version as __version__
 
 
 __all__ = [
     "mijiaAPI",
     "mijiaDevice",
+    "AsyncMijiaAPI",
+    "AsyncMijiaDevice",
+    "CredentialStore",
+    "FileCredentialStore",
+    "DeviceRegistry",
+    "SpecStore",
+    "SpecBundle",
+    "Transaction",
     "get_device_info",
+    "device_info_cache_stats",
+    "clear_device_info_cache",
+    "prefetch_device_infos",
     "APIError",
     "DeviceActionError",
+    "DeviceBatchError",
     "DeviceGetError",
     "DeviceNotFoundError",
     "DeviceSetError",
     "GetDeviceInfoError",
     "LoginError",
     "MultipleDevicesFoundError",
+    "PartialFailureError",
+    "TransactionError",
     "decrypt",
     "__version__",
 ]
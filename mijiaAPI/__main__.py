@@ -1,5 +1,4 @@
 import argparse
-import json
 import logging
 import os
 import sys
@@ -7,9 +6,12 @@ import time
 from pathlib import Path
 from typing import Optional
 
+from . import jsonutil
 from .apis import mijiaAPI
-from .devices import get_device_info, mijiaDevice
+from .devices import get_device_info, mijiaDevice, prefetch_device_infos
+from .errors import LoginError, PartialFailureError
 from .mcp_server import run as run_mcp
+from .spec_store import SpecStore
 from .version import version
 
 
@@ -22,8 +24,8 @@ logging.getLogger("mijiaAPI").setLevel(log_level)
 
 def json_object(value: str) -> dict:
     try:
-        result = json.loads(value)
-    except json.JSONDecodeError as e:
+        result = jsonutil.loads(value)
+    except jsonutil.JSONDecodeError as e:
         raise argparse.ArgumentTypeError(f"无效 JSON: {e.msg}") from e
     if not isinstance(result, dict):
         raise argparse.ArgumentTypeError("必须是 JSON 对象")
@@ -282,8 +284,68 @@ def parse_args(args):
         type=int,
         help="结束时间戳（秒），默认为当前时间",
     )
+
+    warm_cache = subparsers.add_parser(
+        'warm-cache',
+        help="并发预取设备规格信息到缓存",
+    )
+    warm_cache.set_defaults(func='warm_cache')
+    warm_cache.add_argument(
+        '-p', '--auth_path',
+        type=Path,
+        default=Path.home() / ".config" / "mijia-api" / "auth.json",
+        help="认证文件保存路径，默认保存在 ~/.config/mijia-api/auth.json",
+    )
+    warm_cache.add_argument(
+        '--models',
+        type=str,
+        nargs='+',
+        help="要预取的设备 model，默认为设备列表（包含共享设备）中的所有 model，指定时无需登录",
+    )
+    warm_cache.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help="最大并发数，默认 8",
+    )
+    warm_cache.add_argument(
+        '--max_age',
+        type=float,
+        help="缓存超过该秒数时重新获取，默认只获取缺失的规格",
+    )
+
+    spec_bundle = subparsers.add_parser(
+        'spec-bundle',
+        help="导出/导入离线设备规格包",
+    )
+    spec_bundle.set_defaults(func='spec_bundle')
+    spec_bundle.add_argument(
+        '-p', '--auth_path',
+        type=Path,
+        default=Path.home() / ".config" / "mijia-api" / "auth.json",
+        help="认证文件保存路径，规格缓存位于其所在目录，默认 ~/.config/mijia-api/auth.json",
+    )
+    bundle_action = spec_bundle.add_mutually_exclusive_group(required=True)
+    bundle_action.add_argument(
+        '--export',
+        type=Path,
+        metavar='BUNDLE_PATH',
+        help="将缓存中的所有设备规格导出为离线规格包",
+    )
+    bundle_action.add_argument(
+        '--import',
+        dest='import_path',
+        type=Path,
+        metavar='BUNDLE_PATH',
+        help="将离线规格包导入缓存，已缓存的 model 不会被覆盖",
+    )
     return parser.parse_args(args)
 
+def spec_cache_dir(auth_path: Path) -> Path:
+    """与 mijiaAPI 的默认 spec_cache_path 一致：认证文件所在目录。"""
+    return auth_path if Path(auth_path).is_dir() else Path(auth_path).parent
+
+
 def init_api(auth_path: Path) -> mijiaAPI:
     if Path(auth_path).is_dir():
         auth_path = auth_path / "auth.json"
@@ -293,10 +355,13 @@ def init_api(auth_path: Path) -> mijiaAPI:
         sys.exit(1)
     try:
         api = mijiaAPI(auth_data_path=auth_path)
-    except json.JSONDecodeError:
+    except jsonutil.JSONDecodeError:
         print(f"认证文件已损坏: {auth_path}")
         print("请调用 'mijiaAPI login' 进行扫描登录")
         sys.exit(1)
+    if api.token_refresh == "reactive" and api.has_credentials:
+        # Token 失效时由请求自动刷新，刷新失败的 LoginError 在 cli() 中统一处理
+        return api
     if not api.available:
         try:
             api._refresh_token()
@@ -339,7 +404,7 @@ def get_homes_list(api: mijiaAPI, verbose: bool = True, device_mapping: Optional
     return home_mapping
 
 def get_devices_list(api: mijiaAPI, verbose: bool = True, home_mapping: Optional[dict] = None) -> dict:
-    devices = api.get_devices_list() + api.get_shared_devices_list()
+    devices = api.get_devices_list(include_shared=True)
     if verbose:
         if home_mapping is None:
             home_mapping = get_homes_list(api, verbose=False)
@@ -364,8 +429,11 @@ def get_scenes_list(api: mijiaAPI, verbose: bool = True, home_mapping: Optional[
     if home_mapping is None:
         home_mapping = get_homes_list(api, verbose=False)
     scene_mapping = {}
+    home_scenes = {home_id: [] for home_id in home_mapping}
+    for scene in api.get_scenes_list():
+        home_scenes.setdefault(scene['home_id'], []).append(scene)
     for home_id, home in home_mapping.items():
-        scenes = api.get_scenes_list(home_id)
+        scenes = home_scenes[home_id]
         if scenes and verbose:
             print(f"{home['name']} ({home_id}) 中的场景:")
             for scene in scenes:
@@ -378,8 +446,11 @@ def get_scenes_list(api: mijiaAPI, verbose: bool = True, home_mapping: Optional[
 def get_consumable_items(api: mijiaAPI, home_mapping: Optional[dict] = None):
     if home_mapping is None:
         home_mapping = get_homes_list(api, verbose=False)
+    home_items = {home_id: [] for home_id in home_mapping}
+    for item in api.get_consumable_items():
+        home_items.setdefault(item['home_id'], []).append(item)
     for home_id, home in home_mapping.items():
-        items = api.get_consumable_items(home_id)
+        items = home_items[home_id]
         print(f"{home['name']} ({home_id}) 中的耗材:")
         for item in items:
             print(f"  - {item['name']}({item['did']}) 中的 {item['details']['description']}\n"
@@ -443,7 +514,41 @@ def get_statistics(api: mijiaAPI, args):
         "time_start": time_start,
         "time_end": time_end,
     })
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(jsonutil.dumps(result, indent=True))
+
+
+def warm_spec_cache(args):
+    if args.models:
+        models = args.models
+        spec_cache_path = spec_cache_dir(args.auth_path)
+    else:
+        api = init_api(args.auth_path)
+        models = [device['model'] for device in api.get_devices_list(include_shared=True)]
+        spec_cache_path = api.spec_cache_path
+    models = list(dict.fromkeys(models))
+    errors = {}
+    try:
+        fetched = prefetch_device_infos(models, spec_cache_path, concurrency=args.concurrency, max_age=args.max_age)
+    except PartialFailureError as e:
+        fetched, errors = e.results, e.errors
+        for model, error in errors.items():
+            print(f"获取 {model} 的设备规格失败: {error}")
+    print(f"共 {len(models)} 个 model，本次获取 {len(fetched)} 个，"
+          f"已缓存 {len(models) - len(fetched) - len(errors)} 个，失败 {len(errors)} 个")
+    if errors:
+        sys.exit(1)
+
+
+def spec_bundle(args):
+    spec_cache_path = spec_cache_dir(args.auth_path)
+    store = SpecStore.open(spec_cache_path)
+    store.import_json_dir(spec_cache_path)
+    if args.export is not None:
+        count = store.export_bundle(args.export)
+        print(f"已导出 {count} 个设备规格到 {args.export}")
+    else:
+        count = store.import_bundle(args.import_path)
+        print(f"已从 {args.import_path} 导入 {count} 个设备规格到 {store.path}")
 
 
 def main(args):
@@ -455,8 +560,8 @@ def main(args):
         sys.exit(1)
 
     if args.get_device_info:
-        device_info = get_device_info(args.get_device_info)
-        print(json.dumps(device_info, indent=2, ensure_ascii=False))
+        device_info = get_device_info(args.get_device_info, cache_path=spec_cache_dir(args.auth_path))
+        print(jsonutil.dumps(device_info, indent=True))
     if not (args.list_devices or
             args.list_homes or
             args.list_scenes or
@@ -468,12 +573,18 @@ def main(args):
     if hasattr(args, 'func') and args.func == 'mcp':
         run_mcp(args.auth_path)
         return
+    if hasattr(args, 'func') and args.func == 'spec_bundle':
+        spec_bundle(args)
+        return
+    if hasattr(args, 'func') and args.func == 'warm_cache':
+        warm_spec_cache(args)
+        return
     if hasattr(args, 'func') and args.func == 'login':
         auth_path = args.auth_path
         file_path = Path(auth_path) / "auth.json" if Path(auth_path).is_dir() else Path(auth_path)
         try:
             api = mijiaAPI(auth_data_path=auth_path)
-        except json.JSONDecodeError:
+        except jsonutil.JSONDecodeError:
             file_path.unlink(missing_ok=True)
             api = mijiaAPI(auth_data_path=auth_path)
         if not api.available:
@@ -523,7 +634,12 @@ def main(args):
             wifispeaker.run_action('execute-text-directive', _in=[args.prompt, 1 if args.quiet else 0])
 
 def cli():
-    main(sys.argv[1:])
+    try:
+        main(sys.argv[1:])
+    except LoginError as e:
+        print(f"认证已失效且刷新失败: {e}")
+        print("请调用 'mijiaAPI login' 进行扫描登录")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
+    cli()
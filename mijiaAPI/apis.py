@@ -1,28 +1,70 @@
-import json
+import copy
 import locale
 import random
+import threading
 import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
 from urllib import parse
 
 import requests
 import tzlocal
 from qrcode import QRCode
 
-from .errors import ERROR_CODE, APIError, LoginError
+from . import jsonutil
+from .coalescer import PropCoalescer
+from .credentials import CredentialStore, FileCredentialStore
+from .errors import ERROR_CODE, APIError, LoginError, PartialFailureError
 from .logger import logger
-from .miutils import (
-    decrypt,
-    gen_nonce,
-    generate_enc_params,
-    get_signed_nonce,
-)
+from .miutils import CryptoContext, RequestCrypto
+from .ratelimit import RateLimiter
+from .transaction import Transaction
+
+
+# reactive: 先发送请求，服务器拒绝 Token 时再刷新并重试一次；preflight: 每次请求前检查 Token 是否有效
+TOKEN_REFRESH_POLICIES = ("reactive", "preflight")
+AUTH_ERROR_STATUS = (401, 403)
+# 服务器拒绝 Token 时的错误码：HTTP 状态码（见 _parse_response）及响应中的 code
+AUTH_ERROR_CODES = (*AUTH_ERROR_STATUS, -10020, -10030)
+# 逐块读取响应时每块的字节数
+RESPONSE_CHUNK_SIZE = 64 * 1024
+# 同一 Token 刷新失败后，在此时间（秒）内其他线程直接失败，避免重复请求
+REFRESH_FAILURE_COOLDOWN = 5
+# 只读接口，同时发起的相同请求（uri 与 data 均相同）只发送一次并共享结果；写入与执行动作的接口不在此列
+READ_ONLY_URIS = frozenset({
+    "/v2/message/v2/check_new_msg",
+    "/v2/homeroom/gethome_merged",
+    "/home/home_device_list",
+    "/v2/home/device_list_page",
+    "/appgateway/miot/appsceneservice/AppSceneService/GetSimpleSceneList",
+    "/v2/home/standard_consumable_items",
+    "/miotspec/prop/get",
+    "/v2/user/statistics",
+})
 
 
 class mijiaAPI():
-    def __init__(self, auth_data_path: Optional[str] = None):
+    def __init__(
+            self,
+            auth_data_path: Optional[str] = None,
+            token_refresh: str = "reactive",
+            refresh_before_expire: Optional[float] = 24 * 3600,
+            credential_store: Optional[CredentialStore] = None,
+            topology_ttl: float = 300,
+            max_workers: int = 8,
+            max_batch_size: Optional[int] = 100,
+            coalesce_window: Optional[float] = None,
+            dedup_reads: bool = True,
+            gateway_interval: Optional[float] = None,
+            spec_cache_path: Optional[Union[str, Path]] = None,
+            spec_bundle_path: Optional[Union[str, Path]] = None,
+    ):
+        if token_refresh not in TOKEN_REFRESH_POLICIES:
+            raise ValueError(f"无效的 token_refresh: {token_refresh}, 可选值: {', '.join(TOKEN_REFRESH_POLICIES)}")
         self.locale = locale.getlocale()[0] if locale.getlocale()[0] else "zh_CN"
         if '_' not in self.locale: # #57, make sure locale is in correct format
             self.locale = "zh_CN"
@@ -36,20 +78,112 @@ class mijiaAPI():
             self.auth_data_path = Path(auth_data_path) / "auth.json"
         else:
             self.auth_data_path = Path(auth_data_path)
+        # 设备规格缓存库（目录或 .db 文件），默认与认证文件同目录；多个实例可指向同一路径共享缓存
+        self.spec_cache_path = Path(spec_cache_path) if spec_cache_path is not None else self.auth_data_path.parent
+        # 离线规格包（SpecStore.export_bundle 导出），缓存中没有的型号优先从中读取，None 表示不使用
+        self.spec_bundle_path = Path(spec_bundle_path) if spec_bundle_path is not None else None
+
+        # (结果, 时间戳)，整体替换以保证多线程下读取一致
+        self._available_cache = (None, 0)
+        self._available_lock = threading.Lock()
+        # 保护 auth_data 的写入与保存
+        self._auth_lock = threading.RLock()
+        # 保证同一时间只有一个线程在刷新 Token
+        self._refresh_lock = threading.Lock()
+        self._refresh_failure = (None, 0.0)
+        self._session_state: Optional[tuple[requests.Session, CryptoContext]] = None
+        self._session_token: Optional[str] = None
+        self.token_refresh = token_refresh
+        self.refresh_before_expire = refresh_before_expire
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._closed = False
+        # 家庭拓扑缓存: (家庭列表, {home_id: 家庭所属用户ID}, 获取时间)
+        self.topology_ttl = topology_ttl
+        self._topology: Optional[tuple[list, dict, float]] = None
+        self._topology_lock = threading.Lock()
+        # 已完成的获取次数，用于判断等待锁期间是否已有其他线程获取（不依赖时钟精度）
+        self._topology_fetches = 0
+        # 多个家庭/多个请求并发执行时的最大线程数，1 表示串行
+        self.max_workers = max(1, max_workers)
+        # 单次 /miotspec/prop/get|set 请求的最大属性数，超出时拆分后并发发送，None 表示不拆分
+        self.max_batch_size = max_batch_size
+        # 单项属性读写的合并窗口（秒），None 表示不合并
+        self.coalesce_window = coalesce_window
+        self._coalescers: dict[str, PropCoalescer] = {}
+        # mijiaDevice 按设备（及网关）限制调用间隔，所有基于本实例的设备共享
+        self.rate_limiter = RateLimiter()
+        self.gateway_interval = gateway_interval
+        # 在途只读请求: {(uri, 规范化 data, refresh_token): [Future, 等待者数量]}
+        self.dedup_reads = dedup_reads
+        self._inflight: dict[tuple, list] = {}
+        self._inflight_lock = threading.Lock()
+        if coalesce_window is not None:
+            self._coalescers = {
+                "get": PropCoalescer(self._get_props, coalesce_window, max_batch_size),
+                "set": PropCoalescer(self._set_props, coalesce_window, max_batch_size),
+            }
 
-        self._available_cache = None
-        self._available_cache_time = 0
-
-        if self.auth_data_path.exists():
-            with open(self.auth_data_path, "r") as f:
-                self.auth_data = json.load(f)
+        if credential_store is None:
+            credential_store = FileCredentialStore(self.auth_data_path)
+            if self.auth_data_path.exists():
+                credential_store.load()
+        self.credential_store = credential_store
+        if self.has_credentials:
             self._init_session()
-        else:
-            self.auth_data = {}
+            self._schedule_refresh()
+
+    def close(self) -> None:
+        """取消后台刷新 Token 的定时器并关闭 session，之后不再自动刷新。"""
+        self._closed = True
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self._session_state is not None:
+            self._session_state[0].close()
+
+    def __enter__(self) -> "mijiaAPI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def auth_data(self) -> dict:
+        return self.credential_store.data
+
+    @auth_data.setter
+    def auth_data(self, value: dict) -> None:
+        self.credential_store.data = value
 
     def _init_session(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 先构建完整的新 session 再一次性替换，进行中的请求继续使用旧的 (session, CryptoContext)
+        session = requests.Session()
+        session.headers.update(self._session_headers())
+        if self.max_workers > requests.adapters.DEFAULT_POOLSIZE:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+        self._session_state = (session, CryptoContext(self.auth_data["ssecurity"]))
+        self._session_token = self.auth_data["serviceToken"]
+        self.session = session
+
+    def _sync_credentials(self) -> bool:
+        """认证文件被其他进程更新（例如刷新了 Token）时重新加载并重建 session。"""
+        if not self.credential_store.reload_if_changed():
+            return False
+        return self._adopt_stored_token()
+
+    def _adopt_stored_token(self) -> bool:
+        if not self.has_credentials or self.auth_data["serviceToken"] == self._session_token:
+            return False
+        logger.debug("认证文件中的 Token 已被其他进程更新，使用新的 Token")
+        with self._auth_lock:
+            self._init_session()
+        self._available_cache = (None, 0)
+        self._schedule_refresh()
+        return True
+
+    def _session_headers(self) -> dict:
+        return {
             "User-Agent": self.user_agent,
             "accept-encoding": "identity",
             "Content-Type": "application/x-www-form-urlencoded",
@@ -67,30 +201,37 @@ class mijiaAPI():
                       f"countryCode={self.locale.split('_')[1] if self.locale else 'CN'};"
                       f"PassportDeviceId={self.deviceId};"
                       f"locale={self.locale}",
-        })
+        }
 
     @property
-    def available(self) -> bool:
+    def has_credentials(self) -> bool:
         if not self.auth_data:
             return False
-        if any(key not in self.auth_data for key in ["ua", "ssecurity", "userId", "cUserId", "serviceToken"]):
-            return False
-
-        current_time = int(time.time())
-        if current_time - self._available_cache_time < 60:
-            logger.debug(f"使用缓存的available结果: {self._available_cache}")
-            return self._available_cache
+        return all(key in self.auth_data for key in ["ua", "ssecurity", "userId", "cUserId", "serviceToken"])
 
-        try:
-            self.check_new_msg(refresh_token=False)
-        except Exception:
-            self._available_cache = None
-            self._available_cache_time = 0
+    @property
+    def available(self) -> bool:
+        if not self.has_credentials:
             return False
 
-        self._available_cache = True
-        self._available_cache_time = current_time
-        return True
+        cached, cache_time = self._available_cache
+        if int(time.time()) - cache_time < 60:
+            logger.debug(f"使用缓存的available结果: {cached}")
+            return cached
+
+        with self._available_lock:
+            # 等待锁期间其他线程可能已完成检查
+            cached, cache_time = self._available_cache
+            current_time = int(time.time())
+            if current_time - cache_time < 60:
+                return cached
+            try:
+                self.check_new_msg(refresh_token=False)
+            except Exception:
+                self._available_cache = (None, 0)
+                return False
+            self._available_cache = (True, current_time)
+            return True
 
     @property
     def pass_o(self) -> str:
@@ -121,7 +262,7 @@ class mijiaAPI():
 
     def _parse_service_ret(self, service_ret: requests.Response) -> dict:
         text = service_ret.text.replace("&&&START&&&", "")
-        service_data = json.loads(text)
+        service_data = jsonutil.loads(text)
         return service_data
 
     def _handle_ret(self, fetch_ret: requests.Response, verify_code: bool = True) -> dict:
@@ -146,10 +287,10 @@ class mijiaAPI():
                         "如`Maple Mono`、`Fira Code`等。")
 
     def _save_auth_data(self):
-        self.auth_data["saveTime"] = int(time.time() * 1000)
-        self.auth_data_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.auth_data_path, "w") as f:
-            json.dump(self.auth_data, f, indent=2, ensure_ascii=False)
+        # 加锁顺序固定为 credential_store -> _auth_lock，避免与刷新 Token 的线程死锁
+        with self.credential_store.locked(), self._auth_lock:
+            self.auth_data["saveTime"] = int(time.time() * 1000)
+            self.credential_store.save()
         logger.debug(f"已保存认证数据到 {self.auth_data_path}")
         logger.debug(f"认证数据: {self.auth_data}")
 
@@ -170,27 +311,93 @@ class mijiaAPI():
         service_data = self._handle_ret(service_ret, verify_code=False)
         location = service_data["location"]
         if service_data['code'] == 0:
-            ret = self.session.get(location)
+            # 使用独立的 session 获取新 Cookie，避免修改其他线程正在使用的 session
+            session = requests.Session()
+            if self._session_state is not None:
+                session.headers.update(self._session_state[0].headers)
+            ret = session.get(location)
             if ret.status_code == 200 and ret.text == "ok":
-                cookies = self.session.cookies.get_dict()
-                self.auth_data.update(cookies)
-                self.auth_data["ssecurity"] = service_data["ssecurity"]
+                cookies = session.cookies.get_dict()
+                with self._auth_lock:
+                    self.auth_data.update(cookies)
+                    self.auth_data["ssecurity"] = service_data["ssecurity"]
                 return {"code": 0, "message": "刷新Token成功"}
         location_data = parse.parse_qs(parse.urlparse(location).query)
         return {k: v[0] for k, v in location_data.items()}
 
-    def _refresh_token(self) -> dict:
-        if self.available:
+    def _refresh_token(self, force: bool = False, stale_session: Optional[requests.Session] = None) -> dict:
+        """
+        刷新 Token，多个线程同时调用时只有一个线程实际发送刷新请求，其余线程等待其结果。
+
+        参数:
+            force: 为 True 时不检查 available，直接刷新
+            stale_session: 被服务器拒绝的请求所使用的 session；若当前 session 已不是它，
+                说明其他线程已完成刷新，直接返回
+        """
+        if not force and self.available:
             logger.debug("Token 有效，无需刷新")
             return self.auth_data
-        location_data = self._get_location()
-        if location_data.get("code", -1) == 0 and location_data.get("message", "") == "刷新Token成功":
-            self._save_auth_data()
-            self._init_session()
-            logger.debug("刷新Token成功")
-            return self.auth_data
-        else:
-            raise LoginError(-1, "刷新Token失败，请重新登录")
+        if stale_session is None and self._session_state is not None:
+            stale_session = self._session_state[0]
+        with self._refresh_lock, self.credential_store.locked():
+            current_session = self._session_state[0] if self._session_state is not None else None
+            if stale_session is not None and current_session is not stale_session:
+                logger.debug("其他线程已完成Token刷新")
+                return self.auth_data
+            # 持有存储锁后重新读取：其他进程可能刚完成刷新，直接使用新 Token 而无需请求网络
+            self.credential_store.reload_if_changed(force=True)
+            if self._adopt_stored_token():
+                return self.auth_data
+            failed_session, failed_time = self._refresh_failure
+            if failed_session is current_session and time.monotonic() - failed_time < REFRESH_FAILURE_COOLDOWN:
+                raise LoginError(-1, "刷新Token失败，请重新登录")
+
+            location_data = self._get_location()
+            if location_data.get("code", -1) == 0 and location_data.get("message", "") == "刷新Token成功":
+                with self._auth_lock:
+                    self.auth_data["expireTime"] = int((datetime.now() + timedelta(days=30)).timestamp() * 1000)
+                    self._save_auth_data()
+                    self._init_session()
+                self._available_cache = (True, int(time.time()))
+                self._schedule_refresh()
+                logger.debug("刷新Token成功")
+                return self.auth_data
+            else:
+                self._available_cache = (None, 0)
+                self._refresh_failure = (current_session, time.monotonic())
+                raise LoginError(-1, "刷新Token失败，请重新登录")
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self._closed or self.token_refresh != "reactive" or self.refresh_before_expire is None:
+            return
+        if "expireTime" not in self.auth_data:
+            return
+        now = time.time()
+        if self.auth_data["expireTime"] / 1000 <= now:
+            # 已过期的 Token 交给首个请求被拒绝后的刷新处理，避免后台刷新与其竞争
+            logger.debug("Token 已过期，不安排后台刷新")
+            return
+        delay = self.auth_data["expireTime"] / 1000 - self.refresh_before_expire - now
+        # 定时器只持有弱引用，实例被丢弃后不会因定时器而继续存活
+        self._refresh_timer = threading.Timer(max(delay, 0), self._background_refresh_ref, (weakref.ref(self),))
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+        logger.debug(f"将在 {max(delay, 0):.0f} 秒后后台刷新 Token")
+
+    @staticmethod
+    def _background_refresh_ref(ref: "weakref.ref[mijiaAPI]") -> None:
+        api = ref()
+        if api is not None and not api._closed:
+            api._background_refresh()
+
+    def _background_refresh(self) -> None:
+        try:
+            self._refresh_token(force=True)
+        except Exception as e:
+            logger.warning(f"后台刷新Token失败: {e}")
 
     def login(self, *args, **kwargs) -> dict:
         """
@@ -245,8 +452,9 @@ class mijiaAPI():
         """
         location_data = self._get_location()
         if location_data.get("code", -1) == 0 and location_data.get("message", "") == "刷新Token成功":
-            self._save_auth_data()
-            self._init_session()
+            with self.credential_store.locked(), self._auth_lock:
+                self._save_auth_data()
+                self._init_session()
             logger.info("刷新Token成功，无需登录")
             return {"refreshed": True}
 
@@ -293,42 +501,135 @@ class mijiaAPI():
         except requests.exceptions.Timeout:
             raise LoginError(-1, "超时，请重试")
 
-        auth_keys = ["psecurity", "nonce", "ssecurity", "passToken", "userId", "cUserId"]
-        for key in auth_keys:
-            self.auth_data[key] = lp_data[key]
         callback_url = lp_data["location"]
         session.get(callback_url, headers=headers)
         cookies = session.cookies.get_dict()
-        self.auth_data.update(cookies)
-        self.auth_data.update({
-            "expireTime": int((datetime.now() + timedelta(days=30)).timestamp() * 1000),
-        })
-        self._save_auth_data()
+        auth_keys = ["psecurity", "nonce", "ssecurity", "passToken", "userId", "cUserId"]
+        with self.credential_store.locked(), self._auth_lock:
+            for key in auth_keys:
+                self.auth_data[key] = lp_data[key]
+            self.auth_data.update(cookies)
+            self.auth_data.update({
+                "expireTime": int((datetime.now() + timedelta(days=30)).timestamp() * 1000),
+            })
+            self._save_auth_data()
+            self._init_session()
         logger.info("登录成功")
-        self._init_session()
+        self._schedule_refresh()
         return self.auth_data
 
 
-    def _request(self, uri: str, data: dict, refresh_token: bool = True) -> dict:
-        logger.debug(f"请求 URI: {uri}，数据: {data}")
-        if refresh_token:
-            self._refresh_token()
+    def _prepare_request(self, uri: str, data: dict, crypto: CryptoContext) -> tuple[str, dict, RequestCrypto]:
         url = self.api_base_url + uri
-        params = { "data": json.dumps(data, separators=(',', ':')) }
-        nonce = gen_nonce()
-        signed_nonce = get_signed_nonce(self.auth_data["ssecurity"], nonce)
-        params = generate_enc_params(uri, "POST", signed_nonce, nonce, params, self.auth_data["ssecurity"])
-        ret = self.session.post(url, data=params)
-        try:
-            ret_data = json.loads(ret.text)
-        except json.JSONDecodeError:
-            dec_data = decrypt(self.auth_data["ssecurity"], nonce, ret.text)
-            ret_data = json.loads(dec_data)
+        # 发送的数据与旧版本一致：紧凑且转义非 ASCII 字符，签名的内容不随 JSON 实现变化
+        params, request_crypto = crypto.sign_request(uri, {"data": jsonutil.dumps(data, ensure_ascii=True)})
+        return url, params, request_crypto
+
+    @staticmethod
+    def _parse_response(
+            status_code: int,
+            body: Union[str, bytes, Iterable[bytes]],
+            request_crypto: RequestCrypto,
+    ) -> dict:
+        """body 为完整的响应内容，或逐块读取响应的迭代器（如 iter_content）。"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        chunks = (body,) if isinstance(body, (bytes, bytearray, memoryview)) else body
+        if status_code in AUTH_ERROR_STATUS:
+            raise APIError(status_code, b"".join(chunks).decode("utf-8", "replace"))
+        # 明文响应以 { 开头，加密响应为 base64 文本，按开头字符区分而不是先尝试解析；
+        # 加密响应逐块解码、解密、解压，不保留完整的原始响应
+        decoder = request_crypto.decoder()
+        for chunk in chunks:
+            decoder.feed(chunk)
+        return mijiaAPI._check_result(decoder.result())
+
+    @staticmethod
+    def _check_result(ret_data: dict) -> dict:
         logger.debug(f"响应数据: {ret_data}")
         if ret_data.get("code", 0) != 0 or "result" not in ret_data:
             raise APIError(ret_data["code"], ret_data.get("message", ret_data.get("desc", "未知错误")))
         return ret_data["result"]
 
+    @staticmethod
+    def _is_auth_error(error: APIError) -> bool:
+        return error.code in AUTH_ERROR_CODES
+
+    def _send(self, uri: str, data: dict, session_state: tuple[requests.Session, CryptoContext]) -> dict:
+        session, crypto = session_state
+        url, params, request_crypto = self._prepare_request(uri, data, crypto)
+        with session.post(url, data=params, stream=True) as ret:
+            return self._parse_response(ret.status_code, ret.iter_content(RESPONSE_CHUNK_SIZE), request_crypto)
+
+    @staticmethod
+    def _inflight_key(uri: str, data: dict, refresh_token: bool) -> tuple:
+        return uri, jsonutil.dumps(data, sort_keys=True), refresh_token
+
+    def _request(self, uri: str, data: dict, refresh_token: bool = True) -> dict:
+        if not self.dedup_reads or uri not in READ_ONLY_URIS:
+            return self._request_once(uri, data, refresh_token)
+        key = self._inflight_key(uri, data, refresh_token)
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is not None:
+                entry[1] += 1
+            else:
+                self._inflight[key] = [Future(), 0]
+        if entry is not None:
+            logger.debug(f"相同的请求正在进行中，等待其结果: {uri}")
+            # 调用方可能修改返回值，每个等待者各自拿一份拷贝
+            return copy.deepcopy(entry[0].result())
+        try:
+            result = self._request_once(uri, data, refresh_token)
+        except BaseException as e:
+            with self._inflight_lock:
+                future, _ = self._inflight.pop(key)
+            future.set_exception(e)
+            raise
+        with self._inflight_lock:
+            future, waiters = self._inflight.pop(key)
+        future.set_result(copy.deepcopy(result) if waiters else result)
+        return result
+
+    def _ensure_session(self, refresh_token: bool = True) -> tuple[requests.Session, CryptoContext]:
+        """
+        返回当前的 (session, CryptoContext)。
+
+        认证数据缺失或不完整时尚未建立 session：有 passToken 且允许刷新时先尝试刷新 Token，
+        仍无可用 session 则抛出 LoginError。
+        """
+        session_state = self._session_state
+        if session_state is None and refresh_token and self.auth_data.get("passToken"):
+            self._refresh_token(force=True)
+            session_state = self._session_state
+        if session_state is None:
+            raise LoginError(-1, "未登录或认证数据不完整，请先登录")
+        return session_state
+
+    def _request_once(self, uri: str, data: dict, refresh_token: bool = True) -> dict:
+        logger.debug(f"请求 URI: {uri}，数据: {data}")
+        self._sync_credentials()
+        if refresh_token and self.token_refresh == "preflight":
+            self._refresh_token()
+        session_state = self._ensure_session(refresh_token)
+        try:
+            return self._send(uri, data, session_state)
+        except APIError as e:
+            if not refresh_token or self.token_refresh != "reactive" or not self._is_auth_error(e):
+                raise
+            logger.debug(f"服务器拒绝了当前 Token (code: {e.code})，刷新后重试")
+            self._refresh_token(force=True, stale_session=session_state[0])
+            return self._send(uri, data, self._session_state)
+
+    @staticmethod
+    def _decode_codes(ret_data: list) -> list:
+        for ret in ret_data:
+            if ret.get("code", 0) not in (0, 1):
+                ret.update({"message": ERROR_CODE.get(str(ret["code"]), "未知错误")})
+            else:
+                ret.update({"message": "成功"})
+        return ret_data
+
     @staticmethod
     def _add_home_id(data: Union[list, dict], home_id: str) -> Union[list, dict]:
         if isinstance(data, list):
@@ -341,74 +642,274 @@ class mijiaAPI():
         return data
 
 
+    def _run_concurrently(self, funcs: list[Callable[[], Any]], fail_fast: bool = True) -> tuple[list, dict]:
+        """
+        使用最多 max_workers 个线程并发执行 funcs，结果按输入顺序返回。
+
+        返回值:
+            tuple[list, dict]: (结果列表，失败项为 None；{失败项下标: 异常})。
+                fail_fast 为 True 时遇到第一个异常即取消未开始的任务并抛出该异常。
+        """
+        results = [None] * len(funcs)
+        errors = {}
+        if self.max_workers <= 1 or len(funcs) <= 1:
+            for i, func in enumerate(funcs):
+                try:
+                    results[i] = func()
+                except Exception as e:
+                    if fail_fast:
+                        raise
+                    errors[i] = e
+            return results, errors
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(funcs))) as executor:
+            futures = {executor.submit(func): i for i, func in enumerate(funcs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    if fail_fast:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    errors[i] = e
+        return results, errors
+
+    @staticmethod
+    def _split_batches(params: list, max_batch_size: Optional[int]) -> list[list]:
+        if not max_batch_size or len(params) <= max_batch_size:
+            return [params]
+        return [params[i:i + max_batch_size] for i in range(0, len(params), max_batch_size)]
+
+    def _batched_request(self, uri: str, params: list, extra: Optional[dict] = None) -> list:
+        """按 max_batch_size 拆分 params 并发请求，结果按输入顺序拼接，任一批失败即抛出异常。"""
+        batches = self._split_batches(params, self.max_batch_size)
+        funcs = [partial(self._request, uri, {"params": batch, **(extra or {})}) for batch in batches]
+        results, _ = self._run_concurrently(funcs)
+        return [item for result in results for item in result]
+
+    def _request_each(self, uri: str, payloads: list, what: str, fail_fast: bool = True) -> list:
+        """
+        对每个 payload 并发发送一次请求（最多 max_workers 个），结果按输入顺序返回。
+
+        fail_fast 为 False 时等待全部请求结束，若有失败则抛出 PartialFailureError，
+        其 results 中失败项为 None，errors 为 {输入下标: 异常}。
+        """
+        results, errors = self._run_concurrently([partial(self._request, uri, payload) for payload in payloads], fail_fast)
+        if errors:
+            for i, e in errors.items():
+                logger.warning(f"第 {i} 项{what}失败: {e}")
+            raise PartialFailureError(f"部分{what}失败", results, errors)
+        return results
+
+    def _get_props(self, params: list) -> list:
+        return self._batched_request("/miotspec/prop/get", params, {"datasource": 1})
+
+    def _set_props(self, params: list) -> list:
+        return self._decode_codes(self._batched_request("/miotspec/prop/set", params))
+
+    def transaction(self, devices: Optional[list] = None) -> Transaction:
+        """
+        延迟写入事务
+
+        with 块内对本实例下设备（或仅 devices 中的设备）的 set / set_many / 属性赋值只加入队列，
+        退出时合并为一次 set_devices_prop 请求发送，同一属性以最后一次写入为准；
+        块内抛出异常时丢弃队列。
+
+        参数:
+            devices (Optional[list]): 参与事务的 mijiaDevice 列表，默认为所有设备
+
+        异常:
+            DeviceBatchError: 仅一个设备参与事务且部分属性设置失败
+            TransactionError: 部分设备的属性设置失败，errors 为 {did: DeviceBatchError}
+
+        示例:
+            >>> with api.transaction():
+            ...     lamp.on = True
+            ...     lamp.brightness = 60
+            ...     strip.color_temperature = 2700
+        """
+        return Transaction(self, devices)
+
+    def coalescer_stats(self) -> dict:
+        """
+        获取属性读写合并的统计信息（需在构造时指定 coalesce_window）
+
+        返回值:
+            dict: {"get": 统计, "set": 统计}，未启用合并时为空 dict。每项统计包含：
+                - batches (int): 已发送的批次数
+                - items (int): 已合并的请求数
+                - avg_batch_size (float): 平均每批请求数
+                - max_batch_size (int): 最大批次大小
+                - sizes (dict): {批次大小: 次数}
+        """
+        return {kind: coalescer.stats.snapshot() for kind, coalescer in self._coalescers.items()}
+
+    def _fan_out_homes(self, func: Callable[[str], list], what: str, extra: Optional[dict] = None) -> list:
+        """对每个家庭并发调用 func(home_id) 并按家庭顺序合并结果，extra 为额外一并获取的 {名称: 函数}。"""
+        keys = [home["id"] for home in self._load_topology()[0]]
+        funcs = [partial(func, home_id) for home_id in keys]
+        for key, extra_func in (extra or {}).items():
+            keys.append(key)
+            funcs.append(extra_func)
+        results, errors = self._run_concurrently(funcs, fail_fast=False)
+        merged = [item for result in results if result is not None for item in result]
+        if errors:
+            errors = {keys[i]: e for i, e in errors.items()}
+            for key, e in errors.items():
+                logger.warning(f"获取 {key} 的{what}失败: {e}")
+            raise PartialFailureError(f"部分家庭的{what}获取失败", merged, errors)
+        return merged
+
+    def _cached_topology(self) -> Optional[tuple[list, dict, float]]:
+        topology = self._topology
+        if topology is not None and time.monotonic() - topology[2] < self.topology_ttl:
+            return topology
+        return None
+
+    def _store_topology(self, homes: list) -> tuple[list, dict, float]:
+        owners = {home["id"]: int(home["uid"]) for home in homes}
+        self._topology = (homes, owners, time.monotonic())
+        self._topology_fetches += 1
+        return self._topology
+
+    def _load_topology(self, refresh: bool = False) -> tuple[list, dict, float]:
+        if not refresh:
+            topology = self._cached_topology()
+            if topology is not None:
+                return topology
+        fetches = self._topology_fetches
+        with self._topology_lock:
+            # 等待锁期间其他线程可能已完成获取
+            topology = self._topology
+            if topology is not None and self._topology_fetches != fetches:
+                return topology
+            uri, data = self._homes_list_payload()
+            return self._store_topology(self._request(uri, data)["homelist"])
+
+    def invalidate_topology(self) -> None:
+        """清除家庭列表及家庭所属用户缓存，下次调用时重新获取。"""
+        self._topology = None
+
     def _get_home_owner(self, home_id: str) -> int:
-        homes = self.get_homes_list()
-        for home in homes:
-            if home["id"] == home_id:
-                return int(home["uid"])
+        for refresh in (False, True):
+            owner = self._load_topology(refresh)[1].get(home_id)
+            if owner is not None:
+                return owner
         raise APIError(-1, f"未找到 home_id={home_id} 的家庭信息")
 
-    def _get_devices_list(self, home_id: str) -> list:
+    @staticmethod
+    def _devices_page_payload(home_owner: int, home_id: str, start_did: str) -> tuple[str, dict]:
         uri = "/home/home_device_list"
-        start_did = ""
-        has_more = True
-        devices = []
-        while has_more:
-            data = {
-                "home_owner": self._get_home_owner(home_id),
-                "home_id": int(home_id),
-                "limit": 200,
-                "start_did": start_did,
-                "get_split_device": True,
-                "support_smart_home": True,
-                "get_cariot_device": True,
-                "get_third_device": True
-            }
-            ret = self._request(uri, data)
-            if ret and ret.get("device_info"):
-                devices.extend(ret["device_info"])
-                start_did = ret.get("max_did", "")
-                has_more = ret.get("has_more", False) and start_did != ""
-            else:
-                has_more = False
-        return self._add_home_id(devices, home_id)
+        data = {
+            "home_owner": home_owner,
+            "home_id": int(home_id),
+            "limit": 200,
+            "start_did": start_did,
+            "get_split_device": True,
+            "support_smart_home": True,
+            "get_cariot_device": True,
+            "get_third_device": True
+        }
+        return uri, data
 
-    def _get_scenes_list(self, home_id: str) -> list:
+    @staticmethod
+    def _parse_devices_page(ret: dict) -> tuple[list, str, bool]:
+        if ret and ret.get("device_info"):
+            start_did = ret.get("max_did", "")
+            has_more = ret.get("has_more", False) and start_did != ""
+            return ret["device_info"], start_did, has_more
+        return [], "", False
+
+    @staticmethod
+    def _scenes_payload(home_owner: int, home_id: str) -> tuple[str, dict]:
         uri = "/appgateway/miot/appsceneservice/AppSceneService/GetSimpleSceneList"
-        data = {"app_version": 12, "get_type": 2, "home_id": str(home_id), "owner_uid": self._get_home_owner(home_id)}
-        ret = self._request(uri, data)
+        data = {"app_version": 12, "get_type": 2, "home_id": str(home_id), "owner_uid": home_owner}
+        return uri, data
+
+    @classmethod
+    def _parse_scenes(cls, ret: dict, home_id: str) -> list:
         if ret and "manual_scene_info_list" in ret:
             scenes = ret["manual_scene_info_list"]
-            return self._add_home_id(scenes, home_id)
+            return cls._add_home_id(scenes, home_id)
         return []
 
-    def _get_consumable_items(self, home_id: str) -> list:
+    @staticmethod
+    def _consumable_items_payload(home_owner: int, home_id: str) -> tuple[str, dict]:
         uri = "/v2/home/standard_consumable_items"
-        data = {"home_id": int(home_id), "owner_id": self._get_home_owner(home_id), "filter_ignore": True}
-        ret = self._request(uri, data)
+        data = {"home_id": int(home_id), "owner_id": home_owner, "filter_ignore": True}
+        return uri, data
+
+    @classmethod
+    def _parse_consumable_items(cls, ret: dict, home_id: str) -> list:
         try:
             items = ret["items"][0]["consumes_data"]
             for item in items:
                 if isinstance(item.get("details"), list) and len(item["details"]) == 1:
                     item["details"] = item["details"][0]
-            return self._add_home_id(items, home_id)
+            return cls._add_home_id(items, home_id)
         except (KeyError, IndexError):
             return []
 
+    @staticmethod
+    def _homes_list_payload() -> tuple[str, dict]:
+        uri = "/v2/homeroom/gethome_merged"
+        data = {"fg": True, "fetch_share": True, "fetch_share_dev": True, "fetch_cariot": True, "limit": 300, "app_ver": 7, "plat_form": 0}
+        return uri, data
+
+    @staticmethod
+    def _shared_devices_payload() -> tuple[str, dict]:
+        uri = "/v2/home/device_list_page"
+        data = {"ssid": "<unknown ssid>", "bssid": "02:00:00:00:00:00", "getVirtualModel": True, "getHuamiDevices": 1, "get_split_device": True, "support_smart_home": True, "get_cariot_device": True, "get_third_device": True, "get_phone_device": True, "get_miwear_device": True}
+        return uri, data
+
+    @staticmethod
+    def _parse_shared_devices(ret: dict) -> list:
+        devices = [item for item in ret["list"] if item.get("owner", False)]
+        for device in devices:
+            device.update({"home_id": "shared"})
+        return devices
+
+    @staticmethod
+    def _run_scene_payload(scene_id: str, home_owner: int, home_id: str) -> tuple[str, dict]:
+        uri = "/appgateway/miot/appsceneservice/AppSceneService/NewRunScene"
+        data = {"scene_id": scene_id, "scene_type": 2, "phone_id": "null", "home_id": str(home_id), "owner_uid": home_owner}
+        return uri, data
+
+    def _iter_home_devices(self, home_id: str) -> Iterator[dict]:
+        start_did = ""
+        has_more = True
+        while has_more:
+            uri, data = self._devices_page_payload(self._get_home_owner(home_id), home_id, start_did)
+            page, start_did, has_more = self._parse_devices_page(self._request(uri, data))
+            yield from self._add_home_id(page, home_id)
+
+    def _get_devices_list(self, home_id: str) -> list:
+        return list(self._iter_home_devices(home_id))
+
+    def _get_scenes_list(self, home_id: str) -> list:
+        uri, data = self._scenes_payload(self._get_home_owner(home_id), home_id)
+        return self._parse_scenes(self._request(uri, data), home_id)
+
+    def _get_consumable_items(self, home_id: str) -> list:
+        uri, data = self._consumable_items_payload(self._get_home_owner(home_id), home_id)
+        return self._parse_consumable_items(self._request(uri, data), home_id)
+
 
     def check_new_msg(self, begin_at: int = int(time.time()) - 3600, refresh_token: bool = True) -> dict:
         uri = "/v2/message/v2/check_new_msg"
         data = {"begin_at": begin_at}
         return self._request(uri, data, refresh_token=refresh_token)
 
-    def get_homes_list(self) -> list:
+    def get_homes_list(self, refresh: bool = False) -> list:
         """
         获取用户的所有家庭列表
 
-        包括自己创建的家庭和被共享的家庭。
+        包括自己创建的家庭和被共享的家庭。结果会缓存 topology_ttl 秒，
+        获取设备、场景、耗材列表及执行场景时查询家庭所属用户也使用该缓存。
 
         参数:
-            无
+            refresh (bool): 是否忽略缓存重新获取，默认 False
 
         返回值:
             list: 家庭信息列表，每个元素为一个dict，包含以下常见字段：
@@ -421,20 +922,20 @@ class mijiaAPI():
         异常:
             APIError: 当API请求失败或返回错误时抛出
         """
-        uri = "/v2/homeroom/gethome_merged"
-        data = {"fg": True, "fetch_share": True, "fetch_share_dev": True, "fetch_cariot": True, "limit": 300, "app_ver": 7, "plat_form": 0}
-        return self._request(uri, data)["homelist"]
+        return copy.deepcopy(self._load_topology(refresh)[0])
 
-    def get_devices_list(self, home_id: Optional[str] = None) -> list:
+    def get_devices_list(self, home_id: Optional[str] = None, include_shared: bool = False) -> list:
         """
         获取设备列表
 
         获取用户指定家庭中的所有设备，或者获取所有家庭中的所有设备。
+        获取所有家庭时各家庭并发请求（最多 max_workers 个），结果按家庭顺序合并。
 
         参数:
             home_id (Optional[str]): 可选，家庭ID。
                 - 如果为 None，则获取所有家庭中的所有设备
                 - 如果指定，则仅获取该家庭中的设备
+            include_shared (bool): 是否同时并发获取共享设备列表（追加在末尾），默认 False
 
         返回值:
             list: 设备信息列表，每个元素为一个dict，包含以下常见字段：
@@ -447,16 +948,44 @@ class mijiaAPI():
 
         异常:
             APIError: 当API请求失败或返回错误时抛出
+            PartialFailureError: 部分家庭获取失败时抛出，results 为成功部分合并后的设备列表，
+                errors 为 {home_id 或 "shared": 异常}
         """
+        extra = {"shared": self.get_shared_devices_list} if include_shared else None
         if home_id is None:
-            home_list = self.get_homes_list()
-            devices = []
-            for home in home_list:
-                devices.extend(self._get_devices_list(home["id"]))
-            return devices
+            return self._fan_out_homes(self._get_devices_list, "设备列表", extra)
+        elif include_shared:
+            results, _ = self._run_concurrently([partial(self._get_devices_list, home_id), self.get_shared_devices_list])
+            return results[0] + results[1]
         else:
             return self._get_devices_list(home_id)
 
+    def iter_devices(self, home_id: Optional[str] = None) -> Iterator[dict]:
+        """
+        逐个产出设备信息的生成器
+
+        与 get_devices_list 返回的设备相同，但按页（每页 200 个）请求，每页返回后立即产出，
+        无需等待全部家庭、全部分页获取完成；提前结束迭代时不会再请求后续分页。
+        不指定 home_id 时按家庭顺序依次遍历所有家庭。
+
+        参数:
+            home_id (Optional[str]): 可选，家庭ID。
+                - 如果为 None，则依次遍历所有家庭中的设备
+                - 如果指定，则仅遍历该家庭中的设备
+
+        返回值:
+            Iterator[dict]: 设备信息，字段同 get_devices_list
+
+        异常:
+            APIError: 当API请求失败或返回错误时抛出
+
+        示例:
+            >>> device = next(d for d in api.iter_devices() if d["did"] == did)
+        """
+        home_ids = [home_id] if home_id is not None else [home["id"] for home in self._load_topology()[0]]
+        for home_id in home_ids:
+            yield from self._iter_home_devices(home_id)
+
     def get_shared_devices_list(self) -> list:
         """
         获取共享设备列表
@@ -476,13 +1005,8 @@ class mijiaAPI():
         异常:
             APIError: 当API请求失败或返回错误时抛出
         """
-        uri = "/v2/home/device_list_page"
-        data = {"ssid": "<unknown ssid>", "bssid": "02:00:00:00:00:00", "getVirtualModel": True, "getHuamiDevices": 1, "get_split_device": True, "support_smart_home": True, "get_cariot_device": True, "get_third_device": True, "get_phone_device": True, "get_miwear_device": True}
-        ret = self._request(uri, data)
-        devices = [item for item in ret["list"] if item.get("owner", False)]
-        for device in devices:
-            device.update({"home_id": "shared"})
-        return devices
+        uri, data = self._shared_devices_payload()
+        return self._parse_shared_devices(self._request(uri, data))
 
     def get_scenes_list(self, home_id: Optional[str] = None) -> list:
         """
@@ -492,7 +1016,7 @@ class mijiaAPI():
 
         参数:
             home_id (Optional[str]): 可选，家庭ID。
-                - 如果为 None，则获取所有家庭中的所有场景
+                - 如果为 None，则并发获取所有家庭中的所有场景，结果按家庭顺序合并
                 - 如果指定，则仅获取该家庭中的场景
 
         返回值:
@@ -504,13 +1028,10 @@ class mijiaAPI():
 
         异常:
             APIError: 当API请求失败或返回错误时抛出
+            PartialFailureError: 部分家庭获取失败时抛出，results 为成功部分，errors 为 {home_id: 异常}
         """
         if home_id is None:
-            home_list = self.get_homes_list()
-            scenes = []
-            for home in home_list:
-                scenes.extend(self._get_scenes_list(home["id"]))
-            return scenes
+            return self._fan_out_homes(self._get_scenes_list, "场景列表")
         else:
             return self._get_scenes_list(home_id)
 
@@ -532,8 +1053,7 @@ class mijiaAPI():
         异常:
             APIError: 当API请求失败或返回错误时抛出
         """
-        uri = "/appgateway/miot/appsceneservice/AppSceneService/NewRunScene"
-        data = {"scene_id": scene_id, "scene_type": 2, "phone_id": "null", "home_id": str(home_id), "owner_uid": self._get_home_owner(home_id)}
+        uri, data = self._run_scene_payload(scene_id, self._get_home_owner(home_id), home_id)
         return self._request(uri, data)
 
     def get_consumable_items(self, home_id: Optional[str] = None) -> list:
@@ -545,7 +1065,7 @@ class mijiaAPI():
 
         参数:
             home_id (Optional[str]): 可选，家庭ID。
-                - 如果为 None，则获取所有家庭中的所有耗材
+                - 如果为 None，则并发获取所有家庭中的所有耗材，结果按家庭顺序合并
                 - 如果指定，则仅获取该家庭中的耗材
 
         返回值:
@@ -563,13 +1083,10 @@ class mijiaAPI():
 
         异常:
             APIError: 当API请求失败或返回错误时抛出
+            PartialFailureError: 部分家庭获取失败时抛出，results 为成功部分，errors 为 {home_id: 异常}
         """
         if home_id is None:
-            home_list = self.get_homes_list()
-            items = []
-            for home in home_list:
-                items.extend(self._get_consumable_items(home["id"]))
-            return items
+            return self._fan_out_homes(self._get_consumable_items, "耗材列表")
         else:
             return self._get_consumable_items(home_id)
 
@@ -578,7 +1095,9 @@ class mijiaAPI():
         获取设备属性
 
         获取一个或多个设备的属性值，例如灯的亮度、色温、开关状态等。
-        支持批量获取多个设备的多个属性。
+        支持批量获取多个设备的多个属性，超过 max_batch_size 个时自动拆分为多个请求并发发送，
+        结果仍按输入顺序返回。指定了 coalesce_window 时，不同线程在窗口内发起的单项（dict）
+        查询会合并为一次请求。
 
         参数:
             data (Union[list, dict]): 设备属性查询参数
@@ -626,11 +1145,12 @@ class mijiaAPI():
             ... ])
         """
         if isinstance(data, dict):
+            if self._coalescers:
+                return self._coalescers["get"].submit(data)
             params = [data]
         else:
             params = data
-        uri = "/miotspec/prop/get"
-        ret_data = self._request(uri, {"params": params, "datasource": 1})
+        ret_data = self._get_props(params)
         if isinstance(data, dict) and len(ret_data) == 1:
             return ret_data[0]
         return ret_data
@@ -640,7 +1160,9 @@ class mijiaAPI():
         设置设备属性
 
         设置一个或多个设备的属性值，例如灯的亮度、色温等。
-        支持批量设置多个设备的多个属性。
+        支持批量设置多个设备的多个属性，超过 max_batch_size 个时自动拆分为多个请求并发发送，
+        结果仍按输入顺序返回。指定了 coalesce_window 时，不同线程在窗口内发起的单项（dict）
+        设置会合并为一次请求。
 
         参数:
             data (Union[list, dict]): 设备属性参数
@@ -689,26 +1211,23 @@ class mijiaAPI():
             ... ])
         """
         if isinstance(data, dict):
+            if self._coalescers:
+                return self._coalescers["set"].submit(data)
             params = [data]
         else:
             params = data
-        uri = "/miotspec/prop/set"
-        ret_data = self._request(uri, {"params": params})
-        for ret in ret_data:
-            if ret.get("code", 0) not in (0, 1):
-                ret.update({"message": ERROR_CODE.get(str(ret["code"]), "未知错误")})
-            else:
-                ret.update({"message": "成功"})
+        ret_data = self._set_props(params)
         if isinstance(data, dict) and len(ret_data) == 1:
             return ret_data[0]
         return ret_data
 
-    def run_action(self, data: Union[list, dict]) -> Union[list, dict]:
+    def run_action(self, data: Union[list, dict], fail_fast: bool = True) -> Union[list, dict]:
         """
         执行设备操作
 
         执行一个或多个设备的操作/方法，例如开关灯、喂食等。
-        支持批量执行多个设备的多个操作。
+        支持批量执行多个设备的多个操作，列表中的各项并发执行（最多 max_workers 个），
+        结果按输入顺序返回。
 
         参数:
             data (Union[list, dict]): 设备操作参数
@@ -722,6 +1241,8 @@ class mijiaAPI():
                 - aiid (int): 操作/方法ID，从 https://home.miot-spec.com/spec/{model} 获取，
                               model 从 get_devices_list() 获取
                 - value (list): 可选，操作的参数列表，根据具体操作定义而定
+            fail_fast (bool): 列表输入时，是否在第一项请求失败时立即抛出该异常，默认 True；
+                为 False 时等待全部执行完毕，再以 PartialFailureError 汇总失败项
 
         返回值:
             Union[list, dict]: 操作结果
@@ -738,6 +1259,8 @@ class mijiaAPI():
 
         异常:
             APIError: 当API请求失败或返回错误时抛出
+            PartialFailureError: fail_fast 为 False 且部分请求失败时抛出，results 为按输入顺序的结果
+                （失败项为 None，成功项已解码 message），errors 为 {输入下标: 异常}
 
         示例:
             # yeelink.light.lamp4 (米家台灯 1S)
@@ -766,27 +1289,25 @@ class mijiaAPI():
         else:
             params = data
         uri = "/miotspec/action"
-        ret_data = []
-        for param in params:
-            ret = self._request(uri, {"params": param})
-            ret_data.append(ret)
-        for ret in ret_data:
-            if ret.get("code", 0) not in (0, 1):
-                ret.update({"message": ERROR_CODE.get(str(ret["code"]), "未知错误")})
-            else:
-                ret.update({"message": "成功"})
+        try:
+            ret_data = self._request_each(uri, [{"params": param} for param in params], "设备操作执行", fail_fast)
+        except PartialFailureError as e:
+            self._decode_codes([ret for ret in e.results if ret is not None])
+            raise
+        self._decode_codes(ret_data)
         if isinstance(data, dict) and len(ret_data) == 1:
             return ret_data[0]
         return ret_data
 
-    def get_statistics(self, data: dict) -> list:
+    def get_statistics(self, data: Union[list, dict], fail_fast: bool = True) -> list:
         """
         获取设备统计数据。
 
         获取指定设备的统计信息，如耗电量、使用时长等。支持按小时、天、周、月等不同粒度统计。
+        传入列表时各项并发查询（最多 max_workers 个），结果按输入顺序返回。
 
         参数：
-            data (dict): 统计查询参数，包含以下字段：
+            data (Union[list, dict]): 统计查询参数，传入列表时每个元素为一次查询，包含以下字段：
                 - did (str): 设备ID
                 - key (str): 统计数据的键，格式为 siid.piid（服务ID.属性ID），
                   例如 "7.1" 表示 lumi.acpartner.mcn04 (米家空调伴侣Pro 万能遥控版) 的 power-consumption
@@ -799,12 +1320,19 @@ class mijiaAPI():
                 - limit (int): 返回的最大条目数
                 - time_start (int): 开始时间戳（秒）
                 - time_end (int): 结束时间戳（秒）
+            fail_fast (bool): 列表输入时，是否在第一项请求失败时立即抛出该异常，默认 True；
+                为 False 时等待全部查询完毕，再以 PartialFailureError 汇总失败项
 
         返回值：
-            list: 统计数据列表，每项包含以下字段：
+            list: 统计数据列表，每项包含以下字段（列表输入时为按输入顺序排列的多个统计数据列表）：
                 - value (str): 统计值（通常需要用 eval() 解析）
                 - time (int): 时间戳
 
+        异常：
+            APIError: 当API请求失败或返回错误时抛出
+            PartialFailureError: fail_fast 为 False 且部分查询失败时抛出，results 中失败项为 None，
+                errors 为 {输入下标: 异常}
+
         已知问题：
             - 支持的设备有限，不同型号设备的 API 可能不同
             - 较旧的设备 data_type 格式不同（无 "_v3" 后缀）
@@ -839,10 +1367,7 @@ class mijiaAPI():
         else:
             params = data
         uri = "/v2/user/statistics"
-        ret_data = []
-        for param in params:
-            ret = self._request(uri, param)
-            ret_data.append(ret)
+        ret_data = self._request_each(uri, params, "统计数据获取", fail_fast)
         if isinstance(data, dict) and len(ret_data) == 1:
             return ret_data[0]
         return ret_data
@@ -0,0 +1,393 @@
+import asyncio
+import copy
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Union
+
+import httpx
+
+from .apis import AUTH_ERROR_STATUS, READ_ONLY_URIS, RESPONSE_CHUNK_SIZE, mijiaAPI
+from .coalescer import AsyncPropCoalescer
+from .errors import APIError, PartialFailureError
+from .logger import logger
+from .ratelimit import RateLimiter
+from .transaction import Transaction
+
+
+class AsyncMijiaAPI():
+    """
+    mijiaAPI 的 asyncio 版本
+
+    认证、登录与 Token 刷新复用同步的 mijiaAPI 实例（可通过 api 参数共享），
+    请求签名与加解密复用 miutils 中的实现，设备相关接口改为基于连接池的
+    httpx.AsyncClient 发送，单个事件循环即可同时保持大量请求在途。
+
+    示例:
+        >>> async with AsyncMijiaAPI(".mijia-api-data/auth.json") as api:
+        ...     devices = await api.get_devices_list()
+    """
+    def __init__(
+            self,
+            auth_data_path: Optional[str] = None,
+            api: Optional[mijiaAPI] = None,
+            max_connections: int = 100,
+            timeout: float = 30.0,
+            max_concurrency: Optional[int] = None,
+    ):
+        # 未传入 api 时自行创建，aclose() 时一并关闭
+        self._owns_api = api is None
+        self.api = api if api is not None else mijiaAPI(auth_data_path)
+        self.max_connections = max_connections
+        # 多个家庭/多个请求并发执行时的最大并发数，默认与连接池大小一致
+        self.max_concurrency = max(1, max_concurrency if max_concurrency is not None else max_connections)
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._topology_lock: Optional[asyncio.Lock] = None
+        # 在途只读请求: {(uri, 规范化 data, refresh_token): [Task, 等待者数量]}，开关取自 api.dedup_reads
+        self._inflight: dict[tuple, list] = {}
+        # 单项属性读写合并器，窗口与大小上限取自 api.coalesce_window / api.max_batch_size
+        self._coalescers: dict[str, AsyncPropCoalescer] = {}
+        if self.api.coalesce_window is not None:
+            self._coalescers = {
+                "get": AsyncPropCoalescer(self._get_props, self.api.coalesce_window, self.api.max_batch_size),
+                "set": AsyncPropCoalescer(self._set_props, self.api.coalesce_window, self.api.max_batch_size),
+            }
+
+    @property
+    def auth_data(self) -> dict:
+        return self.api.auth_data
+
+    @property
+    def auth_data_path(self) -> Path:
+        return self.api.auth_data_path
+
+    @property
+    def spec_cache_path(self) -> Path:
+        return self.api.spec_cache_path
+
+    @property
+    def spec_bundle_path(self) -> Optional[Path]:
+        return self.api.spec_bundle_path
+
+    @property
+    def available(self) -> bool:
+        return self.api.available
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self.api.rate_limiter
+
+    @property
+    def gateway_interval(self) -> Optional[float]:
+        return self.api.gateway_interval
+
+    def login(self, *args, **kwargs) -> dict:
+        return self.api.login(*args, **kwargs)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._owns_api:
+            self.api.close()
+
+    async def __aenter__(self) -> "AsyncMijiaAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _send(self, uri: str, data: dict, session_state: tuple) -> dict:
+        session, crypto = session_state
+        url, params, request_crypto = self.api._prepare_request(uri, data, crypto)
+        headers = dict(session.headers)
+        async with self._get_client().stream("POST", url, data=params, headers=headers) as ret:
+            if ret.status_code in AUTH_ERROR_STATUS:
+                return self.api._parse_response(ret.status_code, await ret.aread(), request_crypto)
+            # 与同步版本一致，边接收边解码、解密、解压
+            decoder = request_crypto.decoder()
+            async for chunk in ret.aiter_bytes(RESPONSE_CHUNK_SIZE):
+                decoder.feed(chunk)
+        return self.api._check_result(decoder.result())
+
+    async def _request(self, uri: str, data: dict, refresh_token: bool = True) -> dict:
+        if not self.api.dedup_reads or uri not in READ_ONLY_URIS:
+            return await self._request_once(uri, data, refresh_token)
+        key = self.api._inflight_key(uri, data, refresh_token)
+        entry = self._inflight.get(key)
+        if entry is None:
+            # 请求在独立任务中执行，任一调用方被取消都不影响其余调用方
+            task = asyncio.ensure_future(self._request_once(uri, data, refresh_token))
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            entry[1] += 1
+            logger.debug(f"相同的请求正在进行中，等待其结果: {uri}")
+        result = await asyncio.shield(entry[0])
+        # 有多个调用方共享结果时各自拿一份拷贝，避免互相修改
+        return copy.deepcopy(result) if entry[1] else result
+
+    async def _request_once(self, uri: str, data: dict, refresh_token: bool = True) -> dict:
+        logger.debug(f"请求 URI: {uri}，数据: {data}")
+        # 与同步版本一致，先采用其他进程写入共享认证存储的新 Token；
+        # 检查间隔内不访问存储，到期时的 stat / 重新读取在线程中执行，不阻塞事件循环
+        if self.api.credential_store.check_due():
+            await asyncio.to_thread(self.api._sync_credentials)
+        if refresh_token and self.api.token_refresh == "preflight":
+            await asyncio.to_thread(self.api._refresh_token)
+        session_state = self.api._session_state
+        if session_state is None:
+            session_state = await asyncio.to_thread(self.api._ensure_session, refresh_token)
+        try:
+            return await self._send(uri, data, session_state)
+        except APIError as e:
+            if not refresh_token or self.api.token_refresh != "reactive" or not self.api._is_auth_error(e):
+                raise
+            logger.debug(f"服务器拒绝了当前 Token (code: {e.code})，刷新后重试")
+            await asyncio.to_thread(self.api._refresh_token, True, session_state[0])
+            return await self._send(uri, data, self.api._session_state)
+
+    async def _run_concurrently(
+            self,
+            funcs: list[Callable[[], Awaitable[Any]]],
+            fail_fast: bool = True,
+    ) -> tuple[list, dict]:
+        """并发执行 funcs（最多 max_concurrency 个），语义同 mijiaAPI._run_concurrently。"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(func):
+            async with semaphore:
+                return await func()
+
+        tasks = [asyncio.ensure_future(run(func)) for func in funcs]
+        if fail_fast:
+            try:
+                return list(await asyncio.gather(*tasks)), {}
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        results = [None if isinstance(outcome, Exception) else outcome for outcome in outcomes]
+        errors = {i: outcome for i, outcome in enumerate(outcomes) if isinstance(outcome, Exception)}
+        return results, errors
+
+    async def _batched_request(self, uri: str, params: list, extra: Optional[dict] = None) -> list:
+        """按 api.max_batch_size 拆分 params 并发请求，参见 mijiaAPI._batched_request。"""
+        batches = self.api._split_batches(params, self.api.max_batch_size)
+        funcs = [lambda batch=batch: self._request(uri, {"params": batch, **(extra or {})}) for batch in batches]
+        results, _ = await self._run_concurrently(funcs)
+        return [item for result in results for item in result]
+
+    async def _get_props(self, params: list) -> list:
+        return await self._batched_request("/miotspec/prop/get", params, {"datasource": 1})
+
+    async def _set_props(self, params: list) -> list:
+        return self.api._decode_codes(await self._batched_request("/miotspec/prop/set", params))
+
+    def transaction(self, devices: Optional[list] = None) -> Transaction:
+        """延迟写入事务，需使用 async with，参见 mijiaAPI.transaction。"""
+        return Transaction(self, devices)
+
+    def coalescer_stats(self) -> dict:
+        """获取本实例属性读写合并的统计信息，参见 mijiaAPI.coalescer_stats。"""
+        return {kind: coalescer.stats.snapshot() for kind, coalescer in self._coalescers.items()}
+
+    async def _request_each(self, uri: str, payloads: list, what: str, fail_fast: bool = True) -> list:
+        """并发发送每个 payload（最多 max_concurrency 个），语义同 mijiaAPI._request_each。"""
+        funcs = [lambda payload=payload: self._request(uri, payload) for payload in payloads]
+        results, errors = await self._run_concurrently(funcs, fail_fast)
+        if errors:
+            for i, e in errors.items():
+                logger.warning(f"第 {i} 项{what}失败: {e}")
+            raise PartialFailureError(f"部分{what}失败", results, errors)
+        return results
+
+    async def _fan_out_homes(
+            self,
+            func: Callable[[str], Awaitable[list]],
+            what: str,
+            extra: Optional[dict] = None,
+    ) -> list:
+        keys = [home["id"] for home in (await self._load_topology())[0]]
+        funcs = [lambda home_id=home_id: func(home_id) for home_id in keys]
+        for key, extra_func in (extra or {}).items():
+            keys.append(key)
+            funcs.append(extra_func)
+        results, errors = await self._run_concurrently(funcs, fail_fast=False)
+        merged = [item for result in results if result is not None for item in result]
+        if errors:
+            errors = {keys[i]: e for i, e in errors.items()}
+            for key, e in errors.items():
+                logger.warning(f"获取 {key} 的{what}失败: {e}")
+            raise PartialFailureError(f"部分家庭的{what}获取失败", merged, errors)
+        return merged
+
+    async def _load_topology(self, refresh: bool = False) -> tuple[list, dict, float]:
+        # 与同步的 mijiaAPI 共享家庭拓扑缓存
+        if not refresh:
+            topology = self.api._cached_topology()
+            if topology is not None:
+                return topology
+        if self._topology_lock is None:
+            self._topology_lock = asyncio.Lock()
+        fetches = self.api._topology_fetches
+        async with self._topology_lock:
+            topology = self.api._topology
+            if topology is not None and self.api._topology_fetches != fetches:
+                return topology
+            uri, data = self.api._homes_list_payload()
+            return self.api._store_topology((await self._request(uri, data))["homelist"])
+
+    def invalidate_topology(self) -> None:
+        """清除家庭列表及家庭所属用户缓存，参见 mijiaAPI.invalidate_topology。"""
+        self.api.invalidate_topology()
+
+    async def _get_home_owner(self, home_id: str) -> int:
+        for refresh in (False, True):
+            owner = (await self._load_topology(refresh))[1].get(home_id)
+            if owner is not None:
+                return owner
+        raise APIError(-1, f"未找到 home_id={home_id} 的家庭信息")
+
+    async def _iter_home_devices(self, home_id: str) -> AsyncIterator[dict]:
+        start_did = ""
+        has_more = True
+        while has_more:
+            uri, data = self.api._devices_page_payload(await self._get_home_owner(home_id), home_id, start_did)
+            page, start_did, has_more = self.api._parse_devices_page(await self._request(uri, data))
+            for device in self.api._add_home_id(page, home_id):
+                yield device
+
+    async def _get_devices_list(self, home_id: str) -> list:
+        return [device async for device in self._iter_home_devices(home_id)]
+
+    async def _get_scenes_list(self, home_id: str) -> list:
+        uri, data = self.api._scenes_payload(await self._get_home_owner(home_id), home_id)
+        return self.api._parse_scenes(await self._request(uri, data), home_id)
+
+    async def _get_consumable_items(self, home_id: str) -> list:
+        uri, data = self.api._consumable_items_payload(await self._get_home_owner(home_id), home_id)
+        return self.api._parse_consumable_items(await self._request(uri, data), home_id)
+
+    async def check_new_msg(self, begin_at: Optional[int] = None, refresh_token: bool = True) -> dict:
+        uri = "/v2/message/v2/check_new_msg"
+        data = {"begin_at": begin_at if begin_at is not None else int(time.time()) - 3600}
+        return await self._request(uri, data, refresh_token=refresh_token)
+
+    async def get_homes_list(self, refresh: bool = False) -> list:
+        """获取用户的所有家庭列表，参见 mijiaAPI.get_homes_list。"""
+        return copy.deepcopy((await self._load_topology(refresh))[0])
+
+    async def get_devices_list(self, home_id: Optional[str] = None, include_shared: bool = False) -> list:
+        """获取设备列表，参见 mijiaAPI.get_devices_list。"""
+        extra = {"shared": self.get_shared_devices_list} if include_shared else None
+        if home_id is None:
+            return await self._fan_out_homes(self._get_devices_list, "设备列表", extra)
+        elif include_shared:
+            results, _ = await self._run_concurrently([lambda: self._get_devices_list(home_id), self.get_shared_devices_list])
+            return results[0] + results[1]
+        else:
+            return await self._get_devices_list(home_id)
+
+    async def iter_devices(self, home_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        逐个产出设备信息的异步生成器，参见 mijiaAPI.iter_devices。
+
+            >>> async for device in api.iter_devices():
+            ...     print(device["name"])
+        """
+        home_ids = [home_id] if home_id is not None else [home["id"] for home in (await self._load_topology())[0]]
+        for home_id in home_ids:
+            async for device in self._iter_home_devices(home_id):
+                yield device
+
+    async def get_shared_devices_list(self) -> list:
+        """获取共享设备列表，参见 mijiaAPI.get_shared_devices_list。"""
+        uri, data = self.api._shared_devices_payload()
+        return self.api._parse_shared_devices(await self._request(uri, data))
+
+    async def get_scenes_list(self, home_id: Optional[str] = None) -> list:
+        """获取场景列表，参见 mijiaAPI.get_scenes_list。"""
+        if home_id is None:
+            return await self._fan_out_homes(self._get_scenes_list, "场景列表")
+        else:
+            return await self._get_scenes_list(home_id)
+
+    async def run_scene(self, scene_id: str, home_id: str) -> bool:
+        """执行手动场景，参见 mijiaAPI.run_scene。"""
+        uri, data = self.api._run_scene_payload(scene_id, await self._get_home_owner(home_id), home_id)
+        return await self._request(uri, data)
+
+    async def get_consumable_items(self, home_id: Optional[str] = None) -> list:
+        """获取耗材列表，参见 mijiaAPI.get_consumable_items。"""
+        if home_id is None:
+            return await self._fan_out_homes(self._get_consumable_items, "耗材列表")
+        else:
+            return await self._get_consumable_items(home_id)
+
+    async def get_devices_prop(self, data: Union[list, dict]) -> Union[list, dict]:
+        """获取设备属性，参见 mijiaAPI.get_devices_prop。"""
+        if isinstance(data, dict):
+            if self._coalescers:
+                return await self._coalescers["get"].submit(data)
+            params = [data]
+        else:
+            params = data
+        ret_data = await self._get_props(params)
+        if isinstance(data, dict) and len(ret_data) == 1:
+            return ret_data[0]
+        return ret_data
+
+    async def set_devices_prop(self, data: Union[list, dict]) -> Union[list, dict]:
+        """设置设备属性，参见 mijiaAPI.set_devices_prop。"""
+        if isinstance(data, dict):
+            if self._coalescers:
+                return await self._coalescers["set"].submit(data)
+            params = [data]
+        else:
+            params = data
+        ret_data = await self._set_props(params)
+        if isinstance(data, dict) and len(ret_data) == 1:
+            return ret_data[0]
+        return ret_data
+
+    async def run_action(self, data: Union[list, dict], fail_fast: bool = True) -> Union[list, dict]:
+        """执行设备操作，参见 mijiaAPI.run_action。列表输入的各项并发执行（最多 max_concurrency 个），结果按输入顺序返回。"""
+        if isinstance(data, dict):
+            params = [data]
+        else:
+            params = data
+        uri = "/miotspec/action"
+        try:
+            ret_data = await self._request_each(uri, [{"params": param} for param in params], "设备操作执行", fail_fast)
+        except PartialFailureError as e:
+            self.api._decode_codes([ret for ret in e.results if ret is not None])
+            raise
+        self.api._decode_codes(ret_data)
+        if isinstance(data, dict) and len(ret_data) == 1:
+            return ret_data[0]
+        return ret_data
+
+    async def get_statistics(self, data: Union[list, dict], fail_fast: bool = True) -> list:
+        """获取设备统计数据，参见 mijiaAPI.get_statistics。列表输入的各项并发执行（最多 max_concurrency 个），结果按输入顺序返回。"""
+        if isinstance(data, dict):
+            params = [data]
+        else:
+            params = data
+        uri = "/v2/user/statistics"
+        ret_data = await self._request_each(uri, params, "统计数据获取", fail_fast)
+        if isinstance(data, dict) and len(ret_data) == 1:
+            return ret_data[0]
+        return ret_data
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Iterable, Optional, Union
+
+from .async_apis import AsyncMijiaAPI
+from .devices import _find_device, get_device_info, mijiaDevice
+from .errors import DeviceActionError, DeviceBatchError, DeviceGetError
+from .logger import logger
+from .transaction import active_transaction
+
+
+class AsyncMijiaDevice(mijiaDevice):
+    """
+    mijiaDevice 的 asyncio 版本，get / set / run_action 均为协程。
+
+    通过 create() 构造：
+
+        >>> device = await AsyncMijiaDevice.create(api, dev_name="台灯")
+        >>> await device.set("brightness", 60)
+        >>> brightness = await device.brightness
+
+    属性读取（device.brightness）返回可等待对象；属性赋值无法等待，请使用 await device.set()，
+    在 async with device.batch() / api.transaction() 块内可直接赋值（仅加入写入队列）。
+    """
+    def __init__(
+            self,
+            api: AsyncMijiaAPI,
+            device: dict,
+            dev_info: dict,
+            sleep_time: float = 0.5,
+            cache_ttl: Optional[float] = None,
+            prop_ttl: Optional[dict] = None,
+    ):
+        self.api = api
+        self._setup(device, dev_info, sleep_time, cache_ttl, prop_ttl)
+
+    @classmethod
+    async def create(
+            cls,
+            api: AsyncMijiaAPI,
+            did: Optional[str] = None,
+            dev_name: Optional[str] = None,
+            sleep_time: float = 0.5,
+            device: Optional[dict] = None,
+            cache_ttl: Optional[float] = None,
+            prop_ttl: Optional[dict] = None,
+    ) -> "AsyncMijiaDevice":
+        if device is None:
+            device = await cls._lookup(api, did, dev_name)
+        dev_info = await asyncio.to_thread(
+            get_device_info, device["model"], cache_path=api.spec_cache_path, bundle=api.spec_bundle_path
+        )
+        return cls(api, device, dev_info, sleep_time=sleep_time, cache_ttl=cache_ttl, prop_ttl=prop_ttl)
+
+    @staticmethod
+    async def _lookup(api: AsyncMijiaAPI, did: Optional[str], dev_name: Optional[str]) -> dict:
+        if did is None:
+            return _find_device(await api.get_devices_list(), did, dev_name)
+        # 按 did 查找时逐页遍历，找到后不再请求剩余分页
+        async for device in api.iter_devices():
+            if device["did"] == did:
+                return _find_device([device], did, dev_name)
+        return _find_device([], did, dev_name)
+
+    async def get(self, name: str) -> Union[bool, int, float, str]:
+        method = self._get_method(name)
+        hits, missing = self._cache_lookup([name])
+        if not missing:
+            logger.debug(f"获取属性: {self.name} -> {name}, 命中缓存: {hits[name]}")
+            return hits[name]
+        async with self.api.rate_limiter.alimit(self._rate_limits()) as self.last_wait:
+            result = await self.api.get_devices_prop(method)
+        if result["code"] != 0:
+            raise DeviceGetError(self.name, name, result["code"])
+        logger.debug(f"获取属性: {self.name} -> {name}, 结果: {result}, 限速等待: {self.last_wait:.3f}s")
+        self._cache_store({name: result["value"]})
+        return result["value"]
+
+    async def set(self, name: str, value: Union[bool, int, float, str]):
+        method = self._set_method(name, value)
+        value = method["value"]
+        transaction = active_transaction(self)
+        if transaction is not None:
+            transaction.add(self, name, method)
+            return
+        async with self.api.rate_limiter.alimit(self._rate_limits()) as self.last_wait:
+            result = await self.api.set_devices_prop(method)
+        self._after_set(name, value, result)
+        logger.debug(f"设置属性: {self.name} -> {name}, 值: {value}, 结果: {result}, 限速等待: {self.last_wait:.3f}s")
+
+    async def get_many(self, names: Iterable[str]) -> dict:
+        """批量获取多个属性，参见 mijiaDevice.get_many。"""
+        methods = {name: self._get_method(name) for name in names}
+        values, missing = self._cache_lookup(methods)
+        if missing:
+            try:
+                values.update(await self._fetch_many(missing, [methods[name] for name in missing]))
+            except DeviceBatchError as e:
+                e.results.update(values)
+                raise
+        return {name: values[name] for name in methods}
+
+    async def _fetch_many(self, names: list[str], methods: list[dict]) -> dict:
+        async with self.api.rate_limiter.alimit(self._rate_limits()) as self.last_wait:
+            results = await self.api.get_devices_prop(methods)
+        return self._map_get_results(names, results)
+
+    async def get_all(self) -> dict:
+        """批量获取所有可读属性，参见 mijiaDevice.get_all。"""
+        return await self.get_many(self._readable_names())
+
+    async def refresh(self, names: Optional[Iterable[str]] = None) -> dict:
+        """忽略缓存重新获取属性并更新缓存，参见 mijiaDevice.refresh。"""
+        names = self._refresh_names(names)
+        methods = [self._get_method(name) for name in names]
+        return await self._fetch_many(names, methods) if methods else {}
+
+    async def set_many(self, values: dict) -> dict:
+        """批量设置多个属性，参见 mijiaDevice.set_many。"""
+        methods = {name: self._set_method(name, value) for name, value in values.items()}
+        if not methods:
+            return {}
+        transaction = active_transaction(self)
+        if transaction is not None:
+            for name, method in methods.items():
+                transaction.add(self, name, method)
+            return {}
+        async with self.api.rate_limiter.alimit(self._rate_limits()) as self.last_wait:
+            results = await self.api.set_devices_prop(list(methods.values()))
+        return self._map_set_results(methods, results)
+
+    def __setattr__(self, name: str, value: Union[bool, int, float, str]) -> None:
+        if "prop_list" in self.__dict__ and name in self.prop_list:
+            transaction = active_transaction(self)
+            if transaction is not None:
+                transaction.add(self, name, self._set_method(name, value))
+                return
+            raise AttributeError(f"异步设备不支持属性赋值，请使用 await device.set('{name}', value)")
+        super().__setattr__(name, value)
+
+    async def run_action(
+            self,
+            name: str,
+            value: Optional[Union[list, tuple]] = None,
+            **kwargs
+    ):
+        method = self._action_method(name, value, kwargs)
+        async with self.api.rate_limiter.alimit(self._rate_limits()) as self.last_wait:
+            result = await self.api.run_action(method)
+        if result["code"] == 1:
+            logger.warning(f"网关已经接收指令，无法判断是否执行成功: {self.name} -> {name}")
+        elif result["code"] != 0:
+            raise DeviceActionError(self.name, name, result["code"])
+        logger.debug(f"执行动作: {self.name} -> {name}, 结果: {result}, 限速等待: {self.last_wait:.3f}s")
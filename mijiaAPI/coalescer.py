@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+
+class _CoalescerStats():
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sizes: Counter = Counter()
+
+    def record(self, size: int) -> None:
+        with self._lock:
+            self.sizes[size] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            sizes = dict(sorted(self.sizes.items()))
+        batches = sum(sizes.values())
+        items = sum(size * count for size, count in sizes.items())
+        return {
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": items / batches if batches else 0.0,
+            "max_batch_size": max(sizes, default=0),
+            "sizes": sizes,
+        }
+
+
+class PropCoalescer():
+    """
+    属性读写请求合并器（线程版）
+
+    在 window 秒内（或累计达到 max_size 个时）到达的单项请求合并为一次批量请求，
+    批量结果按位置分发回各调用方。窗口内第一个到达的调用方负责等待并发送该批次，
+    其余调用方阻塞等待自己的结果；批量请求失败时该批次的所有调用方都会收到同一异常。
+    """
+    def __init__(self, send: Callable[[list], list], window: float, max_size: Optional[int] = None):
+        self.send = send
+        self.window = window
+        self.max_size = max_size
+        self.stats = _CoalescerStats()
+        self._lock = threading.Lock()
+        # 当前正在收集的批次: (请求列表, [Future], 批次已满事件)
+        self._batch: Optional[tuple[list, list, threading.Event]] = None
+
+    def submit(self, item: dict) -> dict:
+        future = Future()
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = ([], [], threading.Event())
+            batch[0].append(item)
+            batch[1].append(future)
+            if self.max_size and len(batch[0]) >= self.max_size:
+                self._batch = None
+                batch[2].set()
+        if leader:
+            try:
+                batch[2].wait(self.window)
+            except BaseException as e:
+                # 发送方在等待期间被中断（如 KeyboardInterrupt）：关闭批次并让其余调用方失败，而不是一直等待
+                self._close(batch)
+                error = RuntimeError("合并请求的发送方被中断")
+                error.__cause__ = e
+                for waiting in batch[1]:
+                    if not waiting.done():
+                        waiting.set_exception(error)
+                raise
+            self._close(batch)
+            self._dispatch(*batch[:2])
+        return future.result()
+
+    def _close(self, batch: tuple[list, list, threading.Event]) -> None:
+        with self._lock:
+            if self._batch is batch:
+                self._batch = None
+
+    def _dispatch(self, items: list, futures: list) -> None:
+        self.stats.record(len(items))
+        try:
+            results = self.send(items)
+        except BaseException as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+        for future in futures[len(results):]:
+            future.set_exception(RuntimeError("批量请求返回的结果数量少于请求数量"))
+
+
+class AsyncPropCoalescer():
+    """属性读写请求合并器（asyncio 版），语义同 PropCoalescer，需在同一个事件循环中使用。"""
+    def __init__(self, send: Callable[[list], Awaitable[list]], window: float, max_size: Optional[int] = None):
+        self.send = send
+        self.window = window
+        self.max_size = max_size
+        self.stats = _CoalescerStats()
+        self._batch: Optional[tuple[list, list, asyncio.Event]] = None
+        self._tasks: set = set()
+
+    async def submit(self, item: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = ([], [], asyncio.Event())
+            # 由独立任务发送批次，避免首个调用方被取消时其余调用方一直等待
+            task = asyncio.ensure_future(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(partial(self._flush_done, batch))
+        batch[0].append(item)
+        batch[1].append(future)
+        if self.max_size and len(batch[0]) >= self.max_size:
+            self._batch = None
+            batch[2].set()
+        return await future
+
+    def _flush_done(self, batch: tuple[list, list, asyncio.Event], task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        # 发送任务被取消（CancelledError 不是 Exception 的子类）或意外结束时，
+        # 关闭批次并取消尚未得到结果的调用方，避免其一直等待
+        if self._batch is batch:
+            self._batch = None
+        for future in batch[1]:
+            if not future.done():
+                future.cancel()
+
+    async def _flush(self, batch: tuple[list, list, asyncio.Event]) -> None:
+        try:
+            await asyncio.wait_for(batch[2].wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        if self._batch is batch:
+            self._batch = None
+        await self._dispatch(*batch[:2])
+
+    async def _dispatch(self, items: list, futures: list) -> None:
+        self.stats.record(len(items))
+        try:
+            results = await self.send(items)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+        for future in futures[len(results):]:
+            if not future.done():
+                future.set_exception(RuntimeError("批量请求返回的结果数量少于请求数量"))
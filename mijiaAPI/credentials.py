@@ -0,0 +1,155 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from . import jsonutil
+from .logger import logger
+
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class CredentialStore():
+    """
+    认证数据存储，mijiaAPI.auth_data 读写的都是 data 属性。
+
+    基类仅保存在内存中，不做持久化；子类可覆盖 load / reload_if_changed / save / locked
+    以实现共享存储。locked() 用于在刷新 Token 期间阻止其他持有者同时刷新。
+    check_due() 只做内存中的判断，返回 False 时 reload_if_changed() 不会访问存储，
+    异步客户端据此决定是否需要在线程中执行检查。
+    """
+    def __init__(self):
+        self.data: dict = {}
+        self._thread_lock = threading.RLock()
+
+    def load(self) -> dict:
+        return self.data
+
+    def check_due(self) -> bool:
+        return False
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        return False
+
+    def save(self) -> None:
+        pass
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            yield
+
+
+class FileCredentialStore(CredentialStore):
+    """
+    基于 JSON 文件的认证数据存储，可供多个进程共享同一个 auth.json。
+
+    - 写入时先写临时文件再原子替换，读取方不会读到写了一半的文件
+    - locked() 使用同目录下的 .lock 文件加建议锁（fcntl.flock / msvcrt.locking），
+      同一时间只有一个进程刷新 Token，其余进程等待后直接读取新的 serviceToken
+    - reload_if_changed() 在文件 mtime 变化时重新加载，检查间隔为 check_interval 秒
+    """
+    def __init__(self, path: Union[str, Path], check_interval: float = 1.0):
+        super().__init__()
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.check_interval = check_interval
+        self._mtime: Optional[int] = None
+        self._last_check = 0.0
+        self._lock_depth = 0
+        self._lock_file = None
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> dict:
+        mtime = self._stat_mtime()
+        with open(self.path, "rb") as f:
+            self.data = jsonutil.loads(f.read())
+        self._mtime = mtime
+        self._last_check = time.monotonic()
+        return self.data
+
+    def check_due(self) -> bool:
+        return time.monotonic() - self._last_check >= self.check_interval
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        mtime = self._stat_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        try:
+            self.load()
+        except (OSError, jsonutil.JSONDecodeError) as e:
+            logger.warning(f"重新加载认证文件失败，继续使用内存中的认证数据: {e}")
+            return False
+        logger.debug(f"认证文件已被修改，重新加载: {self.path}")
+        return True
+
+    def save(self) -> None:
+        with self.locked():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(jsonutil.dumps(self.data, indent=True))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._mtime = self._stat_mtime()
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._acquire_file_lock()
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    self._release_file_lock()
+
+    def _acquire_file_lock(self) -> None:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.lock_path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 最多重试 10 秒后抛出，继续等待
+                    continue
+
+    def _release_file_lock(self) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._lock_file.close()
+            self._lock_file = None
@@ -1,22 +1,31 @@
-import json
-import re
+import hashlib
+import os
+import threading
 import time
-from collections import Counter
+import weakref
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Union
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Optional, Union
 
 import requests
 
+from . import jsonutil
 from .apis import mijiaAPI
 from .errors import (
     DeviceActionError,
+    DeviceBatchError,
     DeviceGetError,
     DeviceNotFoundError,
     DeviceSetError,
     GetDeviceInfoError,
     MultipleDevicesFoundError,
+    PartialFailureError,
 )
 from .logger import logger
+from .spec_store import SpecBundle, SpecStore
+from .transaction import Transaction, active_transaction
 from .version import version
 
 
@@ -24,6 +33,80 @@ device_url = "https://home.miot-spec.com/spec/"
 device_info_version = 1
 
 
+class _DeviceInfoCache():
+    """
+    进程内的设备规格 LRU 缓存，键为 (型号, device_info_version)，最多保存 maxsize 个型号。
+
+    同时记录每个型号已确认写入过的缓存库（cache_path 参数本身，不做路径解析），
+    之后再以同一 cache_path 命中时不必打开缓存库检查。
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items: OrderedDict[tuple[str, int], dict] = OrderedDict()
+        self._stored: dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model: str) -> Optional[dict]:
+        key = (model, device_info_version)
+        with self._lock:
+            info = self._items.get(key)
+            if info is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return info
+
+    def put(self, model: str, info: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[(model, device_info_version)] = info
+            self._items.move_to_end((model, device_info_version))
+            while len(self._items) > self.maxsize:
+                (evicted, _), _ = self._items.popitem(last=False)
+                self._stored.pop(evicted, None)
+                self.evictions += 1
+
+    @staticmethod
+    def _store_key(cache_path: Union[str, Path, SpecStore]) -> object:
+        return cache_path if isinstance(cache_path, SpecStore) else os.fspath(cache_path)
+
+    def is_stored(self, model: str, cache_path: Union[str, Path, SpecStore]) -> bool:
+        with self._lock:
+            return self._store_key(cache_path) in self._stored.get(model, ())
+
+    def mark_stored(self, model: str, cache_path: Union[str, Path, SpecStore]) -> None:
+        with self._lock:
+            if (model, device_info_version) in self._items:
+                self._stored.setdefault(model, set()).add(self._store_key(cache_path))
+
+    def clear(self, model: Optional[str] = None) -> None:
+        with self._lock:
+            if model is None:
+                self._items.clear()
+                self._stored.clear()
+            else:
+                self._items.pop((model, device_info_version), None)
+                self._stored.pop(model, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
+
+
+_device_info_cache = _DeviceInfoCache()
+
+
 def _deduplicate_names(items: list[dict], iid_key: str) -> None:
     name_counts = Counter(item["name"] for item in items)
     for item in items:
@@ -36,22 +119,106 @@ def _deduplicate_names(items: list[dict], iid_key: str) -> None:
             item["name"] = f"{item['name']}-{item['method'][iid_key]}"
 
 
+def _to_bool(value: Union[bool, int, float, str]) -> bool:
+    if isinstance(value, str):
+        if value.lower() == "true":
+            return True
+        if value.lower() == "false":
+            return False
+        if value in ["0", "1"]:
+            return bool(int(value))
+        raise ValueError(f"无效布尔值: {value}")
+    if isinstance(value, int):
+        if value == 0:
+            return False
+        if value == 1:
+            return True
+        raise ValueError(f"无效布尔值: {value}")
+    raise ValueError(f"无效布尔值: {value}")
+
+
+def _to_str(value: Union[bool, int, float, str]) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"无效字符串值: {value}")
+    return value
+
+
+def _compile_check(prop_type: str, prop_range: Optional[tuple]) -> Callable[[Any], Union[bool, int, float, str]]:
+    if prop_type == "bool":
+        return _to_bool
+    if prop_type == "string":
+        return _to_str
+    convert = float if prop_type == "float" else int
+    if not prop_range:
+        return convert
+    low, high = prop_range[0], prop_range[1]
+    bounds = [low, high]
+    step = prop_range[2] if len(prop_range) >= 3 else None
+    if prop_type == "float":
+        # 浮点数只在步长为整数时按整数部分检查
+        step = step if isinstance(step, int) else None
+    elif step == 1:
+        step = None
+
+    def check(value: Union[bool, int, float, str]) -> Union[int, float]:
+        value = convert(value)
+        if value < low or value > high:
+            raise ValueError(f"{value} 超出数值范围, 应该在 {bounds} 之间")
+        if step is not None and int(value - low) % step != 0:
+            raise ValueError(f"无效的值: {value}, 应该在范围 {bounds} 内且步长为 {step}")
+        return value
+
+    return check
+
+
 class DevProp():
+    """
+    设备属性规格（不可变）
+
+    由 DeviceSpec 按设备型号创建并在同型号的所有设备间共享；
+    类型转换、范围、步长与枚举值检查在创建时预先编译，validate() 直接调用。
+    """
+    __slots__ = ("name", "desc", "type", "rw", "range", "value_list", "method", "_check", "_values")
+
     def __init__(self, prop_dict: dict):
-        self.name = prop_dict["name"]
-        self.desc = prop_dict["description"]
-        self.type = prop_dict["type"]
-        if self.type not in ["bool", "int", "uint", "float", "string"]:
-            raise ValueError(f"不支持的类型: {self.type}, 可选类型: bool, int, uint, float, string")
-        self.rw = prop_dict["rw"]
-        self.range = prop_dict["range"]
-        self.value_list = prop_dict.get("value-list", None)
-        self.method = prop_dict["method"]
+        prop_type = prop_dict["type"]
+        if prop_type not in ["bool", "int", "uint", "float", "string"]:
+            raise ValueError(f"不支持的类型: {prop_type}, 可选类型: bool, int, uint, float, string")
+        prop_range = tuple(prop_dict["range"]) if prop_dict["range"] else prop_dict["range"]
+        value_list = prop_dict.get("value-list", None)
+        values = None
+        if value_list:
+            value_list = tuple(value_list)
+            values = [item["value"] for item in value_list]
+            try:
+                values = frozenset(values)
+            except TypeError:
+                values = tuple(values)
+        init = super().__setattr__
+        init("name", prop_dict["name"])
+        init("desc", prop_dict["description"])
+        init("type", prop_type)
+        init("rw", prop_dict["rw"])
+        init("range", prop_range)
+        init("value_list", value_list)
+        init("method", MappingProxyType(dict(prop_dict["method"])))
+        init("_check", _compile_check(prop_type, prop_range))
+        init("_values", values)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"DevProp 不可修改: {name}")
+
+    def validate(self, value: Union[bool, int, float, str]) -> Union[bool, int, float, str]:
+        """检查并转换要写入的值，返回转换后的值，无效时抛出 ValueError。"""
+        value = self._check(value)
+        if self._values is not None and value not in self._values:
+            raise ValueError(f"无效值: {value}, 请使用 {list(self.value_list)}")
+        return value
 
     def __str__(self):
         lines = [
             f"  {self.name}: {self.desc}",
-            f"    valuetype: {self.type}, rw: {self.rw}, range: {self.range}"
+            f"    valuetype: {self.type}, rw: {self.rw}, range: {list(self.range) if self.range else self.range}"
         ]
 
         if self.value_list:
@@ -62,15 +229,87 @@ class DevProp():
 
 
 class DevAction():
+    """设备动作规格（不可变），同 DevProp 在同型号的设备间共享。"""
+    __slots__ = ("name", "desc", "method")
+
     def __init__(self, act_dict: dict):
-        self.name = act_dict["name"]
-        self.desc = act_dict["description"]
-        self.method = act_dict["method"]
+        init = super().__setattr__
+        init("name", act_dict["name"])
+        init("desc", act_dict["description"])
+        init("method", MappingProxyType(dict(act_dict["method"])))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"DevAction 不可修改: {name}")
 
     def __str__(self):
         return f"  {self.name}: {self.desc}"
 
 
+class DeviceSpec():
+    """
+    设备型号规格（不可变）
+
+    包含该型号的全部 DevProp / DevAction 以及带下划线的属性别名。
+    通过 DeviceSpec.get() 按型号驻留：同一型号、相同规格信息的设备共享同一个实例，
+    不再被任何设备引用时自动释放。
+    """
+    __slots__ = ("model", "name", "prop_list", "action_list", "readable", "_source", "__weakref__")
+
+    _interned: "weakref.WeakValueDictionary[str, DeviceSpec]" = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __init__(self, model: str, dev_info: dict):
+        prop_list = {}
+        for prop in dev_info.get("properties", []):
+            prop_obj = DevProp(prop)
+            name = prop["name"]
+            prop_list[name] = prop_obj
+            if "-" in name:
+                prop_list[name.replace("-", "_")] = prop_obj
+        init = super().__setattr__
+        init("model", model)
+        init("name", dev_info.get("name"))
+        init("prop_list", MappingProxyType(prop_list))
+        init("action_list", MappingProxyType({
+            act["name"]: DevAction(act)
+            for act in dev_info.get("actions", [])
+        }))
+        # 可读属性的原名（不含下划线别名），供 get_all 等使用
+        init("readable", tuple(name for name, prop in prop_list.items() if name == prop.name and "r" in prop.rw))
+        init("_source", dev_info)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"DeviceSpec 不可修改: {name}")
+
+    @classmethod
+    def get(cls, model: str, dev_info: dict) -> "DeviceSpec":
+        """返回该型号共享的 DeviceSpec，规格信息有变化（如缓存被刷新）时重新创建。"""
+        with cls._lock:
+            spec = cls._interned.get(model)
+            if spec is None or (spec._source is not dev_info and spec._source != dev_info):
+                spec = cls._interned[model] = cls(model, dev_info)
+            return spec
+
+
+def _find_device(devices_list: Iterable[dict], did: Optional[str], dev_name: Optional[str]) -> dict:
+    if did is None and dev_name is None:
+        raise ValueError("必须提供 did 或 dev_name 参数之一")
+    if did is not None and dev_name is not None:
+        logger.warning("同时提供了 did 和 dev_name 参数，将忽略 dev_name")
+
+    if did is None:
+        matches = [device for device in devices_list if device["name"] == dev_name]
+        if not matches:
+            raise DeviceNotFoundError(dev_name)
+        if len(matches) > 1:
+            raise MultipleDevicesFoundError(f"找到多个 dev_name 为 '{dev_name}' 的设备，请使用 did 参数指定具体设备或者修改设备名称以区分")
+        return matches[0]
+    device = next((device for device in devices_list if device["did"] == did), None)
+    if device is None:
+        raise DeviceNotFoundError(did)
+    return device
+
+
 class mijiaDevice():
     def __init__(
             self,
@@ -78,52 +317,50 @@ class mijiaDevice():
             did: Optional[str] = None,
             dev_name: Optional[str] = None,
             sleep_time: float = 0.5,
+            device: Optional[dict] = None,
+            cache_ttl: Optional[float] = None,
+            prop_ttl: Optional[dict] = None,
     ):
         self.api = api
-
-        if did is None and dev_name is None:
-            raise ValueError("必须提供 did 或 dev_name 参数之一")
-        if did is not None and dev_name is not None:
-            logger.warning("同时提供了 did 和 dev_name 参数，将忽略 dev_name")
-
-        devices_list = self.api.get_devices_list()
-        if did is None:
-            matches = [device for device in devices_list if device["name"] == dev_name]
-            if not matches:
-                raise DeviceNotFoundError(dev_name)
-            else:
-                if len(matches) > 1:
-                    raise MultipleDevicesFoundError(f"找到多个 dev_name 为 '{dev_name}' 的设备，请使用 did 参数指定具体设备或者修改设备名称以区分")
-                did = matches[0]["did"]
-                model = matches[0]["model"]
-        else:
-            matches = [device for device in devices_list if device["did"] == did]
-            if not matches:
-                raise DeviceNotFoundError(did)
-            else:
-                if len(matches) > 1:
-                    raise MultipleDevicesFoundError(f"找到多个 did 为 '{did}' 的设备，未预想的问题，欢迎提交 issue: https://github.com/Do1e/mijia-api/issues")
-                dev_name = matches[0].get("name", None)
-                model = matches[0]["model"]
-
-        dev_info = get_device_info(model, cache_path=api.auth_data_path.parent)
-        self.did = did
-        self.model = model
-        self.name = dev_name if dev_name is not None else dev_info["name"]
+        # 传入已解析的设备信息（如来自 DeviceRegistry）时不再获取设备列表
+        if device is None:
+            # 按 did 查找时逐页遍历，找到后不再请求剩余分页
+            devices = self.api.iter_devices() if did is not None else self.api.get_devices_list()
+            device = _find_device(devices, did, dev_name)
+        dev_info = get_device_info(device["model"], cache_path=api.spec_cache_path, bundle=api.spec_bundle_path)
+        self._setup(device, dev_info, sleep_time, cache_ttl, prop_ttl)
+
+    def _setup(
+            self,
+            device: dict,
+            dev_info: dict,
+            sleep_time: float,
+            cache_ttl: Optional[float] = None,
+            prop_ttl: Optional[dict] = None,
+    ) -> None:
+        self.did = device["did"]
+        self.model = device["model"]
+        self.name = device.get("name") or dev_info["name"]
+        # 对同一设备连续两次调用之间的最小间隔（秒），由 api.rate_limiter 统一限速
         self.sleep_time = sleep_time
-
-        self.prop_list = {}
-        for prop in dev_info.get("properties", []):
-            prop_obj = DevProp(prop)
-            name = prop["name"]
-            self.prop_list[name] = prop_obj
-            if "-" in name:
-                self.prop_list[name.replace("-", "_")] = prop_obj
-
-        self.action_list = {
-            act["name"]: DevAction(act)
-            for act in dev_info.get("actions", [])
-        }
+        # 子设备（蓝牙、Zigbee 等）所属网关的 did，用于按网关限速
+        self.parent_id = device.get("parent_id") or None
+        # 最近一次调用因限速实际等待的秒数
+        self.last_wait = 0.0
+
+        # 同型号设备共享同一份不可变的规格对象
+        self.spec = DeviceSpec.get(self.model, dev_info)
+        self.prop_list = self.spec.prop_list
+        self.action_list = self.spec.action_list
+
+        # 属性状态缓存 {属性名: (值, 获取时间)}。cache_ttl 为所有属性默认的有效期（秒），
+        # prop_ttl 按属性覆盖（0 表示该属性不缓存），均未设置时不缓存
+        self.cache_ttl = cache_ttl
+        self.prop_ttl = {self._prop(name).name: ttl for name, ttl in (prop_ttl or {}).items()}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._state: dict[str, tuple] = {}
+        self._state_lock = threading.Lock()
 
     def __str__(self) -> str:
         prop_list_str = "\n".join(filter(None, (str(v) for k, v in self.prop_list.items() if "_" not in k)))
@@ -132,8 +369,52 @@ class mijiaDevice():
                 f"Properties:\n{prop_list_str if prop_list_str else 'No properties available'}\n"
                 f"Actions:\n{action_list_str if action_list_str else 'No actions available'}")
 
-
-    def get(self, name: str) -> Union[bool, int, float, str]:
+    def _prop(self, name: str) -> DevProp:
+        if name not in self.prop_list:
+            raise ValueError(f"不支持的属性: {name}, 可用属性: {list(self.prop_list.keys())}")
+        return self.prop_list[name]
+
+    def _ttl(self, name: str) -> Optional[float]:
+        return self.prop_ttl.get(self.prop_list[name].name, self.cache_ttl)
+
+    def _cache_lookup(self, names: Iterable[str]) -> tuple[dict, list]:
+        hits, missing = {}, []
+        now = time.monotonic()
+        with self._state_lock:
+            for name in names:
+                ttl = self._ttl(name)
+                entry = self._state.get(self.prop_list[name].name)
+                if ttl and entry is not None and now - entry[1] < ttl:
+                    hits[name] = entry[0]
+                    self.cache_hits += 1
+                else:
+                    missing.append(name)
+                    if ttl:
+                        self.cache_misses += 1
+        return hits, missing
+
+    def _cache_store(self, values: dict) -> None:
+        now = time.monotonic()
+        with self._state_lock:
+            for name, value in values.items():
+                if self._ttl(name):
+                    self._state[self.prop_list[name].name] = (value, now)
+
+    def invalidate(self, names: Optional[Iterable[str]] = None) -> None:
+        """清除属性缓存，names 为 None 时清除全部。"""
+        keys = None if names is None else [self._prop(name).name for name in names]
+        with self._state_lock:
+            if keys is None:
+                self._state.clear()
+            for key in keys or []:
+                self._state.pop(key, None)
+
+    def cache_stats(self) -> dict:
+        """返回属性缓存的命中次数 hits、未命中次数 misses 以及当前缓存的属性数 size。"""
+        with self._state_lock:
+            return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self._state)}
+
+    def _get_method(self, name: str) -> dict:
         if name not in self.prop_list:
             raise ValueError(f"不支持的属性: {name}, 可用属性: {list(self.prop_list.keys())}")
         prop = self.prop_list[name]
@@ -141,74 +422,199 @@ class mijiaDevice():
             raise ValueError(f"属性 {name} 不可读取")
         method = prop.method.copy()
         method["did"] = self.did
-        result = self.api.get_devices_prop(method)
-        if result["code"] != 0:
-            raise DeviceGetError(self.name, name, result["code"])
-        time.sleep(self.sleep_time)
-        logger.debug(f"获取属性: {self.name} -> {name}, 结果: {result}")
-        return result["value"]
+        return method
 
-    def set(self, name: str, value: Union[bool, int, float, str]):
+    def _set_method(self, name: str, value: Union[bool, int, float, str]) -> dict:
         if name not in self.prop_list:
             raise ValueError(f"不支持的属性: {name}, 可用属性: {list(self.prop_list.keys())}")
         prop = self.prop_list[name]
         if "w" not in prop.rw:
             raise ValueError(f"属性 {name} 不可写入")
-        if prop.type == "bool":
-            if isinstance(value, str):
-                if value.lower() == "true":
-                    value = True
-                elif value.lower() == "false":
-                    value = False
-                elif value in ["0", "1"]:
-                    value = bool(int(value))
-                else:
-                    raise ValueError(f"无效布尔值: {value}")
-            elif isinstance(value, int):
-                if value == 0:
-                    value = False
-                elif value == 1:
-                    value = True
-                else:
-                    raise ValueError(f"无效布尔值: {value}")
-            elif not isinstance(value, bool):
-                raise ValueError(f"无效布尔值: {value}")
-        elif prop.type in ["int", "uint"]:
-            value = int(value)
-            if prop.range:
-                if value < prop.range[0] or value > prop.range[1]:
-                    raise ValueError(f"{value} 超出数值范围, 应该在 {prop.range[:2]} 之间")
-                if len(prop.range) >= 3 and prop.range[2] != 1:
-                    if (value - prop.range[0]) % prop.range[2] != 0:
-                        raise ValueError(
-                            f"无效的值: {value}, 应该在范围 {prop.range[:2]} 内且步长为 {prop.range[2]}")
-        elif prop.type == "float":
-            value = float(value)
-            if prop.range:
-                if value < prop.range[0] or value > prop.range[1]:
-                    raise ValueError(f"{value} 超出数值范围, 应该在 {prop.range[:2]} 之间")
-                if len(prop.range) >= 3 and isinstance(prop.range[2], int):
-                    if int(value - prop.range[0]) % prop.range[2] != 0:
-                        raise ValueError(
-                            f"无效的值: {value}, 应该在范围 {prop.range[:2]} 内且步长为 {prop.range[2]}")
-        elif prop.type == "string":
-            if not isinstance(value, str):
-                raise ValueError(f"无效字符串值: {value}")
-        else:
-            raise ValueError(f"不支持的类型: {prop.type}, 可用类型: bool, int, uint, float, string")
-        if prop.value_list:
-            if value not in [item["value"] for item in prop.value_list]:
-                raise ValueError(f"无效值: {value}, 请使用 {prop.value_list}")
+        value = prop.validate(value)
         method = prop.method.copy()
         method["did"] = self.did
         method["value"] = value
-        result = self.api.set_devices_prop(method)
+        return method
+
+    def _readable_names(self) -> list[str]:
+        return list(self.spec.readable)
+
+    def _map_get_results(self, names: list[str], results: list) -> dict:
+        values, errors = {}, {}
+        for name, result in zip(names, results):
+            if result.get("code", 0) != 0:
+                errors[name] = result["code"]
+            else:
+                values[name] = result.get("value")
+        logger.debug(f"批量获取属性: {self.name} -> {values}, 失败: {errors}")
+        self._cache_store(values)
+        if errors:
+            raise DeviceBatchError(self.name, "获取", errors, values)
+        return values
+
+    def _map_set_results(self, methods: dict, results: list) -> dict:
+        codes, errors = {}, {}
+        for (name, method), result in zip(methods.items(), results):
+            code = result.get("code", 0)
+            codes[name] = code
+            if code == 1:
+                logger.warning(f"网关已经接收指令，无法判断是否设置成功: {self.name} -> {name}, 值: {method['value']}")
+            elif code != 0:
+                errors[name] = code
+        logger.debug(f"批量设置属性: {self.name} -> {codes}")
+        self._cache_store({name: methods[name]["value"] for name, code in codes.items() if code == 0})
+        self.invalidate([name for name, code in codes.items() if code != 0])
+        if errors:
+            raise DeviceBatchError(self.name, "设置", errors, codes)
+        return codes
+
+    def _action_method(self, name: str, value: Optional[Union[list, tuple]], kwargs: dict) -> dict:
+        if name not in self.action_list:
+            raise ValueError(f"不支持的动作: {name}, 可用动作: {list(self.action_list.keys())}")
+        act = self.action_list[name]
+        method = act.method.copy()
+        method["did"] = self.did
+        if value is not None:
+            method["value"] = value
+        if kwargs:
+            for k, v in kwargs.items():
+                if k.startswith("_"):
+                    k = k[1:]
+                if k in method:
+                    raise ValueError(f"无效的参数: {k}. 请勿使用以下参数 ({', '.join(method.keys())})")
+                method[k] = v
+        return method
+
+    def _rate_limits(self) -> list[tuple[str, float]]:
+        limits = [(self.did, self.sleep_time)]
+        if self.parent_id and self.api.gateway_interval:
+            limits.append((self.parent_id, self.api.gateway_interval))
+        return limits
+
+    def get(self, name: str) -> Union[bool, int, float, str]:
+        method = self._get_method(name)
+        hits, missing = self._cache_lookup([name])
+        if not missing:
+            logger.debug(f"获取属性: {self.name} -> {name}, 命中缓存: {hits[name]}")
+            return hits[name]
+        with self.api.rate_limiter.limit(self._rate_limits()) as self.last_wait:
+            result = self.api.get_devices_prop(method)
+        if result["code"] != 0:
+            raise DeviceGetError(self.name, name, result["code"])
+        logger.debug(f"获取属性: {self.name} -> {name}, 结果: {result}, 限速等待: {self.last_wait:.3f}s")
+        self._cache_store({name: result["value"]})
+        return result["value"]
+
+    def batch(self) -> Transaction:
+        """
+        延迟写入该设备的属性，退出 with 块时合并为一次请求发送
+
+        示例:
+            >>> with device.batch():
+            ...     device.on = True
+            ...     device.brightness = 60
+        """
+        return Transaction(self.api, [self])
+
+    def set(self, name: str, value: Union[bool, int, float, str]):
+        method = self._set_method(name, value)
+        value = method["value"]
+        transaction = active_transaction(self)
+        if transaction is not None:
+            transaction.add(self, name, method)
+            return
+        with self.api.rate_limiter.limit(self._rate_limits()) as self.last_wait:
+            result = self.api.set_devices_prop(method)
+        self._after_set(name, value, result)
+        logger.debug(f"设置属性: {self.name} -> {name}, 值: {value}, 结果: {result}, 限速等待: {self.last_wait:.3f}s")
+
+    def _after_set(self, name: str, value: Union[bool, int, float, str], result: dict) -> None:
+        if result["code"] == 0:
+            self._cache_store({name: value})
+            return
+        self.invalidate([name])
         if result["code"] == 1:
             logger.warning(f"网关已经接收指令，无法判断是否设置成功: {self.name} -> {name}, 值: {value}")
-        elif result["code"] != 0:
+        else:
             raise DeviceSetError(self.name, name, result["code"])
-        time.sleep(self.sleep_time)
-        logger.debug(f"设置属性: {self.name} -> {name}, 值: {value}, 结果: {result}")
+
+    def get_many(self, names: Iterable[str]) -> dict:
+        """
+        批量获取多个属性，只发送一次 get_devices_prop 请求
+
+        参数:
+            names (Iterable[str]): 属性名列表，发送请求前会全部校验
+
+        返回值:
+            dict: {属性名: 属性值}
+
+        异常:
+            ValueError: 属性不存在或不可读
+            DeviceBatchError: 部分属性获取失败，errors 为 {属性名: 错误码}，results 为获取成功的 {属性名: 属性值}
+        """
+        methods = {name: self._get_method(name) for name in names}
+        values, missing = self._cache_lookup(methods)
+        if missing:
+            try:
+                values.update(self._fetch_many(missing, [methods[name] for name in missing]))
+            except DeviceBatchError as e:
+                e.results.update(values)
+                raise
+        return {name: values[name] for name in methods}
+
+    def _fetch_many(self, names: list[str], methods: list[dict]) -> dict:
+        with self.api.rate_limiter.limit(self._rate_limits()) as self.last_wait:
+            results = self.api.get_devices_prop(methods)
+        return self._map_get_results(names, results)
+
+    def get_all(self) -> dict:
+        """批量获取所有可读属性，参见 get_many。"""
+        return self.get_many(self._readable_names())
+
+    def _refresh_names(self, names: Optional[Iterable[str]]) -> list[str]:
+        if names is None:
+            return [name for name in self._readable_names() if self._ttl(name)]
+        return list(dict.fromkeys(names))
+
+    def refresh(self, names: Optional[Iterable[str]] = None) -> dict:
+        """
+        忽略缓存重新获取属性并更新缓存
+
+        参数:
+            names (Optional[Iterable[str]]): 属性名列表，默认为所有启用缓存的可读属性
+
+        返回值:
+            dict: {属性名: 属性值}
+        """
+        names = self._refresh_names(names)
+        methods = [self._get_method(name) for name in names]
+        return self._fetch_many(names, methods) if methods else {}
+
+    def set_many(self, values: dict) -> dict:
+        """
+        批量设置多个属性，只发送一次 set_devices_prop 请求
+
+        参数:
+            values (dict): {属性名: 值}，发送请求前会全部校验
+
+        返回值:
+            dict: {属性名: 错误码}，0 表示成功，1 表示网关已接收指令但无法判断是否成功
+
+        异常:
+            ValueError: 属性不存在、不可写或值无效
+            DeviceBatchError: 部分属性设置失败，errors 为 {属性名: 错误码}，results 为全部属性的错误码
+        """
+        methods = {name: self._set_method(name, value) for name, value in values.items()}
+        if not methods:
+            return {}
+        transaction = active_transaction(self)
+        if transaction is not None:
+            for name, method in methods.items():
+                transaction.add(self, name, method)
+            return {}
+        with self.api.rate_limiter.limit(self._rate_limits()) as self.last_wait:
+            results = self.api.set_devices_prop(list(methods.values()))
+        return self._map_set_results(methods, results)
 
     def __getattr__(self, name: str) -> Union[bool, int, float, str]:
         if "prop_list" in self.__dict__ and name in self.prop_list:
@@ -228,41 +634,39 @@ class mijiaDevice():
             value: Optional[Union[list, tuple]] = None,
             **kwargs
     ):
-        if name not in self.action_list:
-            raise ValueError(f"不支持的动作: {name}, 可用动作: {list(self.action_list.keys())}")
-        act = self.action_list[name]
-        method = act.method.copy()
-        method["did"] = self.did
-        if value is not None:
-            method["value"] = value
-        if kwargs:
-            for k, v in kwargs.items():
-                if k.startswith("_"):
-                    k = k[1:]
-                if k in method:
-                    raise ValueError(f"无效的参数: {k}. 请勿使用以下参数 ({', '.join(method.keys())})")
-                method[k] = v
-        result = self.api.run_action(method)
+        method = self._action_method(name, value, kwargs)
+        with self.api.rate_limiter.limit(self._rate_limits()) as self.last_wait:
+            result = self.api.run_action(method)
         if result["code"] == 1:
             logger.warning(f"网关已经接收指令，无法判断是否执行成功: {self.name} -> {name}")
         elif result["code"] != 0:
             raise DeviceActionError(self.name, name, result["code"])
-        time.sleep(self.sleep_time)
-        logger.debug(f"执行动作: {self.name} -> {name}, 结果: {result}")
+        logger.debug(f"执行动作: {self.name} -> {name}, 结果: {result}, 限速等待: {self.last_wait:.3f}s")
 
 
-def get_device_info(device_model: str, cache_path: Optional[Union[str, Path]] = None) -> dict:
+def get_device_info(
+        device_model: str,
+        cache_path: Optional[Union[str, Path, SpecStore]] = None,
+        bundle: Optional[Union[str, Path, SpecBundle]] = None,
+) -> dict:
     """
     获取设备规格信息
 
     根据设备型号获取设备的详细规格信息，包括属性、操作等。
-    支持缓存功能，避免重复请求网络。
+    支持缓存功能，避免重复请求网络。解析后的结果还会保存在进程内的 LRU 缓存中，
+    同一进程内（mijiaDevice、命令行、MCP 服务等）再次获取同一型号时直接返回，
+    不再读取文件或请求网络（指定的 cache_path 中还没有该型号时会补写进去）；
+    返回的字典在各调用方之间共享，请勿修改。
 
     参数:
         device_model (str): 设备型号，例如 'yeelink.light.lamp4'
-        cache_path (Optional[Union[str, Path]]): 可选，缓存目录路径。
+        cache_path (Optional[Union[str, Path, SpecStore]]): 可选，缓存路径。
             - 如果为 None，则不使用缓存
-            - 如果指定，则将设备信息缓存到该目录下的 {device_model}.json 文件中
+            - 如果为目录，则将设备信息缓存到该目录下的 device_specs.db 中，
+              并自动导入该目录下旧版本的 {device_model}.json
+            - 也可以是 .db 文件路径或 SpecStore 实例，多个认证目录可共享同一个缓存库
+        bundle (Optional[Union[str, Path, SpecBundle]]): 可选，离线规格包路径。
+            缓存中没有该型号时优先从规格包读取，无需访问网络
 
     返回值:
         dict: 设备规格信息字典，包含以下字段：
@@ -290,27 +694,223 @@ def get_device_info(device_model: str, cache_path: Optional[Union[str, Path]] =
         >>> print(info['name'])  # 输出设备名称
         >>> print(info['properties'][0]['name'])  # 输出第一个属性的名称
     """
-    cache_file = None
+    result = _device_info_cache.get(device_model)
+    if result is None:
+        result = _load_device_info(device_model, cache_path, bundle=bundle)
+        _device_info_cache.put(device_model, result)
+        if cache_path is not None and bundle is None:
+            # 未指定规格包时，结果来自缓存库或已写入缓存库
+            _device_info_cache.mark_stored(device_model, cache_path)
+    elif cache_path is not None and not _device_info_cache.is_stored(device_model, cache_path):
+        # 进程内缓存可能来自未指定缓存库的调用，首次以该缓存库命中时补写进去，之后直接返回
+        store = cache_path if isinstance(cache_path, SpecStore) else SpecStore.open(cache_path)
+        validators = store.validators(device_model)
+        if validators is None or validators[2] != device_info_version:
+            logger.debug(f"缓存设备信息到: {store.path} -> {device_model}")
+            store.put(device_model, result)
+        _device_info_cache.mark_stored(device_model, cache_path)
+    return result
+
+
+def device_info_cache_stats() -> dict:
+    """
+    返回 get_device_info 进程内缓存的统计信息
+
+    返回值:
+        dict: 包含以下字段：
+            - hits (int): 命中次数
+            - misses (int): 未命中次数
+            - evictions (int): 因超出容量被淘汰的次数
+            - size (int): 当前缓存的型号数
+            - maxsize (int): 最多缓存的型号数
+    """
+    return _device_info_cache.stats()
+
+
+def clear_device_info_cache(device_model: Optional[str] = None, maxsize: Optional[int] = None) -> None:
+    """
+    清除 get_device_info 的进程内缓存（不影响磁盘上的缓存文件）
+
+    参数:
+        device_model (Optional[str]): 只清除该型号，为 None 时清除全部
+        maxsize (Optional[int]): 同时修改最多缓存的型号数，0 表示不缓存
+    """
+    _device_info_cache.clear(device_model)
+    if maxsize is not None:
+        with _device_info_cache._lock:
+            _device_info_cache.maxsize = maxsize
+
+
+def prefetch_device_infos(
+        models: Iterable[str],
+        cache_path: Optional[Union[str, Path, SpecStore]] = None,
+        concurrency: int = 8,
+        max_age: Optional[float] = None,
+        fail_fast: bool = False,
+) -> dict:
+    """
+    并发预取多个型号的设备规格信息，填充缓存
+
+    已缓存且未过期的型号会被跳过，其余型号最多 concurrency 个同时从米家规格平台获取，
+    结果写入 cache_path 指定的缓存库及进程内缓存。适合在服务启动前调用，
+    避免首次创建各型号的 mijiaDevice 时逐个串行获取规格。
+
+    参数:
+        models (Iterable[str]): 设备型号，重复的型号只获取一次
+        cache_path (Optional[Union[str, Path, SpecStore]]): 缓存路径，同 get_device_info；
+            为 None 时只填充进程内缓存
+        concurrency (int): 最大并发数
+        max_age (Optional[float]): 缓存库中的记录超过该秒数时视为过期并重新获取，None 表示不过期
+        fail_fast (bool): 为 True 时遇到第一个失败即抛出该异常
+
+    返回值:
+        dict: 本次实际获取的 {型号: 设备规格信息}
+
+    异常:
+        PartialFailureError: fail_fast 为 False 且部分型号获取失败，
+            results 为成功获取的 {型号: 设备规格信息}，errors 为 {型号: 异常}
+    """
+    store = None
+    if cache_path is not None:
+        store = cache_path if isinstance(cache_path, SpecStore) else SpecStore.open(cache_path)
+    now = time.time()
+    missing = []
+    for model in dict.fromkeys(models):
+        if store is None:
+            if _device_info_cache.get(model) is not None:
+                continue
+        else:
+            meta = store.metadata(model)
+            legacy_file = store.path.parent / f"{model}.json"
+            if meta is None and legacy_file.exists() and store.import_json_file(legacy_file):
+                meta = store.metadata(model)
+            if (meta is not None and meta["version"] == device_info_version
+                    and (max_age is None or now - meta["fetched_at"] < max_age)):
+                continue
+        missing.append(model)
+    logger.debug(f"预取设备规格: {len(missing)} 个型号需要获取")
+
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(missing) or 1))) as executor:
+        futures = {executor.submit(_load_device_info, model, store, True): model for model in missing}
+        for future in as_completed(futures):
+            model = futures[future]
+            try:
+                results[model] = future.result()
+            except Exception as e:
+                if fail_fast:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                errors[model] = e
+                continue
+            _device_info_cache.put(model, results[model])
+    if errors:
+        for model, e in errors.items():
+            logger.warning(f"获取设备规格失败: {model}: {e}")
+        raise PartialFailureError("部分设备规格获取失败", results, errors)
+    return results
+
+
+def _load_device_info(
+        device_model: str,
+        cache_path: Optional[Union[str, Path, SpecStore]] = None,
+        refresh: bool = False,
+        bundle: Optional[Union[str, Path, SpecBundle]] = None,
+) -> dict:
+    store = None
     if cache_path is not None:
-        cache_file = Path(cache_path) / f"{device_model}.json"
-        if cache_file.exists():
-            logger.debug(f"从缓存加载设备信息: {cache_file}")
-            with cache_file.open("r", encoding="utf-8") as f:
-                cached_result = json.load(f)
-            if cached_result.get("version") == device_info_version:
+        store = cache_path if isinstance(cache_path, SpecStore) else SpecStore.open(cache_path)
+    if store is not None and not refresh:
+        cached_result = store.get(device_model, device_info_version)
+        if cached_result is not None:
+            logger.debug(f"从缓存加载设备信息: {store.path} -> {device_model}")
+            return cached_result
+        # 兼容旧版本按型号保存的 {device_model}.json，导入后不再读取该文件
+        legacy_file = store.path.parent / f"{device_model}.json"
+        if legacy_file.exists() and store.import_json_file(legacy_file, replace=True):
+            cached_result = store.get(device_model, device_info_version)
+            if cached_result is not None:
+                return cached_result
+    if bundle is not None and not refresh:
+        if not isinstance(bundle, SpecBundle):
+            bundle = SpecBundle.open(bundle)
+        cached_result = bundle.get(device_model, device_info_version)
+        if cached_result is not None:
+            logger.debug(f"从离线规格包加载设备信息: {bundle.path} -> {device_model}")
+            return cached_result
+    headers = {"User-Agent": f"mijiaAPI/{version}"}
+    validators = store.validators(device_model) if store is not None else None
+    etag = last_modified = None
+    # 格式版本变化时，只有保存了原始数据才能在 304 后本地重新解析
+    if validators is not None and (validators[2] == device_info_version or validators[3]):
+        etag, last_modified = validators[:2]
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    source = None
+    with requests.get(device_url + device_model, headers=headers, stream=True) as response:
+        if response.status_code == 304 and store is not None:
+            cached_result = store.get(device_model, device_info_version)
+            if cached_result is not None:
+                logger.debug(f"设备信息未变化: {device_model}")
+                store.touch(device_model)
                 return cached_result
-            logger.debug(f"设备信息缓存版本不匹配，重新获取: {cache_file}")
-    response = requests.get(device_url + device_model, headers={
-        "User-Agent": f"mijiaAPI/{version}"
-    })
-    if response.status_code != 200:
-        raise GetDeviceInfoError(device_model)
-    content = re.search(r"<script data-page=\"app\" type=\"application/json\">(.*?)</script>", response.text)
-    if content is None:
-        raise GetDeviceInfoError(device_model)
-    content = content.group(1)
-    content = json.loads(content)
+            source = store.source(device_model)
+            if source is None:
+                raise GetDeviceInfoError(device_model)
+            logger.debug(f"设备信息未变化，使用缓存的原始数据重新解析: {device_model}")
+            etag = response.headers.get("ETag") or etag
+            last_modified = response.headers.get("Last-Modified") or last_modified
+        elif response.status_code != 200:
+            raise GetDeviceInfoError(device_model)
+        else:
+            source = _extract_page_data(response.iter_content(chunk_size=16384))
+            if source is None:
+                raise GetDeviceInfoError(device_model)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    result = _parse_spec_page(jsonutil.loads(source))
+    if store is not None:
+        logger.debug(f"缓存设备信息到: {store.path} -> {device_model}")
+        store.put(
+            device_model, result, hashlib.sha256(source.encode("utf-8")).hexdigest(),
+            etag=etag, last_modified=last_modified, source=source,
+        )
+    return result
 
+
+_page_data_start = b'<script data-page="app" type="application/json">'
+_page_data_end = b"</script>"
+
+
+def _extract_page_data(chunks: Iterable[bytes]) -> Optional[str]:
+    """从逐块读取的页面中提取 data-page 脚本内的 JSON 文本，找到结束标签后即停止读取。"""
+    buffer = bytearray()
+    start = -1
+    scanned = 0
+    for chunk in chunks:
+        buffer += chunk
+        if start < 0:
+            index = buffer.find(_page_data_start, scanned)
+            if index < 0:
+                # 只保留可能包含不完整起始标签的末尾部分
+                keep = len(_page_data_start) - 1
+                if len(buffer) > keep:
+                    del buffer[:-keep]
+                scanned = 0
+                continue
+            start = index + len(_page_data_start)
+            scanned = start
+        end = buffer.find(_page_data_end, scanned)
+        if end >= 0:
+            return buffer[start:end].decode("utf-8")
+        scanned = max(start, len(buffer) - len(_page_data_end) + 1)
+    return None
+
+
+def _parse_spec_page(content: dict) -> dict:
     product = content["props"]["product"]
     name = product["name"]
     model = product["model"]
@@ -378,10 +978,4 @@ def get_device_info(device_model: str, cache_path: Optional[Union[str, Path]] =
 
     _deduplicate_names(result["properties"], "piid")
     _deduplicate_names(result["actions"], "aiid")
-
-    if cache_file is not None:
-        cache_file.parent.mkdir(parents=True, exist_ok=True)
-        logger.debug(f"缓存设备信息到: {cache_file}")
-        with cache_file.open("w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
     return result
@@ -52,12 +52,23 @@ ERROR_CODE = {
 
 class LoginError(Exception):
     def __init__(self, code: int, message: str):
+        self.code = code
+        self.message = message
         super().__init__(f"code: {code}, message: {message}")
 
 class APIError(Exception):
     def __init__(self, code: int, message: str):
+        self.code = code
+        self.message = message
         super().__init__(f"code: {code}, message: {message}")
 
+class PartialFailureError(APIError):
+    def __init__(self, message: str, results: list, errors: dict):
+        self.results = results
+        self.errors = errors
+        details = "; ".join(f"{key}: {error}" for key, error in errors.items())
+        super().__init__(-1, f"{message}, {details}")
+
 class DeviceNotFoundError(Exception):
     def __init__(self, did: str):
         super().__init__(f"未找到 did 为 '{did}' 的设备，请检查 did 是否正确")
@@ -78,6 +89,19 @@ class DeviceActionError(Exception):
     def __init__(self, dev_name: str, name: str, code: int):
         super().__init__(f"执行设备 '{dev_name}' 的动作 '{name}' 时失败, code: {code}, message: {ERROR_CODE.get(str(code), '未知错误')}")
 
+class DeviceBatchError(Exception):
+    def __init__(self, dev_name: str, operation: str, errors: dict, results: dict):
+        self.errors = errors
+        self.results = results
+        details = "; ".join(f"'{name}' code: {code}, message: {ERROR_CODE.get(str(code), '未知错误')}" for name, code in errors.items())
+        super().__init__(f"{operation}设备 '{dev_name}' 的 {len(errors)} 个属性时失败: {details}")
+
+class TransactionError(Exception):
+    def __init__(self, errors: dict, results: dict):
+        self.errors = errors
+        self.results = results
+        super().__init__(f"事务中 {len(errors)} 个设备的属性设置失败: " + "; ".join(str(error) for error in errors.values()))
+
 class GetDeviceInfoError(Exception):
     def __init__(self, device_model: str):
         super().__init__(f"获取设备型号 '{device_model}' 的设备信息失败")
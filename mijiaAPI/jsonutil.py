@@ -0,0 +1,60 @@
+import json
+import re
+from typing import Any, Union
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 当前使用的 JSON 实现："orjson"（已安装时）或 "json"（标准库）
+backend = "orjson" if orjson is not None else "json"
+# loads 解析失败时抛出的异常（orjson.JSONDecodeError 是其子类）
+JSONDecodeError = json.JSONDecodeError
+
+# 明文 JSON 响应以 { 或 [ 开头（允许前导空白），加密响应为 base64 文本，不会以这两个字符开头
+_json_prefix = re.compile(r"[ \t\r\n]*[{\[]")
+_json_prefix_bytes = re.compile(rb"[ \t\r\n]*[{\[]")
+
+
+def dumps(obj: Any, sort_keys: bool = False, indent: bool = False, ensure_ascii: bool = False) -> str:
+    """
+    序列化为紧凑（indent 为 True 时缩进 2 格）、不转义非 ASCII 字符的 JSON 字符串
+
+    安装了 orjson 时使用 orjson，遇到其不支持的对象（如超过 64 位的整数）时退回标准库。
+    ensure_ascii 为 True 时始终使用标准库并转义非 ASCII 字符（orjson 不支持），
+    用于需要与旧版本逐字节一致的场合，如签名后发送给服务器的请求数据。
+    """
+    if ensure_ascii:
+        return json.dumps(obj, sort_keys=sort_keys, indent=2 if indent else None,
+                          separators=None if indent else (",", ":"))
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option).decode("utf-8")
+        except TypeError:
+            pass
+    if indent:
+        return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, indent=2)
+    return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """解析 JSON，解析失败时抛出 json.JSONDecodeError（orjson.JSONDecodeError 是其子类）。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def looks_like_json(data: Union[str, bytes]) -> bool:
+    """只检查开头的字符，判断响应是明文 JSON 对象/数组还是需要解密的数据。"""
+    pattern = _json_prefix if isinstance(data, str) else _json_prefix_bytes
+    return pattern.match(data) is not None
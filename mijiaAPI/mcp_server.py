@@ -1,4 +1,3 @@
-import json
 import logging
 import sys
 import threading
@@ -7,10 +6,12 @@ from typing import Optional
 
 from fastmcp import FastMCP
 
+from . import jsonutil
 from .apis import mijiaAPI
 from .devices import get_device_info, mijiaDevice
-from .errors import LoginError
+from .errors import ERROR_CODE, DeviceBatchError, LoginError
 from .logger import logger
+from .registry import DeviceRegistry
 from .version import version
 
 
@@ -18,6 +19,7 @@ mcp = FastMCP("mijia-api", version=version)
 
 _api: Optional[mijiaAPI] = None
 _auth_path: Optional[Path] = None
+_registry: Optional[DeviceRegistry] = None
 
 _login_api: Optional[mijiaAPI] = None
 _login_data: Optional[dict] = None
@@ -32,6 +34,14 @@ def _get_api() -> mijiaAPI:
     raise RuntimeError("mijiaAPI 未初始化，请先调用 login 工具完成登录")
 
 
+def _get_registry(api: mijiaAPI) -> DeviceRegistry:
+    # 登录切换凭证后 _api 会被替换，此时重建设备注册表
+    global _registry
+    if _registry is None or _registry.api is not api:
+        _registry = DeviceRegistry(api, include_shared=True)
+    return _registry
+
+
 def _refresh_if_needed(api: mijiaAPI) -> None:
     if not api.available:
         try:
@@ -80,7 +90,7 @@ def list_homes() -> str:
     api = _get_api()
     _refresh_if_needed(api)
     homes = api.get_homes_list()
-    return json.dumps(homes, ensure_ascii=False)
+    return jsonutil.dumps(homes)
 
 
 @mcp.tool
@@ -94,7 +104,7 @@ def list_devices(home_id: Optional[str] = None) -> str:
     """
     api = _get_api()
     _refresh_if_needed(api)
-    devices = api.get_devices_list() + api.get_shared_devices_list()
+    devices = api.get_devices_list(include_shared=True)
     homes = api.get_homes_list()
     did_location = {}
     for home in homes:
@@ -107,7 +117,7 @@ def list_devices(home_id: Optional[str] = None) -> str:
         device['room'] = room_name
     if home_id is not None:
         devices = [d for d in devices if d.get("home_id") == home_id]
-    return json.dumps(devices, ensure_ascii=False)
+    return jsonutil.dumps(devices)
 
 
 @mcp.tool
@@ -122,7 +132,7 @@ def list_scenes(home_id: Optional[str] = None) -> str:
     api = _get_api()
     _refresh_if_needed(api)
     scenes = api.get_scenes_list(home_id)
-    return json.dumps(scenes, ensure_ascii=False)
+    return jsonutil.dumps(scenes)
 
 
 @mcp.tool
@@ -137,7 +147,7 @@ def list_consumables(home_id: Optional[str] = None) -> str:
     api = _get_api()
     _refresh_if_needed(api)
     items = api.get_consumable_items(home_id)
-    return json.dumps(items, ensure_ascii=False)
+    return jsonutil.dumps(items)
 
 
 @mcp.tool
@@ -151,8 +161,8 @@ def get_device_spec(device_model: str) -> str:
     用于确定 get_device_properties / set_device_property / run_device_action 的可用参数名。
     """
     api = _get_api()
-    info = get_device_info(device_model, cache_path=api.auth_data_path.parent)
-    return json.dumps(info, ensure_ascii=False)
+    info = get_device_info(device_model, cache_path=api.spec_cache_path, bundle=api.spec_bundle_path)
+    return jsonutil.dumps(info)
 
 
 @mcp.tool
@@ -173,18 +183,17 @@ def get_device_properties(
     """
     api = _get_api()
     _refresh_if_needed(api)
-    device = mijiaDevice(api, did=did, dev_name=dev_name)
+    device = _get_registry(api).device(did=did, dev_name=dev_name)
     names = prop_names if prop_names else [k for k in device.prop_list if "_" not in k]
-    result = {}
-    for name in names:
-        prop = device.prop_list.get(name)
-        if prop is None or "r" not in prop.rw:
-            continue
-        try:
-            result[name] = device.get(name)
-        except Exception as e:
-            result[name] = f"<读取失败: {e}>"
-    return json.dumps(result, ensure_ascii=False)
+    names = [name for name in names if name in device.prop_list and "r" in device.prop_list[name].rw]
+    try:
+        result = device.get_many(names)
+    except DeviceBatchError as e:
+        result = dict(e.results)
+        for name, code in e.errors.items():
+            result[name] = f"<读取失败: code: {code}, message: {ERROR_CODE.get(str(code), '未知错误')}>"
+        result = {name: result[name] for name in names}
+    return jsonutil.dumps(result)
 
 
 @mcp.tool
@@ -206,7 +215,7 @@ def set_device_property(
     """
     api = _get_api()
     _refresh_if_needed(api)
-    device = mijiaDevice(api, did=did, dev_name=dev_name)
+    device = _get_registry(api).device(did=did, dev_name=dev_name)
     device.set(prop_name, value)
     return f"{device.name}({device.did}) 的 {prop_name} 已设置为 {value}"
 
@@ -230,7 +239,7 @@ def run_device_action(
     """
     api = _get_api()
     _refresh_if_needed(api)
-    device = mijiaDevice(api, did=did, dev_name=dev_name)
+    device = _get_registry(api).device(did=did, dev_name=dev_name)
     device.run_action(action_name, value=value)
     return f"{device.name}({device.did}) 的动作 {action_name} 执行成功"
 
@@ -302,7 +311,7 @@ def get_statistics(
         "time_end": time_end if time_end is not None else now,
     }
     ret = api.get_statistics(data)
-    return json.dumps(ret, ensure_ascii=False)
+    return jsonutil.dumps(ret)
 
 
 @mcp.tool
@@ -322,7 +331,7 @@ def run_speaker_command(
     """
     api = _get_api()
     _refresh_if_needed(api)
-    devices = api.get_devices_list()
+    devices = _get_registry(api).devices
     if speaker_name is None:
         match = None
         for device in devices:
@@ -336,7 +345,7 @@ def run_speaker_command(
         if not matches:
             return f"未找到名为 {speaker_name} 的小爱音箱"
         match = matches[0]
-    speaker = mijiaDevice(api, did=match["did"])
+    speaker = mijiaDevice(api, device=match)
     speaker.run_action("execute-text-directive", _in=[prompt, 1 if quiet else 0])
     return f"已通过 {match['name']} 执行: {prompt}"
 
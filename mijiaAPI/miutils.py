@@ -8,13 +8,16 @@
 # -----------------------------------------------------------
 
 import base64
+import binascii
 import hashlib
 import random
 import time
-from gzip import GzipFile
-from io import BytesIO
+import zlib
 
 from Crypto.Cipher import ARC4
+from Crypto.Util.strxor import strxor
+
+from . import jsonutil
 
 
 def gen_nonce():
@@ -73,9 +76,294 @@ def decrypt_rc4(password, payload):
     return r.encrypt(base64.b64decode(payload))
 
 def decrypt(ssecurity, nonce, payload):
-    decrypted = decrypt_rc4(get_signed_nonce(ssecurity, nonce), payload)
-    try:
-        return decrypted.decode('utf-8')
-    except UnicodeDecodeError:
-        compressed_file = BytesIO(decrypted)
-        return GzipFile(fileobj=compressed_file, mode="rb").read().decode('utf-8')
+    return CryptoContext(ssecurity).decrypt_bytes(nonce, payload).decode('utf-8')
+
+
+# RC4 初始化后丢弃的密钥流长度
+_RC4_DROP = bytes(1024)
+
+
+def _gen_nonce_bytes():
+    millis = int(round(time.time() * 1000))
+    b = (random.getrandbits(64) - 2**63).to_bytes(8, "big", signed=True)
+    part2 = millis // 60000
+    return b + part2.to_bytes(((part2.bit_length()+7)//8), "big")
+
+
+def _sign(prefix, params, signed_nonce):
+    signature_string = "&".join([prefix, *[f"{k}={v}" for k, v in params.items()], signed_nonce])
+    return base64.b64encode(hashlib.sha1(signature_string.encode("utf-8")).digest()).decode()
+
+
+class _Keystream():
+    """
+    同一 signed_nonce 的 RC4 密钥流
+
+    请求中每个字段以及响应都用同一密钥从头加密，因此只初始化一次 RC4：
+    已生成的密钥流前缀缓存下来与各字段异或（strxor，C 实现），需要更长时从当前位置继续生成。
+    解密响应时前缀部分与缓存异或，其余部分直接交给同一个 RC4 继续处理，不重新初始化。
+    """
+    __slots__ = ("_key", "_cipher", "_stream")
+
+    def __init__(self, key):
+        self._key = key
+        self._cipher = ARC4.new(key)
+        self._cipher.encrypt(_RC4_DROP)
+        self._stream = b""
+
+    def _extend(self, n):
+        if self._cipher is None:
+            # decrypt 已消耗了 RC4 的后续状态，从头重建到当前缓存的长度
+            self._cipher = ARC4.new(self._key)
+            self._cipher.encrypt(_RC4_DROP)
+            self._cipher.encrypt(bytes(len(self._stream)))
+        self._stream += self._cipher.encrypt(bytes(n - len(self._stream)))
+
+    def apply(self, data):
+        n = len(data)
+        if n > len(self._stream):
+            self._extend(n)
+        return strxor(data, self._stream[:n])
+
+    def decryptor(self):
+        """
+        返回从密钥流开头依次解密各数据块的函数，用于逐块解密响应
+
+        已缓存的密钥流前缀与数据异或，其余部分交给同一个 RC4 从当前位置继续解密，不重新初始化。
+        """
+        offset = 0
+        cipher = None
+
+        def decrypt(data):
+            nonlocal offset, cipher
+            n = len(self._stream)
+            if offset < n:
+                k = min(len(data), n - offset)
+                head = strxor(bytes(data[:k]), self._stream[offset:offset + k])
+                offset += k
+                if k == len(data):
+                    return head
+                data = memoryview(data)[k:]
+            else:
+                head = b""
+            if cipher is None:
+                if self._cipher is None:
+                    self._extend(n)
+                cipher, self._cipher = self._cipher, None
+            return head + cipher.encrypt(data) if head else cipher.encrypt(data)
+
+        return decrypt
+
+    def decrypt(self, data):
+        """解密整个响应。"""
+        return self.decryptor()(data)
+
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_BASE64_WHITESPACE = b" \t\r\n"
+
+
+class _GzipStream():
+    """逐块解压 gzip 数据，依次处理多个 gzip 成员（与 GzipFile 一致）。"""
+    __slots__ = ("_decompressor",)
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(wbits=31)
+
+    def feed(self, data, out):
+        while data:
+            out.append(self._decompressor.decompress(data))
+            if not self._decompressor.eof:
+                return
+            data = self._decompressor.unused_data
+            self._decompressor = zlib.decompressobj(wbits=31)
+
+    def finish(self, out):
+        out.append(self._decompressor.flush())
+
+
+class ResponseDecryptor():
+    """
+    逐块解密 base64 编码的加密响应
+
+    每个数据块依次 base64 解码、RC4 解密，按开头的 gzip 魔数判断是否需要解压，
+    压缩数据由 zlib 逐块解压；整个过程不保留完整的 base64 文本或压缩数据，
+    只有解压后的明文被收集起来交给 JSON 解析器（JSON 解析本身无法逐块进行）。
+    """
+    __slots__ = ("_decrypt", "_rest", "_head", "_gzip", "_chunks")
+
+    def __init__(self, keystream):
+        self._decrypt = keystream.decryptor()
+        # 尚未凑满 4 个字符的 base64 文本
+        self._rest = b""
+        # 判断 gzip 魔数前暂存的明文
+        self._head = b""
+        # None 表示尚未判断，False 表示未压缩
+        self._gzip = None
+        self._chunks = []
+
+    def feed(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii")
+        elif not isinstance(chunk, bytes):
+            chunk = bytes(chunk)
+        if any(c in chunk for c in _BASE64_WHITESPACE):
+            # 按 4 个字符对齐前先去掉换行等空白（a2b_base64 会忽略它们）；逐个字符查找比正则快得多
+            chunk = chunk.translate(None, _BASE64_WHITESPACE)
+        data = memoryview(chunk)
+        if self._rest:
+            # 先用本块开头的字符补齐上一块剩下的不足 4 个字符，只有这几个字符需要拼接
+            take = 4 - len(self._rest)
+            rest = self._rest + data[:take].tobytes()
+            data = data[take:]
+            if len(rest) < 4:
+                self._rest = rest
+                return
+            self._rest = b""
+            self._feed_plaintext(self._decrypt(binascii.a2b_base64(rest)))
+        usable = len(data) - len(data) % 4
+        if usable < len(data):
+            self._rest = data[usable:].tobytes()
+        if usable:
+            self._feed_plaintext(self._decrypt(binascii.a2b_base64(data[:usable])))
+
+    def _feed_plaintext(self, data):
+        if self._gzip is None:
+            if self._head:
+                data = self._head + data
+            if len(data) < len(_GZIP_MAGIC):
+                self._head = data
+                return
+            self._head = b""
+            self._gzip = _GzipStream() if data[:2] == _GZIP_MAGIC else False
+        if self._gzip:
+            self._gzip.feed(memoryview(data), self._chunks)
+        else:
+            self._chunks.append(data)
+
+    def finish(self):
+        """返回 UTF-8 编码的明文 bytes。"""
+        if self._rest:
+            # 长度不是 4 的倍数的 base64 在这里抛出 binascii.Error
+            self._feed_plaintext(self._decrypt(binascii.a2b_base64(self._rest)))
+            self._rest = b""
+        if self._head:
+            self._chunks.append(self._head)
+            self._head = b""
+        if self._gzip:
+            self._gzip.finish(self._chunks)
+        chunks = [chunk for chunk in self._chunks if chunk]
+        self._chunks = []
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def _loads_plaintext(data):
+    if jsonutil.orjson is None:
+        # 标准库解析 bytes 时同样会先解码为 str，这里先解码并释放 bytes 以降低峰值内存
+        data = data.decode('utf-8')
+    return jsonutil.loads(data)
+
+
+class ResponseDecoder():
+    """
+    逐块读取响应并解析 JSON
+
+    明文响应以 { 或 [ 开头，直接收集；否则视为加密响应交给 ResponseDecryptor 逐块处理。
+    """
+    __slots__ = ("_decryptor", "_plain", "_pending", "_chunks")
+
+    def __init__(self, request_crypto):
+        self._decryptor = ResponseDecryptor(request_crypto._keystream)
+        # None 表示尚未读到非空白内容
+        self._plain = None
+        self._pending = b""
+        self._chunks = []
+
+    def feed(self, chunk):
+        if self._plain is None:
+            self._pending += chunk
+            if not self._pending.strip():
+                return
+            self._plain = jsonutil.looks_like_json(self._pending)
+            chunk, self._pending = self._pending, b""
+        if self._plain:
+            self._chunks.append(chunk)
+        else:
+            self._decryptor.feed(chunk)
+
+    def result(self):
+        if self._plain:
+            return jsonutil.loads(b"".join(self._chunks))
+        if self._plain is None:
+            return jsonutil.loads(self._pending)
+        return _loads_plaintext(self._decryptor.finish())
+
+
+class RequestCrypto():
+    """单次请求的加密状态，由 CryptoContext.sign_request 返回，用于解密该请求的响应。"""
+    __slots__ = ("nonce", "signed_nonce", "_keystream")
+
+    def __init__(self, nonce, signed_nonce, keystream):
+        self.nonce = nonce
+        self.signed_nonce = signed_nonce
+        self._keystream = keystream
+
+    def decrypt_bytes(self, payload):
+        """
+        解密 base64 编码的响应（str / bytes / memoryview），返回 UTF-8 编码的明文 bytes
+
+        按 gzip 魔数判断是否需要解压，而不是先尝试按 UTF-8 解码，不经过 BytesIO / GzipFile。
+        """
+        decryptor = ResponseDecryptor(self._keystream)
+        decryptor.feed(payload)
+        return decryptor.finish()
+
+    def decrypt(self, payload):
+        return self.decrypt_bytes(payload).decode('utf-8')
+
+    def decrypt_json(self, payload):
+        """解密并解析 JSON；使用 orjson 时直接解析 bytes，不先解码为 str。"""
+        return _loads_plaintext(self.decrypt_bytes(payload))
+
+    def decoder(self):
+        """返回逐块解析该请求响应的 ResponseDecoder（明文或加密均可）。"""
+        return ResponseDecoder(self)
+
+
+class CryptoContext():
+    """
+    会话级的签名与加解密上下文
+
+    缓存解码后的 ssecurity，每次请求只计算一次 signed_nonce 并初始化一次 RC4，
+    在一次遍历中完成 rc4_hash__ 签名、全部字段加密与最终签名，结果与 generate_enc_params 一致。
+    """
+    __slots__ = ("ssecurity", "_secret")
+
+    def __init__(self, ssecurity):
+        self.ssecurity = ssecurity
+        self._secret = base64.b64decode(ssecurity)
+
+    def sign_request(self, uri, params, method="POST"):
+        """返回 (加密并签名后的请求参数, RequestCrypto)，不修改传入的 params。"""
+        nonce_bytes = _gen_nonce_bytes()
+        nonce = base64.b64encode(nonce_bytes).decode()
+        key = hashlib.sha256(self._secret + nonce_bytes).digest()
+        signed_nonce = base64.b64encode(key).decode()
+        prefix = f"{str(method).upper()}&{uri}"
+        params = dict(params)
+        params["rc4_hash__"] = _sign(prefix, params, signed_nonce)
+        keystream = _Keystream(key)
+        params = {k: base64.b64encode(keystream.apply(v.encode())).decode() for k, v in params.items()}
+        params["signature"] = _sign(prefix, params, signed_nonce)
+        params["ssecurity"] = self.ssecurity
+        params["_nonce"] = nonce
+        return params, RequestCrypto(nonce, signed_nonce, keystream)
+
+    def decrypt_bytes(self, nonce, payload):
+        """解密使用 nonce 的请求或响应数据，返回 UTF-8 编码的明文 bytes。"""
+        key = hashlib.sha256(self._secret + base64.b64decode(nonce)).digest()
+        return RequestCrypto(nonce, base64.b64encode(key).decode(), _Keystream(key)).decrypt_bytes(payload)
+
+    def decrypt(self, nonce, payload):
+        """解密使用 nonce 的请求或响应数据，同 decrypt(ssecurity, nonce, payload)。"""
+        return self.decrypt_bytes(nonce, payload).decode('utf-8')
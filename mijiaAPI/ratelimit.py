@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+
+class RateLimiter():
+    """
+    按键（设备 did、网关 did 等）限制调用间隔
+
+    limits 为 [(键, 最小间隔秒数), ...]：同一个键的调用串行执行，前一次调用结束后
+    至少间隔指定秒数才开始下一次，不同键之间互不影响。同一个 RateLimiter 可同时在
+    多线程与 asyncio 中使用，内部锁只在登记与计算等待时间时短暂持有，等待本身在锁外进行。
+
+    示例:
+        >>> with limiter.limit([(did, 0.5)]) as waited:
+        ...     api.get_devices_prop(...)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 键 -> 上一次调用结束后下一次调用最早可开始的时间（time.monotonic）
+        self._next: dict[str, float] = {}
+        # 键 -> 最后登记的调用结束时完成的 Future，后来的调用先等待它，从而按登记顺序串行
+        self._tail: dict[str, Future] = {}
+        self._calls = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _enqueue(self, limits: list[tuple[str, float]]) -> tuple[list[Future], Future]:
+        # 所有键在同一把锁内一次登记，多个键的先后顺序一致，不会互相等待形成死锁
+        done = Future()
+        with self._lock:
+            self._calls += 1
+            previous = {self._tail[key] for key, _ in limits if key in self._tail}
+            for key, _ in limits:
+                self._tail[key] = done
+        return list(previous), done
+
+    def _interval_wait(self, limits: list[tuple[str, float]]) -> float:
+        with self._lock:
+            now = time.monotonic()
+            return max([0.0] + [self._next.get(key, 0.0) - now for key, _ in limits])
+
+    def _record(self, wait: float) -> None:
+        with self._lock:
+            if wait > 0:
+                self._delayed += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+    def _release(self, limits: list[tuple[str, float]], done: Future, called: bool = True) -> None:
+        with self._lock:
+            now = time.monotonic()
+            for key, interval in limits:
+                if called:
+                    self._next[key] = max(self._next.get(key, 0.0), now + interval)
+                if self._tail.get(key) is done:
+                    del self._tail[key]
+        done.set_result(None)
+
+    def _abandon(self, limits: list[tuple[str, float]], previous: list[Future], done: Future) -> None:
+        # 等待期间被中断：在前面的调用都结束后再放行后来者，保证同一个键上不会有两个调用重叠
+        pending = [future for future in previous if not future.done()]
+        if not pending:
+            self._release(limits, done, called=False)
+            return
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._release(limits, done, called=False)
+
+        for future in pending:
+            future.add_done_callback(on_done)
+
+    @contextmanager
+    def limit(self, limits: list[tuple[str, float]]) -> Iterator[float]:
+        """在多线程中使用，必要时阻塞等待，返回实际等待的秒数。"""
+        previous, done = self._enqueue(limits)
+        start = time.monotonic()
+        try:
+            for future in previous:
+                future.result()
+            wait = self._interval_wait(limits)
+            if wait > 0:
+                time.sleep(wait)
+        except BaseException:
+            self._abandon(limits, previous, done)
+            raise
+        wait = time.monotonic() - start if previous or wait > 0 else 0.0
+        self._record(wait)
+        try:
+            yield wait
+        finally:
+            self._release(limits, done)
+
+    @asynccontextmanager
+    async def alimit(self, limits: list[tuple[str, float]]) -> AsyncIterator[float]:
+        """在 asyncio 中使用，必要时 await，返回实际等待的秒数。"""
+        previous, done = self._enqueue(limits)
+        start = time.monotonic()
+        try:
+            for future in previous:
+                # shield 避免调用方被取消时连带取消前一个调用的 Future
+                await asyncio.shield(asyncio.wrap_future(future))
+            wait = self._interval_wait(limits)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._abandon(limits, previous, done)
+            raise
+        wait = time.monotonic() - start if previous or wait > 0 else 0.0
+        self._record(wait)
+        try:
+            yield wait
+        finally:
+            self._release(limits, done)
+
+    def stats(self) -> dict:
+        """
+        返回值:
+            dict: 包含以下字段：
+                - calls (int): 经过限速器的调用次数
+                - delayed (int): 其中实际等待过的次数
+                - total_wait (float): 累计等待秒数
+                - max_wait (float): 单次最长等待秒数
+        """
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "delayed": self._delayed,
+                "total_wait": self._total_wait,
+                "max_wait": self._max_wait,
+            }
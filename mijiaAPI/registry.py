@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from .apis import mijiaAPI
+from .devices import _find_device, mijiaDevice
+from .errors import DeviceNotFoundError
+
+
+class _RegistrySnapshot():
+    __slots__ = ("devices", "by_did", "by_name", "by_model", "by_home", "by_room", "rooms", "fetched_at")
+
+    def __init__(self, devices: list, homes: list, fetched_at: float):
+        self.devices = devices
+        self.by_did = {}
+        self.by_name = defaultdict(list)
+        self.by_model = defaultdict(list)
+        self.by_home = defaultdict(list)
+        self.by_room = defaultdict(list)
+        # did -> (home_id, room_id, room_name)
+        self.rooms = {}
+        for home in homes:
+            for room in home.get("roomlist", []) or []:
+                for did in room.get("dids", []) or []:
+                    self.rooms[did] = (home["id"], room["id"], room["name"])
+        for device in devices:
+            did = device["did"]
+            self.by_did[did] = device
+            self.by_name[device.get("name")].append(device)
+            self.by_model[device.get("model")].append(device)
+            self.by_home[device.get("home_id")].append(device)
+            if did in self.rooms:
+                _, room_id, room_name = self.rooms[did]
+                self.by_room[room_id].append(device)
+                if room_name != room_id:
+                    self.by_room[room_name].append(device)
+        self.fetched_at = fetched_at
+
+
+class DeviceRegistry():
+    """
+    设备注册表
+
+    一次性获取设备列表（及家庭/房间信息），按 did、名称、型号、家庭、房间建立索引，
+    并基于该快照创建 mijiaDevice，避免每构造一个设备都重新下载整个设备列表。
+    快照在 ttl 秒后过期并在下次访问时重新获取，也可调用 refresh() 手动刷新。
+
+    示例:
+        >>> registry = DeviceRegistry(api)
+        >>> lamp = registry.device(dev_name="台灯")
+        >>> lights = registry.find(model="yeelink.light.lamp4", room="卧室")
+    """
+    # 查找失败时，快照至少存在这么久（秒）才会为此刷新，避免反复查找不存在的设备时频繁刷新
+    miss_refresh_interval = 10
+
+    def __init__(self, api: mijiaAPI, ttl: Optional[float] = 300, include_shared: bool = False):
+        self.api = api
+        self.ttl = ttl
+        self.include_shared = include_shared
+        self._snapshot: Optional[_RegistrySnapshot] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """重新获取设备列表与家庭信息并重建索引。"""
+        fetched_at = time.monotonic()
+        homes = self.api.get_homes_list(refresh=True)
+        devices = self.api.get_devices_list(include_shared=self.include_shared)
+        self._snapshot = _RegistrySnapshot(devices, homes, fetched_at)
+
+    def _current(self) -> _RegistrySnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and (self.ttl is None or time.monotonic() - snapshot.fetched_at < self.ttl):
+            return snapshot
+        with self._lock:
+            # 等待锁期间其他线程可能已完成刷新
+            if self._snapshot is snapshot:
+                self.refresh()
+            return self._snapshot
+
+    @property
+    def devices(self) -> list:
+        """当前快照中的所有设备信息。"""
+        return list(self._current().devices)
+
+    def __len__(self) -> int:
+        return len(self._current().devices)
+
+    def __contains__(self, did: str) -> bool:
+        return did in self._current().by_did
+
+    def get(self, did: Optional[str] = None, dev_name: Optional[str] = None) -> dict:
+        """
+        按 did 或设备名称查找设备信息
+
+        未找到时若快照已超过 miss_refresh_interval 秒，会刷新一次快照后重试（可能是新添加的设备）。
+
+        异常:
+            ValueError: did 与 dev_name 均未提供
+            DeviceNotFoundError: 未找到设备
+            MultipleDevicesFoundError: 设备名称不唯一
+        """
+        snapshot = self._current()
+        try:
+            return self._lookup(snapshot, did, dev_name)
+        except DeviceNotFoundError:
+            if time.monotonic() - snapshot.fetched_at < self.miss_refresh_interval:
+                raise
+        with self._lock:
+            if self._snapshot is snapshot:
+                self.refresh()
+        return self._lookup(self._snapshot, did, dev_name)
+
+    @staticmethod
+    def _lookup(snapshot: _RegistrySnapshot, did: Optional[str], dev_name: Optional[str]) -> dict:
+        if did is not None:
+            candidates = [snapshot.by_did[did]] if did in snapshot.by_did else []
+        else:
+            candidates = snapshot.by_name.get(dev_name, [])
+        return _find_device(candidates, did, dev_name)
+
+    def find(
+            self,
+            name: Optional[str] = None,
+            model: Optional[str] = None,
+            home_id: Optional[str] = None,
+            room: Optional[str] = None,
+    ) -> list:
+        """
+        按条件筛选设备，多个条件同时满足，均未指定时返回全部设备
+
+        参数:
+            name (Optional[str]): 设备名称
+            model (Optional[str]): 设备型号
+            home_id (Optional[str]): 家庭ID，共享设备为 "shared"
+            room (Optional[str]): 房间ID或房间名称
+        """
+        snapshot = self._current()
+        result = None
+        for index, key in ((snapshot.by_name, name), (snapshot.by_model, model), (snapshot.by_home, home_id), (snapshot.by_room, room)):
+            if key is None:
+                continue
+            matches = index.get(key, [])
+            if result is None:
+                result = list(matches)
+            else:
+                dids = {device["did"] for device in matches}
+                result = [device for device in result if device["did"] in dids]
+        return list(snapshot.devices) if result is None else result
+
+    def room_of(self, did: str) -> Optional[tuple[str, str, str]]:
+        """返回设备所在的 (home_id, room_id, room_name)，不在任何房间中时返回 None。"""
+        return self._current().rooms.get(did)
+
+    def device(self, did: Optional[str] = None, dev_name: Optional[str] = None, **kwargs) -> mijiaDevice:
+        """基于快照中的设备信息创建 mijiaDevice，其余参数（sleep_time、cache_ttl 等）同 mijiaDevice。"""
+        return mijiaDevice(self.api, device=self.get(did, dev_name), **kwargs)
@@ -0,0 +1,372 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from . import jsonutil
+from .logger import logger
+
+
+spec_store_filename = "device_specs.db"
+
+
+def _store_path(path: Union[str, Path]) -> Path:
+    # 目录或没有后缀的路径（可能尚不存在）都视为缓存目录，使用其中的 device_specs.db
+    path = Path(path).expanduser()
+    if path.is_dir() or not path.suffix:
+        path = path / spec_store_filename
+    return path
+
+
+class SpecStore():
+    """
+    设备规格缓存库（单个 SQLite 文件）
+
+    每个型号一条记录，保存解析后的规格信息及元数据（获取时间、来源内容哈希、device_info_version），
+    以及用于条件请求的 ETag / Last-Modified 和压缩后的原始规格数据（格式版本变化时可在 304 后本地重新解析）。
+    查找时只读取所请求型号的记录；多个 mijiaAPI 实例（不同的认证文件）乃至多个进程
+    可以指向同一个文件共享缓存。旧版本按型号保存的 {model}.json 可通过 import_json_dir() 导入，
+    get_device_info 在缓存目录中找不到记录时也会自动导入同名的 JSON 文件。
+
+    示例:
+        >>> store = SpecStore.open("~/.config/mijia-api")
+        >>> store.import_json_dir("~/.config/mijia-api")
+        >>> info = get_device_info("yeelink.light.lamp4", cache_path=store)
+    """
+    _opened: dict[Path, "SpecStore"] = {}
+    _opened_lock = threading.Lock()
+
+    def __init__(self, path: Union[str, Path]):
+        path = _store_path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.OperationalError:
+                # 部分文件系统（如网络盘）不支持 WAL，退回默认的回滚日志
+                pass
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS specs ("
+                " model TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " source_hash TEXT,"
+                " data TEXT NOT NULL)"
+            )
+            # 旧版本创建的库缺少条件请求相关的列时补齐
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(specs)")}
+            for column, column_type in (("etag", "TEXT"), ("last_modified", "TEXT"), ("source", "BLOB")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE specs ADD COLUMN {column} {column_type}")
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "SpecStore":
+        """按路径返回共享的 SpecStore，path 为目录或没有后缀时使用其中的 device_specs.db。"""
+        path = _store_path(path).resolve()
+        with cls._opened_lock:
+            store = cls._opened.get(path)
+            if store is None:
+                store = cls._opened[path] = cls(path)
+            return store
+
+    def get(self, model: str, version: Optional[int] = None) -> Optional[dict]:
+        """返回型号的规格信息，不存在或格式版本与 version 不一致时返回 None。"""
+        with self._lock:
+            row = self._conn.execute("SELECT version, data FROM specs WHERE model = ?", (model,)).fetchone()
+        if row is None:
+            return None
+        if version is not None and row[0] != version:
+            logger.debug(f"设备信息缓存版本不匹配，重新获取: {model}")
+            return None
+        return jsonutil.loads(row[1])
+
+    def put(
+            self,
+            model: str,
+            info: dict,
+            source_hash: Optional[str] = None,
+            fetched_at: Optional[float] = None,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None,
+            source: Optional[str] = None,
+    ) -> None:
+        data = jsonutil.dumps(info)
+        if source_hash is None:
+            source_hash = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        compressed = zlib.compress(source.encode("utf-8")) if source is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO specs"
+                " (model, version, fetched_at, source_hash, data, etag, last_modified, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (model, info.get("version", 0), time.time() if fetched_at is None else fetched_at, source_hash, data,
+                 etag, last_modified, compressed),
+            )
+
+    def validators(self, model: str) -> Optional[tuple[Optional[str], Optional[str], int, bool]]:
+        """返回型号记录的 (ETag, Last-Modified, device_info_version, 是否保存了原始数据)，不存在时返回 None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, version, source IS NOT NULL FROM specs WHERE model = ?", (model,)
+            ).fetchone()
+        return None if row is None else (row[0], row[1], row[2], bool(row[3]))
+
+    def source(self, model: str) -> Optional[str]:
+        """返回保存的原始规格数据（页面中的 JSON 文本），未保存时返回 None。"""
+        with self._lock:
+            row = self._conn.execute("SELECT source FROM specs WHERE model = ?", (model,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def touch(self, model: str, fetched_at: Optional[float] = None) -> None:
+        """将记录的获取时间更新为当前时间（服务端返回 304 时使用）。"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE specs SET fetched_at = ? WHERE model = ?", (time.time() if fetched_at is None else fetched_at, model)
+            )
+
+    def delete(self, model: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM specs WHERE model = ?", (model,)).rowcount > 0
+
+    def metadata(self, model: str) -> Optional[dict]:
+        """
+        返回型号记录的元数据，不存在时返回 None
+
+        返回值:
+            dict: 包含以下字段：
+                - model (str): 设备型号
+                - version (int): device_info_version
+                - fetched_at (float): 获取时间（Unix 时间戳）
+                - source_hash (str): 来源内容的 SHA-256
+                - size (int): 规格数据的字节数
+                - etag (Optional[str]): 服务端返回的 ETag
+                - last_modified (Optional[str]): 服务端返回的 Last-Modified
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT model, version, fetched_at, source_hash, length(data), etag, last_modified"
+                " FROM specs WHERE model = ?", (model,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("model", "version", "fetched_at", "source_hash", "size", "etag", "last_modified"), row))
+
+    def models(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT model FROM specs ORDER BY model")]
+
+    def __contains__(self, model: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM specs WHERE model = ?", (model,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM specs").fetchone()[0]
+
+    def import_json_file(self, json_file: Union[str, Path], replace: bool = False) -> bool:
+        """导入一个旧版 {model}.json 缓存文件，已存在同型号记录且 replace 为 False 时跳过。"""
+        json_file = Path(json_file)
+        model = json_file.stem
+        if not replace and model in self:
+            return False
+        raw = json_file.read_bytes()
+        try:
+            info = jsonutil.loads(raw)
+        except ValueError:
+            logger.warning(f"跳过无法解析的设备信息缓存: {json_file}")
+            return False
+        if not isinstance(info, dict) or "properties" not in info:
+            return False
+        self.put(model, info, hashlib.sha256(raw).hexdigest(), json_file.stat().st_mtime)
+        logger.debug(f"已导入设备信息缓存: {json_file}")
+        return True
+
+    def import_json_dir(self, directory: Union[str, Path], replace: bool = False, remove: bool = False) -> int:
+        """
+        导入目录下所有旧版 {model}.json 缓存文件
+
+        参数:
+            directory (Union[str, Path]): 旧缓存目录（通常为认证文件所在目录）
+            replace (bool): 是否覆盖已存在的同型号记录
+            remove (bool): 导入成功后是否删除原 JSON 文件
+
+        返回值:
+            int: 导入的文件数
+        """
+        count = 0
+        for json_file in sorted(Path(directory).expanduser().glob("*.json")):
+            if self.import_json_file(json_file, replace=replace):
+                count += 1
+                if remove:
+                    json_file.unlink()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        with self._opened_lock:
+            if self._opened.get(self.path.resolve()) is self:
+                del self._opened[self.path.resolve()]
+
+    def export_bundle(self, path: Union[str, Path], models: Optional[Iterable[str]] = None) -> int:
+        """
+        将缓存库中的设备规格导出为单个离线规格包（见 SpecBundle）
+
+        参数:
+            path (Union[str, Path]): 规格包路径
+            models (Optional[Iterable[str]]): 只导出这些型号，None 表示全部
+
+        返回值:
+            int: 导出的型号数
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, version, fetched_at, source_hash, data FROM specs ORDER BY model"
+            ).fetchall()
+        if models is not None:
+            wanted = set(models)
+            rows = [row for row in rows if row[0] in wanted]
+        write_spec_bundle(path, rows)
+        logger.debug(f"已导出 {len(rows)} 个设备规格到: {path}")
+        return len(rows)
+
+    def import_bundle(self, bundle: Union[str, Path, "SpecBundle"], replace: bool = False) -> int:
+        """导入离线规格包中的设备规格，已存在同型号记录且 replace 为 False 时跳过，返回导入的型号数。"""
+        if not isinstance(bundle, SpecBundle):
+            bundle = SpecBundle.open(bundle)
+        count = 0
+        for model in bundle.models():
+            if not replace and model in self:
+                continue
+            meta = bundle.metadata(model)
+            self.put(model, bundle.get(model), meta["source_hash"], meta["fetched_at"])
+            count += 1
+        return count
+
+
+bundle_magic = b"MIJIASPC"
+bundle_format_version = 1
+# 魔数、规格包格式版本、压缩后索引的字节数
+_bundle_header = struct.Struct("<8sHI")
+
+
+def write_spec_bundle(path: Union[str, Path], rows: Iterable[tuple]) -> None:
+    """
+    写入离线规格包
+
+    rows 为 (型号, device_info_version, 获取时间, 来源哈希, 规格 JSON 文本) 的序列。
+    文件结构为：文件头 | zlib 压缩的 JSON 索引 | 逐个型号 zlib 压缩的规格数据；
+    先写入临时文件再原子替换。
+    """
+    path = Path(path).expanduser()
+    records = []
+    entries = {}
+    offset = 0
+    for model, info_version, fetched_at, source_hash, data in rows:
+        record = zlib.compress(data.encode("utf-8") if isinstance(data, str) else data, 9)
+        entries[model] = [offset, len(record), info_version, fetched_at, source_hash]
+        records.append(record)
+        offset += len(record)
+    index = zlib.compress(jsonutil.dumps({"created_at": time.time(), "models": entries}).encode("utf-8"), 9)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_bundle_header.pack(bundle_magic, bundle_format_version, len(index)))
+            f.write(index)
+            for record in records:
+                f.write(record)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+class SpecBundle():
+    """
+    只读的离线规格包
+
+    由 SpecStore.export_bundle() 生成，包含多个型号的压缩规格及型号索引。打开时只解析索引，
+    文件以 mmap 方式映射，查找某个型号时只解压该型号的记录。可作为 get_device_info 的
+    备用规格来源（bundle 参数 / mijiaAPI 的 spec_bundle_path），在无法访问米家规格平台时使用。
+
+    示例:
+        >>> SpecStore.open("~/.config/mijia-api").export_bundle("specs.bundle")
+        >>> bundle = SpecBundle.open("specs.bundle")
+        >>> info = bundle.get("yeelink.light.lamp4")
+    """
+    _opened: dict[Path, "SpecBundle"] = {}
+    _opened_lock = threading.Lock()
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path).expanduser()
+        with self.path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _bundle_header.size:
+                raise ValueError(f"无效的设备规格包: {self.path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, index_size = _bundle_header.unpack_from(self._mmap, 0)
+        if magic != bundle_magic:
+            self._mmap.close()
+            raise ValueError(f"无效的设备规格包: {self.path}")
+        if format_version != bundle_format_version:
+            self._mmap.close()
+            raise ValueError(f"不支持的设备规格包格式版本: {format_version}, 当前支持: {bundle_format_version}")
+        self.format_version = format_version
+        index_start = _bundle_header.size
+        index = jsonutil.loads(zlib.decompress(self._mmap[index_start:index_start + index_size]))
+        self.created_at: float = index["created_at"]
+        self._index: dict[str, list] = index["models"]
+        self._data_start = index_start + index_size
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "SpecBundle":
+        """按路径返回共享的 SpecBundle。"""
+        path = Path(path).expanduser().resolve()
+        with cls._opened_lock:
+            bundle = cls._opened.get(path)
+            if bundle is None:
+                bundle = cls._opened[path] = cls(path)
+            return bundle
+
+    def get(self, model: str, version: Optional[int] = None) -> Optional[dict]:
+        """返回型号的规格信息，不存在或格式版本与 version 不一致时返回 None。"""
+        entry = self._index.get(model)
+        if entry is None or (version is not None and entry[2] != version):
+            return None
+        start = self._data_start + entry[0]
+        return jsonutil.loads(zlib.decompress(self._mmap[start:start + entry[1]]))
+
+    def metadata(self, model: str) -> Optional[dict]:
+        """返回型号的 model、version、fetched_at、source_hash、size（压缩后字节数），不存在时返回 None。"""
+        entry = self._index.get(model)
+        if entry is None:
+            return None
+        return {"model": model, "version": entry[2], "fetched_at": entry[3], "source_hash": entry[4], "size": entry[1]}
+
+    def models(self) -> list[str]:
+        return sorted(self._index)
+
+    def __contains__(self, model: str) -> bool:
+        return model in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        self._mmap.close()
+        with self._opened_lock:
+            if self._opened.get(self.path.resolve()) is self:
+                del self._opened[self.path.resolve()]
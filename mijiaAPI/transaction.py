@@ -0,0 +1,145 @@
+import inspect
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from .errors import DeviceBatchError, TransactionError
+from .logger import logger
+
+
+# 当前上下文（线程 / asyncio 任务）中生效的写入事务
+_current_transaction: ContextVar[Optional["Transaction"]] = ContextVar("mijia_transaction", default=None)
+
+
+def active_transaction(device: Any) -> Optional["Transaction"]:
+    """返回当前上下文中覆盖该设备的事务，没有则返回 None。"""
+    transaction = _current_transaction.get()
+    while transaction is not None:
+        if transaction.covers(device):
+            return transaction
+        transaction = transaction._parent
+    return None
+
+
+class Transaction():
+    """
+    延迟写入事务
+
+    事务生效期间，mijiaDevice 的 set / set_many / 属性赋值只做校验并加入队列，
+    退出 with 块时合并为一次 set_devices_prop 请求发送；同一设备的同一属性以最后一次写入为准。
+    with 块内抛出异常时丢弃队列，不发送任何请求；发送请求本身失败（网络错误、APIError 等）时
+    队列保留，可再次调用 flush() / aflush() 重试。
+
+    通过 mijiaDevice.batch()（仅该设备）或 mijiaAPI.transaction()（该 api 下的所有设备）创建；
+    使用 AsyncMijiaAPI 时需使用 async with。
+
+    示例:
+        >>> with api.transaction():
+        ...     lamp.on = True
+        ...     lamp.brightness = 60
+        ...     strip.set("color-temperature", 2700)
+    """
+    def __init__(self, api: Any, devices: Optional[list] = None):
+        self.api = api
+        self.dids = None if devices is None else {device.did for device in devices}
+        # {(did, 属性名): (设备, 属性名, 请求参数)}
+        self._queue: dict[tuple[str, str], tuple[Any, str, dict]] = {}
+        self._parent: Optional[Transaction] = None
+        self._token = None
+        # flush 后为 {did: {属性名: 错误码}}
+        self.results: dict[str, dict] = {}
+
+    def covers(self, device: Any) -> bool:
+        return device.api is self.api and (self.dids is None or device.did in self.dids)
+
+    def add(self, device: Any, name: str, method: dict) -> None:
+        key = (device.did, device.prop_list[name].name)
+        self._queue.pop(key, None)
+        self._queue[key] = (device, name, method)
+        logger.debug(f"加入写入队列: {device.name} -> {name}, 值: {method['value']}")
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _take(self) -> tuple[list, list, list]:
+        # 只取快照，请求成功后再由 _sent 移出队列
+        items = list(self._queue.items())
+        entries = [entry for _, entry in items]
+        limits = list(dict.fromkeys(limit for device, _, _ in entries for limit in device._rate_limits()))
+        return items, [method for _, _, method in entries], limits
+
+    def _sent(self, items: list) -> list:
+        # 发送期间被再次写入的属性保留新值，留待下一次 flush
+        for key, entry in items:
+            if self._queue.get(key) is entry:
+                del self._queue[key]
+        return [entry for _, entry in items]
+
+    def _collect(self, entries: list, results: list) -> dict:
+        grouped: dict[str, tuple[Any, dict, list]] = {}
+        for (device, name, method), result in zip(entries, results):
+            _, methods, device_results = grouped.setdefault(device.did, (device, {}, []))
+            methods[name] = method
+            device_results.append(result)
+        errors = {}
+        for did, (device, methods, device_results) in grouped.items():
+            try:
+                self.results[did] = device._map_set_results(methods, device_results)
+            except DeviceBatchError as e:
+                self.results[did] = e.results
+                errors[did] = e
+        if not errors:
+            return self.results
+        if self.dids is not None and len(self.dids) == 1:
+            raise next(iter(errors.values()))
+        raise TransactionError(errors, self.results)
+
+    def flush(self) -> dict:
+        """立即发送队列中的写入，返回 {did: {属性名: 错误码}}。"""
+        items, methods, limits = self._take()
+        if not items:
+            return self.results
+        with self.api.rate_limiter.limit(limits):
+            results = self.api.set_devices_prop(methods)
+        return self._collect(self._sent(items), results)
+
+    async def aflush(self) -> dict:
+        """flush 的异步版本，用于 AsyncMijiaAPI。"""
+        items, methods, limits = self._take()
+        if not items:
+            return self.results
+        async with self.api.rate_limiter.alimit(limits):
+            results = await self.api.set_devices_prop(methods)
+        return self._collect(self._sent(items), results)
+
+    def _enter(self) -> "Transaction":
+        self._parent = _current_transaction.get()
+        self._token = _current_transaction.set(self)
+        return self
+
+    def _exit(self) -> None:
+        _current_transaction.reset(self._token)
+        self._token = None
+
+    def __enter__(self) -> "Transaction":
+        if inspect.iscoroutinefunction(self.api.set_devices_prop):
+            raise TypeError("AsyncMijiaAPI 的事务请使用 async with")
+        return self._enter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._exit()
+        if exc_type is not None:
+            self._queue.clear()
+            return
+        self.flush()
+
+    async def __aenter__(self) -> "Transaction":
+        if not inspect.iscoroutinefunction(self.api.set_devices_prop):
+            raise TypeError("mijiaAPI 的事务请使用 with")
+        return self._enter()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._exit()
+        if exc_type is not None:
+            self._queue.clear()
+            return
+        await self.aflush()
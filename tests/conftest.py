@@ -0,0 +1,282 @@
+import base64
+import copy
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import httpx
+import pytest
+import requests
+from Crypto.Cipher import ARC4
+
+from mijiaAPI import (
+    AsyncMijiaAPI,
+    SpecStore,
+    clear_device_info_cache,
+    mijiaAPI,
+    mijiaDevice,
+    miutils,
+)
+from mijiaAPI.credentials import CredentialStore
+from mijiaAPI.devices import device_info_version, device_url
+
+
+SSECURITY = base64.b64encode(b"0123456789abcdef").decode()
+
+
+def make_auth_data(expire_in: float = 30 * 86400, **extra) -> dict:
+    auth_data = {
+        "ua": "ua",
+        "ssecurity": SSECURITY,
+        "userId": 1,
+        "cUserId": "c",
+        "serviceToken": "token",
+        "deviceId": "device",
+        "pass_o": "pass_o",
+        "expireTime": int((time.time() + expire_in) * 1000),
+    }
+    auth_data.update(extra)
+    return auth_data
+
+
+LAMP_MODEL = "yeelink.light.lamp4"
+LAMP_SPEC = {
+    "version": device_info_version,
+    "name": "台灯",
+    "model": LAMP_MODEL,
+    "properties": [
+        {"name": "on", "description": "开关", "type": "bool", "rw": "rw",
+         "range": None, "value-list": None, "method": {"siid": 2, "piid": 1}},
+        {"name": "brightness", "description": "亮度", "type": "uint", "rw": "rw",
+         "range": [1, 100, 1], "value-list": None, "method": {"siid": 2, "piid": 2}},
+    ],
+    "actions": [
+        {"name": "toggle", "description": "切换", "method": {"siid": 2, "aiid": 1}},
+    ],
+}
+
+
+@pytest.fixture
+def make_api(tmp_path):
+    """构造使用内存认证数据的 mijiaAPI，测试结束时关闭。"""
+    apis = []
+
+    def factory(auth_data=None, **kwargs):
+        store = CredentialStore()
+        store.data = auth_data if auth_data is not None else make_auth_data()
+        kwargs.setdefault("spec_cache_path", tmp_path)
+        api = mijiaAPI(tmp_path / "auth.json", credential_store=store, **kwargs)
+        apis.append(api)
+        return api
+
+    yield factory
+    for api in apis:
+        api.close()
+
+
+class CloudReject(Exception):
+    """在 FakeCloud 的路由中抛出，以 HTTP 状态码 status 或响应中的错误码 code 拒绝请求。"""
+    def __init__(self, status: int = 200, code: int = -1):
+        super().__init__(status, code)
+        self.status = status
+        self.code = code
+
+
+class FakeCloud():
+    """
+    模拟米家云端：解密请求参数后交给 routes[uri](data) 处理，以明文 JSON 返回 {"code": 0, "result": ...}；
+    路由抛出 CloudReject 时返回对应的状态码或错误码。
+
+    calls 按到达顺序记录 (uri, data, Cookie 中的 serviceToken)。encrypt / compress 为 True 时
+    与真实服务器一样返回 RC4 加密（及 gzip 压缩）后的 base64 文本；响应按 chunk_size 字节分块读取。
+    """
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self.delay = 0.0
+        self.encrypt = False
+        self.compress = False
+        self.chunk_size = 7
+        self._lock = threading.Lock()
+
+    def handle(self, uri: str, body: str, cookie: str) -> tuple[int, bytes]:
+        params = {k: v[0] for k, v in parse_qs(body).items()}
+        data = json.loads(miutils.decrypt(params["ssecurity"], params["_nonce"], params["data"]))
+        token = re.search(r"serviceToken=([^;]*)", cookie).group(1)
+        with self._lock:
+            self.calls.append((uri, data, token))
+        if self.delay:
+            time.sleep(self.delay)
+        try:
+            body = json.dumps({"code": 0, "result": self.routes[uri](data)}).encode()
+        except CloudReject as e:
+            if e.status != 200:
+                return e.status, b"rejected"
+            return 200, json.dumps({"code": e.code, "message": "rejected"}).encode()
+        if not self.encrypt:
+            return 200, body
+        if self.compress:
+            body = gzip.compress(body)
+        key = hashlib.sha256(base64.b64decode(params["ssecurity"]) + base64.b64decode(params["_nonce"])).digest()
+        cipher = ARC4.new(key)
+        cipher.encrypt(bytes(1024))
+        return 200, base64.b64encode(cipher.encrypt(body))
+
+    def uris(self) -> list:
+        return [call[0] for call in self.calls]
+
+    def transport(self) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            uri = request.url.path[len("/app"):]
+            status, content = self.handle(uri, request.content.decode(), request.headers["Cookie"])
+            return httpx.Response(status, content=content)
+        return httpx.MockTransport(handler)
+
+
+class _Response():
+    def __init__(self, content: bytes, chunk_size: int, status_code: int = 200, headers: Optional[dict] = None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._chunk_size = chunk_size
+
+    def iter_content(self, chunk_size: int = 1):
+        step = min(chunk_size, self._chunk_size)
+        for i in range(0, len(self.content), step):
+            yield self.content[i:i + step]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+@pytest.fixture
+def cloud(monkeypatch):
+    fake = FakeCloud()
+
+    def post(session, url, data=None, **kwargs):
+        uri = urlparse(url).path[len("/app"):]
+        status, content = fake.handle(uri, urlencode(data), session.headers["Cookie"])
+        return _Response(content, fake.chunk_size, status)
+
+    monkeypatch.setattr(requests.Session, "post", post)
+    return fake
+
+
+class FakeRequests():
+    """
+    替代 mijiaAPI._request：按 uri 交给 routes[uri](data) 处理，不经过加解密与网络。
+
+    calls 按调用顺序记录 (uri, data 的拷贝)。
+    """
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, uri: str, data: dict, refresh_token: bool = True):
+        with self._lock:
+            self.calls.append((uri, copy.deepcopy(data)))
+        return self.routes[uri](data)
+
+    def count(self, uri: str) -> int:
+        return sum(1 for call in self.calls if call[0] == uri)
+
+
+@pytest.fixture
+def fake_request(monkeypatch):
+    """返回 install(api)，将 api._request 替换为 FakeRequests 并返回该实例。"""
+    def install(api: mijiaAPI) -> FakeRequests:
+        fake = FakeRequests()
+        monkeypatch.setattr(api, "_request", fake)
+        return fake
+    return install
+
+
+def make_lamp(api: mijiaAPI, did: str = "lamp1", **kwargs) -> mijiaDevice:
+    """使用本地缓存的规格创建台灯设备，不请求设备列表与规格平台。"""
+    store = SpecStore.open(api.spec_cache_path)
+    if LAMP_MODEL not in store:
+        store.put(LAMP_MODEL, LAMP_SPEC)
+    return mijiaDevice(api, device={"did": did, "model": LAMP_MODEL, "name": did}, **kwargs)
+
+
+def make_async_api(api, cloud: FakeCloud, **kwargs) -> AsyncMijiaAPI:
+    async_api = AsyncMijiaAPI(api=api, **kwargs)
+    async_api._client = httpx.AsyncClient(transport=cloud.transport())
+    return async_api
+
+
+def make_spec_page(model: str, name: str = "台灯") -> bytes:
+    """生成米家规格平台的设备页面，data-page 脚本中的数据可被 _parse_spec_page 解析。"""
+    data = {
+        "props": {
+            "product": {"name": name, "model": model},
+            "i18n": {"zh_cn": {"service:002:property:001": "开关"}},
+            "tree": {"services": [{
+                "iid": 2,
+                "properties": [
+                    {"iid": 1, "type": "on", "description": "Switch Status", "format": "bool",
+                     "access": ["read", "write", "notify"]},
+                    {"iid": 2, "type": "brightness", "description": "Brightness", "format": "uint8",
+                     "access": ["read", "write"], "valueRange": [1, 100, 1]},
+                ],
+                "actions": [{"iid": 1, "type": "toggle", "description": "Toggle"}],
+            }]},
+        },
+    }
+    return (
+        '<!DOCTYPE html><html><head><title>{}</title></head><body><div id="app"></div>'
+        '<script data-page="app" type="application/json">{}</script>'
+        '<script src="/static/app.js"></script></body></html>'
+    ).format(name, json.dumps(data, ensure_ascii=False)).encode("utf-8")
+
+
+class FakeSpecSite():
+    """
+    模拟米家规格平台的设备页面：pages 为 {型号: 页面}，未收录的型号返回 404。
+
+    页面的 ETag 为 "<型号>-<revision>"，请求的 If-None-Match 与之相同时返回 304。
+    requests 按请求顺序记录 (型号, 请求头)；chunk_size 控制 iter_content 每块的最大字节数。
+    """
+    def __init__(self):
+        self.pages = {}
+        self.revision = 1
+        self.chunk_size = 1 << 20
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def etag(self, model: str) -> str:
+        return f'"{model}-{self.revision}"'
+
+    def count(self, model: str) -> int:
+        return sum(1 for request in self.requests if request[0] == model)
+
+    def get(self, url: str, headers: Optional[dict] = None, **kwargs) -> _Response:
+        model = url[len(device_url):]
+        headers = dict(headers or {})
+        with self._lock:
+            self.requests.append((model, headers))
+        if model not in self.pages:
+            return _Response(b"not found", self.chunk_size, 404)
+        etag = self.etag(model)
+        if headers.get("If-None-Match") == etag:
+            return _Response(b"", self.chunk_size, 304, {"ETag": etag})
+        return _Response(self.pages[model], self.chunk_size, 200, {"ETag": etag})
+
+
+@pytest.fixture
+def spec_site(monkeypatch):
+    """替换 requests.get 为 FakeSpecSite，并清空进程内的设备信息缓存。"""
+    site = FakeSpecSite()
+    monkeypatch.setattr(requests, "get", site.get)
+    clear_device_info_cache()
+    yield site
+    clear_device_info_cache()
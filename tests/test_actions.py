@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+from conftest import CloudReject, make_async_api
+
+from mijiaAPI import APIError, PartialFailureError
+
+
+ACTION_URI = "/miotspec/action"
+STATISTICS_URI = "/v2/user/statistics"
+ACTIONS = [{"did": f"lamp{i}", "siid": 2, "aiid": 1} for i in range(4)]
+
+
+def action_route(fail=(), error=lambda: APIError(-1, "执行失败")):
+    def route(data):
+        if data["params"]["did"] in fail:
+            raise error()
+        # 第一项最晚完成，结果仍按输入顺序返回
+        time.sleep(0.05 if data["params"]["did"] == "lamp0" else 0)
+        return dict(data["params"], code=0)
+    return route
+
+
+@pytest.fixture
+def api(make_api, fake_request):
+    api = make_api()
+    api.fake = fake_request(api)
+    return api
+
+
+def test_run_action_list_keeps_input_order(api):
+    api.fake.routes[ACTION_URI] = action_route()
+    result = api.run_action(ACTIONS)
+    assert [ret["did"] for ret in result] == ["lamp0", "lamp1", "lamp2", "lamp3"]
+    assert all(ret["message"] == "成功" for ret in result)
+
+
+def test_fail_fast_false_collects_errors(api):
+    api.fake.routes[ACTION_URI] = action_route(fail=("lamp1", "lamp3"))
+    with pytest.raises(PartialFailureError) as exc_info:
+        api.run_action(ACTIONS, fail_fast=False)
+    error = exc_info.value
+    # 失败后其余请求照常发送
+    assert api.fake.count(ACTION_URI) == 4
+    assert [ret and ret["did"] for ret in error.results] == ["lamp0", None, "lamp2", None]
+    assert error.results[0]["message"] == "成功"
+    assert sorted(error.errors) == [1, 3]
+    assert all(isinstance(e, APIError) for e in error.errors.values())
+
+
+def test_fail_fast_raises_first_error(api):
+    api.fake.routes[ACTION_URI] = action_route(fail=("lamp1",))
+    with pytest.raises(APIError) as exc_info:
+        api.run_action(ACTIONS)
+    assert not isinstance(exc_info.value, PartialFailureError)
+
+
+def test_statistics_fail_fast_false(api):
+    def route(data):
+        if data["did"] == "bad":
+            raise APIError(-1, "查询失败")
+        return [{"time": 0, "value": data["did"]}]
+
+    api.fake.routes[STATISTICS_URI] = route
+    queries = [{"did": did, "key": "7.1", "data_type": "stat_month_v3", "limit": 1, "time_start": 0, "time_end": 1}
+               for did in ("a", "bad", "c")]
+    with pytest.raises(PartialFailureError) as exc_info:
+        api.get_statistics(queries, fail_fast=False)
+    assert exc_info.value.results == [[{"time": 0, "value": "a"}], None, [{"time": 0, "value": "c"}]]
+    assert list(exc_info.value.errors) == [1]
+
+
+def test_async_fail_fast_false_collects_errors(api, cloud):
+    cloud.routes[ACTION_URI] = action_route(fail=("lamp2",), error=lambda: CloudReject(code=-1))
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            return await async_api.run_action(ACTIONS, fail_fast=False)
+
+    with pytest.raises(PartialFailureError) as exc_info:
+        asyncio.run(main())
+    assert len(cloud.calls) == 4
+    assert [ret and ret["did"] for ret in exc_info.value.results] == ["lamp0", "lamp1", None, "lamp3"]
+    assert list(exc_info.value.errors) == [2]
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from conftest import CloudReject, make_async_api, make_auth_data
+
+from mijiaAPI import APIError, AsyncMijiaAPI, LoginError, apis, mijiaAPI
+
+
+HOMES_URI = "/v2/homeroom/gethome_merged"
+CHECK_NEW_MSG = "/v2/message/v2/check_new_msg"
+
+
+def test_request_without_credentials_raises_login_error(tmp_path):
+    with mijiaAPI(tmp_path / "auth.json") as api:
+        assert not api.has_credentials
+        with pytest.raises(LoginError):
+            api.get_homes_list()
+
+
+def test_request_with_incomplete_credentials_tries_refresh(make_api, monkeypatch):
+    api = make_api({"passToken": "pass", "userId": 1, "cUserId": "c"})
+    calls = []
+
+    def fake_get_location():
+        calls.append(True)
+        return {"code": -1}
+
+    monkeypatch.setattr(api, "_get_location", fake_get_location)
+    with pytest.raises(LoginError):
+        api.get_homes_list()
+    assert calls == [True]
+
+
+def test_async_request_without_credentials_raises_login_error(tmp_path):
+    async def main():
+        async with AsyncMijiaAPI(tmp_path / "auth.json") as api:
+            await api.get_homes_list()
+
+    with pytest.raises(LoginError):
+        asyncio.run(main())
+
+
+def test_expired_token_is_not_refreshed_in_background(make_api):
+    api = make_api(make_auth_data(expire_in=-60))
+    assert api._refresh_timer is None
+
+
+def test_close_cancels_refresh_timer(make_api):
+    api = make_api()
+    timer = api._refresh_timer
+    assert timer is not None and timer.is_alive()
+    api.close()
+    timer.join(1)
+    assert not timer.is_alive()
+    assert api._refresh_timer is None
+
+
+@pytest.mark.parametrize("encrypt, compress", [(False, False), (True, False), (True, True)])
+def test_streamed_responses_are_decoded(make_api, cloud, encrypt, compress):
+    homes = [{"id": str(i), "name": f"家{i}", "uid": 1, "roomlist": []} for i in range(200)]
+    cloud.routes["/v2/homeroom/gethome_merged"] = lambda data: {"homelist": homes}
+    cloud.encrypt, cloud.compress = encrypt, compress
+    api = make_api()
+    assert api.get_homes_list() == homes
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            return await async_api.get_homes_list(refresh=True)
+
+    assert asyncio.run(main()) == homes
+
+
+def reject_once(reject, result):
+    replies = [reject]
+
+    def route(data):
+        if replies:
+            raise replies.pop()
+        return result
+    return route
+
+
+def refresh_ok(calls):
+    def fake_get_location():
+        calls.append(True)
+        return {"code": 0, "message": "刷新Token成功"}
+    return fake_get_location
+
+
+@pytest.mark.parametrize("reject", [CloudReject(status=401), CloudReject(status=403), CloudReject(code=-10020)])
+def test_reactive_policy_refreshes_once_and_retries(make_api, cloud, monkeypatch, reject):
+    cloud.routes[HOMES_URI] = reject_once(reject, {"homelist": []})
+    api = make_api()
+    refreshes = []
+    monkeypatch.setattr(api, "_get_location", refresh_ok(refreshes))
+
+    assert api.get_homes_list() == []
+    assert refreshes == [True]
+    assert cloud.uris() == [HOMES_URI] * 2
+
+
+@pytest.mark.parametrize("reject", [CloudReject(status=403), CloudReject(code=-10020)])
+def test_reactive_policy_does_not_loop_on_second_rejection(make_api, cloud, monkeypatch, reject):
+    def always_reject(data):
+        raise reject
+
+    cloud.routes[HOMES_URI] = always_reject
+    api = make_api()
+    refreshes = []
+    monkeypatch.setattr(api, "_get_location", refresh_ok(refreshes))
+
+    with pytest.raises(APIError) as exc_info:
+        api.get_homes_list()
+    assert exc_info.value.code in (403, -10020)
+    assert refreshes == [True]
+    assert cloud.uris() == [HOMES_URI] * 2
+
+
+def test_async_reactive_policy_refreshes_once_and_retries(make_api, cloud, monkeypatch):
+    cloud.routes[HOMES_URI] = reject_once(CloudReject(status=403), {"homelist": []})
+    api = make_api()
+    refreshes = []
+    monkeypatch.setattr(api, "_get_location", refresh_ok(refreshes))
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            return await async_api.get_homes_list(refresh=True)
+
+    assert asyncio.run(main()) == []
+    assert refreshes == [True]
+    assert cloud.uris() == [HOMES_URI] * 2
+
+
+def reject_until_refreshed(threads):
+    """所有线程都带着旧 Token 到达后一起拒绝，刷新成功后放行。"""
+    barrier = threading.Barrier(threads)
+    state = {"refreshed": False}
+
+    def route(data):
+        if state["refreshed"]:
+            return {}
+        barrier.wait(timeout=5)
+        raise CloudReject(status=401)
+    return route, state
+
+
+def run_threads(func, count):
+    results = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = func(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_auth_failures_refresh_once(make_api, cloud, monkeypatch):
+    route, state = reject_until_refreshed(4)
+    cloud.routes[CHECK_NEW_MSG] = route
+    api = make_api()
+    refreshes = []
+
+    def slow_refresh():
+        refreshes.append(True)
+        time.sleep(0.1)
+        state["refreshed"] = True
+        return {"code": 0, "message": "刷新Token成功"}
+
+    monkeypatch.setattr(api, "_get_location", slow_refresh)
+    results = run_threads(lambda i: api.check_new_msg(begin_at=i), 4)
+
+    assert results == [{}] * 4
+    assert refreshes == [True]
+    assert len(cloud.calls) == 8
+
+
+def test_failed_refresh_cooldown_fails_other_waiters_fast(make_api, cloud, monkeypatch):
+    route, _ = reject_until_refreshed(4)
+    cloud.routes[CHECK_NEW_MSG] = route
+    api = make_api()
+    refreshes = []
+
+    def failed_refresh():
+        refreshes.append(True)
+        time.sleep(0.1)
+        return {"code": -1}
+
+    monkeypatch.setattr(api, "_get_location", failed_refresh)
+    results = run_threads(lambda i: api.check_new_msg(begin_at=i), 4)
+
+    assert all(isinstance(result, LoginError) for result in results)
+    assert refreshes == [True]
+    # 只有首个请求被拒绝后才刷新，其余线程在冷却期内直接失败，不重试请求
+    assert len(cloud.calls) == 4
+
+    # 冷却期过后再次被拒绝时会重新尝试刷新
+    monkeypatch.setattr(apis, "REFRESH_FAILURE_COOLDOWN", 0)
+    cloud.routes[CHECK_NEW_MSG] = reject_once(CloudReject(status=401), {})
+    with pytest.raises(LoginError):
+        api.check_new_msg(begin_at=10)
+    assert refreshes == [True, True]
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from conftest import make_async_api
+
+
+PROP_GET = "/miotspec/prop/get"
+
+
+def prop_get(data):
+    # 第一批最晚返回，拼接结果时不能依赖完成顺序
+    if data["params"][0]["piid"] == 0:
+        time.sleep(0.05)
+    return [dict(p, code=0, value=p["piid"] * 10) for p in data["params"]]
+
+
+def test_get_devices_prop_splits_batches_in_order(make_api, cloud):
+    cloud.routes[PROP_GET] = prop_get
+    api = make_api(max_batch_size=3)
+    params = [{"did": "lamp1", "siid": 2, "piid": piid} for piid in range(8)]
+
+    result = api.get_devices_prop(params)
+
+    assert [r["value"] for r in result] == [piid * 10 for piid in range(8)]
+    sizes = sorted(len(data["params"]) for uri, data, _ in cloud.calls)
+    assert cloud.uris() == [PROP_GET] * 3 and sizes == [2, 3, 3]
+
+
+def test_async_get_devices_prop_splits_batches_in_order(make_api, cloud):
+    cloud.routes[PROP_GET] = prop_get
+    api = make_api(max_batch_size=3)
+    params = [{"did": "lamp1", "siid": 2, "piid": piid} for piid in range(8)]
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            return await async_api.get_devices_prop(params)
+
+    assert [r["value"] for r in asyncio.run(main())] == [piid * 10 for piid in range(8)]
+    assert cloud.uris() == [PROP_GET] * 3
+
+
+def test_small_batch_is_not_split(make_api, cloud):
+    cloud.routes[PROP_GET] = prop_get
+    api = make_api(max_batch_size=3)
+    api.get_devices_prop([{"did": "lamp1", "siid": 2, "piid": piid} for piid in (1, 2, 3)])
+    assert len(cloud.calls) == 1
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mijiaAPI import coalescer
+from mijiaAPI.coalescer import AsyncPropCoalescer, PropCoalescer
+
+
+def echo_send(calls):
+    def send(items):
+        calls.append(list(items))
+        return [dict(item, value=item["piid"] * 10) for item in items]
+    return send
+
+
+def submit_all(coalescer_, items):
+    results = [None] * len(items)
+
+    def run(i):
+        results[i] = coalescer_.submit(items[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_requests_within_window_share_one_batch():
+    calls = []
+    prop_coalescer = PropCoalescer(echo_send(calls), window=0.2)
+    items = [{"did": "1", "siid": 2, "piid": i} for i in range(1, 6)]
+    results = submit_all(prop_coalescer, items)
+    assert len(calls) == 1
+    assert sorted(item["piid"] for item in calls[0]) == [1, 2, 3, 4, 5]
+    assert [result["value"] for result in results] == [10, 20, 30, 40, 50]
+    assert prop_coalescer.stats.snapshot()["sizes"] == {5: 1}
+
+
+def test_full_batch_is_sent_without_waiting_for_window():
+    calls = []
+    prop_coalescer = PropCoalescer(echo_send(calls), window=10, max_size=2)
+    start = time.monotonic()
+    submit_all(prop_coalescer, [{"did": "1", "siid": 2, "piid": i} for i in (1, 2)])
+    assert time.monotonic() - start < 5
+    assert len(calls) == 1
+
+
+def test_batch_error_reaches_every_caller():
+    def send(items):
+        raise ValueError("boom")
+
+    prop_coalescer = PropCoalescer(send, window=0.1)
+    errors = []
+
+    def run():
+        try:
+            prop_coalescer.submit({"did": "1", "siid": 2, "piid": 1})
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+
+
+def test_interrupted_leader_fails_followers(monkeypatch):
+    calls = []
+    prop_coalescer = PropCoalescer(echo_send(calls), window=10)
+
+    class InterruptedEvent(threading.Event):
+        def wait(self, timeout=None):
+            # 等到跟随者加入批次后模拟发送方被中断
+            while len(prop_coalescer._batch[0]) < 2:
+                time.sleep(0.01)
+            raise KeyboardInterrupt
+
+    # 只替换 coalescer 模块看到的 threading，Thread 等内部使用的 Event 不受影响
+    monkeypatch.setattr(coalescer, "threading", SimpleNamespace(Event=InterruptedEvent, Lock=threading.Lock))
+    outcomes = {}
+
+    def run(name, piid):
+        try:
+            outcomes[name] = prop_coalescer.submit({"did": "1", "siid": 2, "piid": piid})
+        except BaseException as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=run, args=("leader", 1))
+    leader.start()
+    while prop_coalescer._batch is None:
+        time.sleep(0.01)
+    follower = threading.Thread(target=run, args=("follower", 2))
+    follower.start()
+    leader.join(5)
+    follower.join(5)
+    assert not follower.is_alive()
+    assert isinstance(outcomes["leader"], KeyboardInterrupt)
+    assert isinstance(outcomes["follower"], RuntimeError)
+    assert prop_coalescer._batch is None
+    assert calls == []
+
+    monkeypatch.setattr(coalescer, "threading", threading)
+    prop_coalescer.window = 0
+    assert prop_coalescer.submit({"did": "1", "siid": 2, "piid": 3})["value"] == 30
+
+
+def test_async_requests_within_window_share_one_batch():
+    calls = []
+
+    async def send(items):
+        return echo_send(calls)(items)
+
+    async def main():
+        async_coalescer = AsyncPropCoalescer(send, window=0.05)
+        return await asyncio.gather(*(async_coalescer.submit({"did": "1", "siid": 2, "piid": i}) for i in (1, 2, 3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [result["value"] for result in results] == [10, 20, 30]
+
+
+@pytest.mark.parametrize("cancel_during", ["window", "send"])
+def test_async_cancelled_flush_cancels_callers(cancel_during):
+    sending = None
+
+    async def send(items):
+        sending.set()
+        await asyncio.Event().wait()
+
+    async def main():
+        nonlocal sending
+        sending = asyncio.Event()
+        async_coalescer = AsyncPropCoalescer(send, window=0 if cancel_during == "send" else 10)
+        callers = [asyncio.ensure_future(async_coalescer.submit({"did": "1", "siid": 2, "piid": i})) for i in (1, 2)]
+        if cancel_during == "send":
+            await sending.wait()
+        else:
+            await asyncio.sleep(0)
+        for task in list(async_coalescer._tasks):
+            task.cancel()
+        outcomes = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 5)
+        return outcomes, async_coalescer._batch
+
+    outcomes, batch = asyncio.run(main())
+    assert all(isinstance(outcome, asyncio.CancelledError) for outcome in outcomes)
+    assert batch is None
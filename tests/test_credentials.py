@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+from conftest import make_async_api, make_auth_data
+
+from mijiaAPI import FileCredentialStore, mijiaAPI
+
+
+CHECK_NEW_MSG = "/v2/message/v2/check_new_msg"
+
+
+def open_store(path):
+    store = FileCredentialStore(path, check_interval=0)
+    store.load()
+    return store
+
+
+@pytest.fixture
+def shared_auth(tmp_path):
+    path = tmp_path / "auth.json"
+    path.write_text(json.dumps(make_auth_data(serviceToken="old")), encoding="utf-8")
+    return path
+
+
+def update_token_from_other_process(path, token):
+    other = FileCredentialStore(path)
+    other.load()
+    other.data["serviceToken"] = token
+    other.save()
+    # 保证 mtime 与之前不同，不受文件系统时间精度影响
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_file_store_round_trip(shared_auth):
+    store = FileCredentialStore(shared_auth)
+    store.load()
+    store.data["serviceToken"] = "new"
+    store.save()
+    reloaded = FileCredentialStore(shared_auth)
+    assert reloaded.load()["serviceToken"] == "new"
+    assert not list(shared_auth.parent.glob("*.tmp"))
+
+
+def test_sync_request_uses_token_written_by_other_process(shared_auth, cloud):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {}
+    with mijiaAPI(shared_auth, credential_store=open_store(shared_auth)) as api:
+        api.check_new_msg()
+        update_token_from_other_process(shared_auth, "new")
+        api.check_new_msg()
+    assert [call[2] for call in cloud.calls] == ["old", "new"]
+
+
+def test_async_request_uses_token_written_by_other_process(shared_auth, cloud):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {}
+
+    async def main():
+        api = mijiaAPI(shared_auth, credential_store=open_store(shared_auth))
+        async with make_async_api(api, cloud) as async_api:
+            await async_api.check_new_msg()
+            update_token_from_other_process(shared_auth, "new")
+            await async_api.check_new_msg()
+        api.close()
+
+    asyncio.run(main())
+    assert [call[2] for call in cloud.calls] == ["old", "new"]
+
+
+def test_async_credential_check_does_not_block_event_loop(shared_auth, cloud, monkeypatch):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {}
+    store = FileCredentialStore(shared_auth, check_interval=3600)
+    store.load()
+    api = mijiaAPI(shared_auth, credential_store=store)
+    checked_in = []
+    sync_credentials = api._sync_credentials
+
+    def record():
+        checked_in.append(threading.get_ident())
+        return sync_credentials()
+
+    monkeypatch.setattr(api, "_sync_credentials", record)
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            # 检查间隔内不访问认证文件
+            for begin_at in range(3):
+                await async_api.check_new_msg(begin_at=begin_at)
+            assert checked_in == []
+            store._last_check = 0.0
+            await async_api.check_new_msg(begin_at=3)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    api.close()
+    assert len(checked_in) == 1 and checked_in[0] != loop_thread
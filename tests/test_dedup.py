@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from conftest import make_async_api
+
+
+CHECK_NEW_MSG = "/v2/message/v2/check_new_msg"
+
+
+def test_concurrent_identical_reads_are_sent_once(make_api, cloud):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {"new": 1}
+    cloud.delay = 0.2
+    api = make_api()
+    results = []
+
+    def worker():
+        results.append(api.check_new_msg(begin_at=100))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"new": 1}] * 4
+    assert len(cloud.calls) == 1
+    # 每个调用方拿到各自的拷贝
+    assert len({id(result) for result in results}) == 4
+
+
+def test_different_reads_are_not_merged(make_api, cloud):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {"begin_at": data["begin_at"]}
+    api = make_api()
+    assert api.check_new_msg(begin_at=1) == {"begin_at": 1}
+    assert api.check_new_msg(begin_at=2) == {"begin_at": 2}
+    assert len(cloud.calls) == 2
+
+
+def test_dedup_can_be_disabled(make_api, cloud):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {}
+    cloud.delay = 0.1
+    api = make_api(dedup_reads=False)
+    threads = [threading.Thread(target=api.check_new_msg, kwargs={"begin_at": 100}) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cloud.calls) == 3
+
+
+def test_async_concurrent_identical_reads_are_sent_once(make_api, cloud):
+    cloud.routes[CHECK_NEW_MSG] = lambda data: {"new": 1}
+    api = make_api()
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            return await asyncio.gather(*(async_api.check_new_msg(begin_at=100) for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert results == [{"new": 1}] * 4
+    assert len(cloud.calls) == 1
+    assert len({id(result) for result in results}) == 4
@@ -0,0 +1,69 @@
+import pytest
+from conftest import make_lamp
+
+from mijiaAPI import DeviceBatchError
+
+
+PROP_GET = "/miotspec/prop/get"
+PROP_SET = "/miotspec/prop/set"
+
+
+@pytest.fixture
+def lamp(make_api, fake_request):
+    api = make_api()
+    api.fake = fake_request(api)
+    api.codes = {}
+    api.state = {1: True, 2: 50}
+
+    def prop_get(data):
+        return [dict(p, code=api.codes.get(p["piid"], 0), value=api.state[p["piid"]]) for p in data["params"]]
+
+    def prop_set(data):
+        return [dict(p, code=api.codes.get(p["piid"], 0)) for p in data["params"]]
+
+    api.fake.routes[PROP_GET] = prop_get
+    api.fake.routes[PROP_SET] = prop_set
+    return make_lamp(api, sleep_time=0)
+
+
+def test_get_many_sends_one_request(lamp):
+    assert lamp.get_many(["brightness", "on"]) == {"brightness": 50, "on": True}
+    assert lamp.api.fake.count(PROP_GET) == 1
+    uri, data = lamp.api.fake.calls[0]
+    assert [p["piid"] for p in data["params"]] == [2, 1]
+    assert {p["did"] for p in data["params"]} == {"lamp1"}
+
+
+def test_get_many_maps_item_errors(lamp):
+    lamp.api.codes[2] = -704030013
+    with pytest.raises(DeviceBatchError) as exc_info:
+        lamp.get_many(["on", "brightness"])
+    assert exc_info.value.errors == {"brightness": -704030013}
+    assert exc_info.value.results == {"on": True}
+
+
+def test_set_many_maps_item_codes(lamp):
+    assert lamp.set_many({"on": False, "brightness": 80}) == {"on": 0, "brightness": 0}
+    uri, data = lamp.api.fake.calls[0]
+    assert uri == PROP_SET and [(p["piid"], p["value"]) for p in data["params"]] == [(1, False), (2, 80)]
+
+    # 1 表示网关已接收指令，不视为失败
+    lamp.api.codes.update({1: 1, 2: -704030023})
+    with pytest.raises(DeviceBatchError) as exc_info:
+        lamp.set_many({"on": True, "brightness": 10})
+    assert exc_info.value.errors == {"brightness": -704030023}
+    assert exc_info.value.results == {"on": 1, "brightness": -704030023}
+
+
+def test_values_are_validated_before_sending(lamp):
+    with pytest.raises(ValueError):
+        lamp.set_many({"on": True, "brightness": 1000})
+    with pytest.raises(ValueError):
+        lamp.get_many(["on", "missing"])
+    assert lamp.api.fake.calls == []
+    assert lamp.set_many({}) == {}
+
+
+def test_get_all_reads_every_readable_property(lamp):
+    assert lamp.get_all() == {"on": True, "brightness": 50}
+    assert lamp.api.fake.count(PROP_GET) == 1
@@ -0,0 +1,108 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from conftest import make_lamp
+
+from mijiaAPI import DeviceSetError, devices
+
+
+PROP_GET = "/miotspec/prop/get"
+PROP_SET = "/miotspec/prop/set"
+
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(devices, "time", SimpleNamespace(**{**vars(time), "monotonic": clock}))
+    return clock
+
+
+@pytest.fixture
+def api(make_api, fake_request):
+    api = make_api()
+    api.fake = fake_request(api)
+    api.state = {1: True, 2: 50}
+    api.set_code = 0
+
+    def prop_get(data):
+        return [dict(p, code=0, value=api.state[p["piid"]]) for p in data["params"]]
+
+    def prop_set(data):
+        if api.set_code == 0:
+            for p in data["params"]:
+                api.state[p["piid"]] = p["value"]
+        return [dict(p, code=api.set_code) for p in data["params"]]
+
+    api.fake.routes[PROP_GET] = prop_get
+    api.fake.routes[PROP_SET] = prop_set
+    return api
+
+
+def test_cache_hit_miss_and_expiry(api, clock):
+    lamp = make_lamp(api, sleep_time=0, cache_ttl=10)
+    assert lamp.brightness == 50
+    api.state[2] = 60
+    clock.now += 9
+    assert lamp.brightness == 50
+    assert api.fake.count(PROP_GET) == 1
+    clock.now += 2
+    assert lamp.brightness == 60
+    assert api.fake.count(PROP_GET) == 2
+    assert lamp.cache_stats() == {"hits": 1, "misses": 2, "size": 1}
+
+
+def test_no_cache_by_default(api, clock):
+    lamp = make_lamp(api, sleep_time=0)
+    lamp.get("on")
+    lamp.get("on")
+    assert api.fake.count(PROP_GET) == 2
+    assert lamp.cache_stats()["size"] == 0
+
+
+def test_prop_ttl_overrides_default(api, clock):
+    lamp = make_lamp(api, sleep_time=0, cache_ttl=10, prop_ttl={"brightness": 0})
+    assert lamp.get_many(["on", "brightness"]) == {"on": True, "brightness": 50}
+    # on 命中缓存，只重新获取不缓存的 brightness
+    lamp.get_many(["on", "brightness"])
+    uri, data = api.fake.calls[-1]
+    assert [p["piid"] for p in data["params"]] == [2]
+
+
+def test_set_writes_through(api, clock):
+    lamp = make_lamp(api, sleep_time=0, cache_ttl=10)
+    lamp.brightness = 70
+    assert lamp.brightness == 70
+    lamp.set_many({"on": False})
+    assert lamp.on is False
+    assert api.fake.count(PROP_GET) == 0
+
+
+def test_failed_set_invalidates(api, clock):
+    lamp = make_lamp(api, sleep_time=0, cache_ttl=10)
+    assert lamp.brightness == 50
+    api.set_code = -704030023
+    with pytest.raises(DeviceSetError):
+        lamp.brightness = 70
+    assert lamp.brightness == 50
+    assert api.fake.count(PROP_GET) == 2
+
+
+def test_refresh_and_invalidate_bypass_cache(api, clock):
+    lamp = make_lamp(api, sleep_time=0, cache_ttl=10)
+    lamp.get_all()
+    api.state[2] = 90
+    assert lamp.refresh(["brightness"]) == {"brightness": 90}
+    assert lamp.brightness == 90
+    lamp.invalidate()
+    assert lamp.cache_stats()["size"] == 0
+    lamp.get("on")
+    assert api.fake.count(PROP_GET) == 3
@@ -0,0 +1,61 @@
+import pytest
+from conftest import LAMP_MODEL, LAMP_SPEC
+
+from mijiaAPI import SpecStore, clear_device_info_cache, get_device_info
+from mijiaAPI.devices import _device_info_cache
+
+
+def test_lru_hit_populates_requested_store(tmp_path):
+    clear_device_info_cache()
+    _device_info_cache.put(LAMP_MODEL, LAMP_SPEC)
+    assert get_device_info(LAMP_MODEL) is LAMP_SPEC
+    store = SpecStore.open(tmp_path)
+    assert LAMP_MODEL not in store
+    assert get_device_info(LAMP_MODEL, cache_path=tmp_path) is LAMP_SPEC
+    assert store.get(LAMP_MODEL) == LAMP_SPEC
+    clear_device_info_cache()
+
+
+def test_store_hit_fills_lru(tmp_path):
+    clear_device_info_cache()
+    SpecStore.open(tmp_path).put(LAMP_MODEL, LAMP_SPEC)
+    first = get_device_info(LAMP_MODEL, cache_path=tmp_path)
+    assert first == LAMP_SPEC
+    assert get_device_info(LAMP_MODEL) is first
+    clear_device_info_cache()
+
+
+def test_repeated_lru_hits_do_not_open_store(tmp_path, monkeypatch):
+    clear_device_info_cache()
+    _device_info_cache.put(LAMP_MODEL, LAMP_SPEC)
+    assert get_device_info(LAMP_MODEL, cache_path=tmp_path) is LAMP_SPEC
+    assert SpecStore.open(tmp_path).get(LAMP_MODEL) == LAMP_SPEC
+
+    def fail(*args, **kwargs):
+        raise AssertionError("命中进程内缓存后不应再打开缓存库")
+
+    monkeypatch.setattr(SpecStore, "open", fail)
+    monkeypatch.setattr(SpecStore, "validators", fail)
+    assert get_device_info(LAMP_MODEL, cache_path=tmp_path) is LAMP_SPEC
+    assert get_device_info(LAMP_MODEL, cache_path=str(tmp_path)) is LAMP_SPEC
+    monkeypatch.undo()
+
+    # 清除缓存后重新记录
+    other = tmp_path / "other"
+    clear_device_info_cache()
+    _device_info_cache.put(LAMP_MODEL, LAMP_SPEC)
+    get_device_info(LAMP_MODEL, cache_path=other)
+    assert SpecStore.open(other).get(LAMP_MODEL) == LAMP_SPEC
+    clear_device_info_cache()
+
+
+def test_cli_get_device_info_uses_auth_dir_store(tmp_path, monkeypatch, capsys):
+    pytest.importorskip("fastmcp")
+    from mijiaAPI.__main__ import main
+
+    clear_device_info_cache()
+    SpecStore.open(tmp_path).put(LAMP_MODEL, LAMP_SPEC)
+    monkeypatch.setattr("mijiaAPI.devices.requests.get", None)
+    main(["-p", str(tmp_path / "auth.json"), "--get_device_info", LAMP_MODEL])
+    assert LAMP_SPEC["name"] in capsys.readouterr().out
+    clear_device_info_cache()
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+from conftest import CloudReject, make_async_api
+
+from mijiaAPI import APIError, PartialFailureError
+
+
+HOMES_URI = "/v2/homeroom/gethome_merged"
+DEVICES_URI = "/home/home_device_list"
+SHARED_URI = "/v2/home/device_list_page"
+SCENES_URI = "/appgateway/miot/appsceneservice/AppSceneService/GetSimpleSceneList"
+HOMES = [{"id": str(i), "uid": i * 100, "name": f"家{i}", "roomlist": []} for i in (1, 2, 3)]
+
+
+def devices_route(fail=(), error=lambda: APIError(-1, "获取失败")):
+    def route(data):
+        home_id = str(data["home_id"])
+        if home_id in fail:
+            raise error()
+        # 第一个家庭最晚返回，合并结果时不能依赖完成顺序
+        time.sleep(0.05 if home_id == "1" else 0)
+        devices = [{"did": f"{home_id}-{i}", "name": f"设备{i}"} for i in range(2)]
+        return {"device_info": devices, "max_did": "", "has_more": False}
+    return route
+
+
+@pytest.fixture
+def api(make_api, fake_request):
+    api = make_api()
+    api.fake = fake_request(api)
+    api.fake.routes[HOMES_URI] = lambda data: {"homelist": [dict(home) for home in HOMES]}
+    api.fake.routes[SHARED_URI] = lambda data: {"list": [{"did": "s1", "owner": True}, {"did": "s2", "owner": False}]}
+    return api
+
+
+def test_devices_are_merged_in_home_order(api):
+    api.fake.routes[DEVICES_URI] = devices_route()
+    devices = api.get_devices_list(include_shared=True)
+    assert [device["did"] for device in devices] == ["1-0", "1-1", "2-0", "2-1", "3-0", "3-1", "s1"]
+    assert [device["home_id"] for device in devices] == ["1", "1", "2", "2", "3", "3", "shared"]
+    owners = sorted((data["home_id"], data["home_owner"]) for uri, data in api.fake.calls if uri == DEVICES_URI)
+    assert owners == [(1, 100), (2, 200), (3, 300)]
+
+
+def test_partial_failure_keeps_other_homes(api):
+    api.fake.routes[DEVICES_URI] = devices_route(fail=("2",))
+    with pytest.raises(PartialFailureError) as exc_info:
+        api.get_devices_list(include_shared=True)
+    error = exc_info.value
+    assert [device["did"] for device in error.results] == ["1-0", "1-1", "3-0", "3-1", "s1"]
+    assert list(error.errors) == ["2"]
+    assert isinstance(error.errors["2"], APIError)
+
+
+def test_failed_shared_list_is_reported_by_name(api):
+    api.fake.routes[DEVICES_URI] = devices_route()
+
+    def shared_fails(data):
+        raise APIError(-1, "共享设备获取失败")
+
+    api.fake.routes[SHARED_URI] = shared_fails
+    with pytest.raises(PartialFailureError) as exc_info:
+        api.get_devices_list(include_shared=True)
+    assert list(exc_info.value.errors) == ["shared"]
+    assert len(exc_info.value.results) == 6
+
+
+def test_scenes_fan_out(api):
+    api.fake.routes[SCENES_URI] = lambda data: {
+        "manual_scene_info_list": [{"scene_id": f"s{data['home_id']}", "name": "场景"}],
+    }
+    scenes = api.get_scenes_list()
+    assert [(scene["scene_id"], scene["home_id"]) for scene in scenes] == [("s1", "1"), ("s2", "2"), ("s3", "3")]
+
+
+def test_async_partial_failure_keeps_other_homes(api, cloud):
+    cloud.routes[HOMES_URI] = api.fake.routes[HOMES_URI]
+    # 云端以错误码拒绝，经 _check_result 转为 APIError
+    cloud.routes[DEVICES_URI] = devices_route(fail=("3",), error=lambda: CloudReject(code=-1))
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            return await async_api.get_devices_list()
+
+    with pytest.raises(PartialFailureError) as exc_info:
+        asyncio.run(main())
+    assert [device["did"] for device in exc_info.value.results] == ["1-0", "1-1", "2-0", "2-1"]
+    assert list(exc_info.value.errors) == ["3"]
+    assert isinstance(exc_info.value.errors["3"], APIError)
@@ -0,0 +1,71 @@
+import asyncio
+from itertools import islice
+
+import pytest
+from conftest import make_async_api
+
+
+HOMES_URI = "/v2/homeroom/gethome_merged"
+DEVICES_URI = "/home/home_device_list"
+HOMES = [{"id": "1", "uid": 100, "name": "家1", "roomlist": []},
+         {"id": "2", "uid": 200, "name": "家2", "roomlist": []}]
+# 每个家庭 3 页，每页 2 个设备
+PAGES = {home["id"]: [[f"{home['id']}-{page}-{i}" for i in range(2)] for page in range(3)] for home in HOMES}
+
+
+def devices_route(data):
+    pages = PAGES[str(data["home_id"])]
+    page = 0 if not data["start_did"] else int(data["start_did"].split("-")[1]) + 1
+    dids = pages[page]
+    has_more = page + 1 < len(pages)
+    return {"device_info": [{"did": did} for did in dids], "max_did": dids[-1], "has_more": has_more}
+
+
+def page_requests(calls):
+    return [(data["home_id"], data["start_did"]) for uri, data in calls if uri == DEVICES_URI]
+
+
+@pytest.fixture
+def api(make_api, fake_request):
+    api = make_api()
+    api.fake = fake_request(api)
+    api.fake.routes[HOMES_URI] = lambda data: {"homelist": [dict(home) for home in HOMES]}
+    api.fake.routes[DEVICES_URI] = devices_route
+    return api
+
+
+def test_iter_devices_yields_every_page(api):
+    dids = [device["did"] for device in api.iter_devices()]
+    assert dids == [did for home in HOMES for page in PAGES[home["id"]] for did in page]
+    assert page_requests(api.fake.calls) == [
+        (1, ""), (1, "1-0-1"), (1, "1-1-1"), (2, ""), (2, "2-0-1"), (2, "2-1-1"),
+    ]
+
+
+def test_stopping_early_skips_remaining_pages(api):
+    assert [device["did"] for device in islice(api.iter_devices(), 2)] == ["1-0-0", "1-0-1"]
+    assert page_requests(api.fake.calls) == [(1, "")]
+
+    api.fake.calls.clear()
+    device = next(device for device in api.iter_devices() if device["did"] == "1-1-0")
+    assert device["home_id"] == "1"
+    assert page_requests(api.fake.calls) == [(1, ""), (1, "1-0-1")]
+
+
+def test_iter_devices_of_one_home(api):
+    assert len(list(api.iter_devices("2"))) == 6
+    assert {home_id for home_id, _ in page_requests(api.fake.calls)} == {2}
+
+
+def test_async_stopping_early_skips_remaining_pages(api, cloud):
+    cloud.routes[HOMES_URI] = api.fake.routes[HOMES_URI]
+    cloud.routes[DEVICES_URI] = devices_route
+
+    async def main():
+        async with make_async_api(api, cloud) as async_api:
+            async for device in async_api.iter_devices():
+                if device["did"] == "1-1-1":
+                    return device
+
+    assert asyncio.run(main())["did"] == "1-1-1"
+    assert page_requests((uri, data) for uri, data, _ in cloud.calls) == [(1, ""), (1, "1-0-1")]
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from mijiaAPI import jsonutil
+from mijiaAPI.miutils import CryptoContext
+
+
+DATA = {"scene_name": "回家模式", "params": [{"did": "1", "value": "你好，世界"}]}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(jsonutil, "orjson", None)
+    elif jsonutil.orjson is None:
+        pytest.skip("未安装 orjson")
+    return request.param
+
+
+def test_round_trip(backend):
+    text = jsonutil.dumps(DATA)
+    assert "回家模式" in text
+    assert jsonutil.loads(text) == DATA
+    assert jsonutil.loads(text.encode()) == DATA
+    assert jsonutil.loads(memoryview(text.encode())) == DATA
+
+
+def test_ensure_ascii_matches_stdlib(backend):
+    assert jsonutil.dumps(DATA, ensure_ascii=True) == json.dumps(DATA, separators=(",", ":"))
+
+
+def test_invalid_json_raises_json_decode_error(backend):
+    with pytest.raises(jsonutil.JSONDecodeError):
+        jsonutil.loads("{")
+
+
+def test_request_payload_is_ascii_escaped(make_api, backend):
+    api = make_api()
+    _, params, request_crypto = api._prepare_request("/scene/run", DATA, CryptoContext(api.auth_data["ssecurity"]))
+    assert request_crypto.decrypt(params["data"]) == json.dumps(DATA, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("data, expected", [
+    ('{"code":0}', True),
+    (b'  [1]', True),
+    (b"\r\n{}", True),
+    ("bm90IGpzb24=", False),
+    (b"", False),
+])
+def test_looks_like_json(data, expected):
+    assert jsonutil.looks_like_json(data) is expected
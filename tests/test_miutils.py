@@ -0,0 +1,93 @@
+import base64
+import gzip
+import json
+import random
+
+import pytest
+from conftest import SSECURITY
+from Crypto.Cipher import ARC4
+
+from mijiaAPI import miutils
+from mijiaAPI.miutils import CryptoContext, _Keystream
+
+
+URI = "/miotspec/prop/get"
+DATA = json.dumps({"params": [{"did": "123", "siid": 2, "piid": i} for i in range(1, 9)]}, separators=(",", ":"))
+
+
+def encrypt_response(signed_nonce: str, body: bytes) -> bytes:
+    cipher = ARC4.new(base64.b64decode(signed_nonce))
+    cipher.encrypt(bytes(1024))
+    return base64.b64encode(cipher.encrypt(body))
+
+
+def test_sign_request_matches_generate_enc_params():
+    random.seed(1)
+    nonce = miutils.gen_nonce()
+    expected = miutils.generate_enc_params(
+        URI, "POST", miutils.get_signed_nonce(SSECURITY, nonce), nonce, {"data": DATA}, SSECURITY,
+    )
+    random.seed(1)
+    params, request_crypto = CryptoContext(SSECURITY).sign_request(URI, {"data": DATA})
+    assert params == expected
+    assert list(params) == list(expected)
+    assert request_crypto.nonce == nonce
+
+
+@pytest.mark.parametrize("size", [10, 5000])
+@pytest.mark.parametrize("compressed", [False, True])
+def test_response_decrypt_matches_legacy(size, compressed):
+    body = json.dumps({"code": 0, "result": ["设备" * size]}).encode()
+    _, request_crypto = CryptoContext(SSECURITY).sign_request(URI, {"data": DATA})
+    payload = encrypt_response(request_crypto.signed_nonce, gzip.compress(body) if compressed else body)
+    assert request_crypto.decrypt_bytes(payload) == body
+    assert request_crypto.decrypt_json(payload) == json.loads(body)
+    assert miutils.decrypt(SSECURITY, request_crypto.nonce, payload.decode()) == body.decode()
+
+
+def test_multi_member_gzip_response():
+    body = b'{"code":0,"result":[1,2,3]}'
+    _, request_crypto = CryptoContext(SSECURITY).sign_request(URI, {"data": DATA})
+    payload = encrypt_response(request_crypto.signed_nonce, gzip.compress(body[:10]) + gzip.compress(body[10:]))
+    assert request_crypto.decrypt_bytes(payload) == body
+
+
+def test_keystream_continues_after_long_decrypt():
+    key = bytes(range(32))
+    keystream = _Keystream(key)
+    short, long = b"a" * 16, b"b" * 4096
+
+    def reference(data):
+        cipher = ARC4.new(key)
+        cipher.encrypt(bytes(1024))
+        return cipher.encrypt(data)
+
+    assert keystream.apply(short) == reference(short)
+    assert keystream.decrypt(reference(long)) == long
+    # decrypt 消耗了 RC4 状态之后仍可继续加密更长的字段
+    assert keystream.apply(b"c" * 64) == reference(b"c" * 64)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 7, 4096])
+@pytest.mark.parametrize("compressed", [False, True])
+def test_response_decryptor_accepts_any_chunking(chunk_size, compressed):
+    body = json.dumps({"code": 0, "result": list(range(2000))}).encode()
+    _, request_crypto = CryptoContext(SSECURITY).sign_request(URI, {"data": DATA})
+    payload = encrypt_response(request_crypto.signed_nonce, gzip.compress(body) if compressed else body)
+    # 模拟带换行的 base64 文本
+    payload = payload[:50] + b"\r\n" + payload[50:]
+    decoder = request_crypto.decoder()
+    for i in range(0, len(payload), chunk_size):
+        decoder.feed(payload[i:i + chunk_size])
+    assert decoder.result() == json.loads(body)
+
+
+@pytest.mark.parametrize("wrap", [bytearray, memoryview])
+def test_response_decryptor_accepts_buffers(wrap):
+    body = json.dumps({"code": 0, "result": list(range(500))}).encode()
+    _, request_crypto = CryptoContext(SSECURITY).sign_request(URI, {"data": DATA})
+    payload = encrypt_response(request_crypto.signed_nonce, body)
+    decryptor = miutils.ResponseDecryptor(request_crypto._keystream)
+    for i in range(0, len(payload), 1001):
+        decryptor.feed(wrap(payload[i:i + 1001]))
+    assert decryptor.finish() == body
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+from conftest import make_spec_page
+
+from mijiaAPI import PartialFailureError, SpecStore, prefetch_device_infos
+from mijiaAPI.devices import _device_info_cache, device_info_version
+
+
+LAMP = "yeelink.light.lamp4"
+FAN = "zhimi.fan.za5"
+
+
+@pytest.fixture
+def store(tmp_path, spec_site):
+    spec_site.pages[LAMP] = make_spec_page(LAMP)
+    spec_site.pages[FAN] = make_spec_page(FAN, "风扇")
+    return SpecStore.open(tmp_path)
+
+
+def test_prefetch_fetches_each_model_once(spec_site, store):
+    results = prefetch_device_infos([LAMP, FAN, LAMP], store)
+
+    assert sorted(results) == [LAMP, FAN]
+    assert results[FAN]["name"] == "风扇"
+    assert spec_site.count(LAMP) == spec_site.count(FAN) == 1
+    assert store.get(LAMP, device_info_version) == results[LAMP]
+    assert _device_info_cache.get(FAN) == results[FAN]
+
+
+def test_prefetch_skips_fresh_entries(spec_site, store):
+    prefetch_device_infos([LAMP, FAN], store)
+    spec_site.requests.clear()
+
+    assert prefetch_device_infos([LAMP, FAN], store, max_age=3600) == {}
+    assert prefetch_device_infos([LAMP, FAN], store) == {}
+    assert spec_site.requests == []
+
+
+def test_prefetch_refetches_stale_entries(spec_site, store):
+    prefetch_device_infos([LAMP, FAN], store)
+    info = store.get(LAMP, device_info_version)
+    store.put(LAMP, info, fetched_at=time.time() - 7200)
+    spec_site.requests.clear()
+
+    results = prefetch_device_infos([LAMP, FAN], store, max_age=3600)
+
+    assert list(results) == [LAMP]
+    assert [request[0] for request in spec_site.requests] == [LAMP]
+    assert time.time() - store.metadata(LAMP)["fetched_at"] < 60
+
+
+def test_prefetch_refetches_outdated_format_version(spec_site, store):
+    store.put(LAMP, {"version": device_info_version - 1, "name": "旧格式"})
+
+    results = prefetch_device_infos([LAMP], store)
+
+    assert results[LAMP]["version"] == device_info_version
+    assert spec_site.count(LAMP) == 1
+
+
+def test_prefetch_without_store_skips_process_cache(spec_site, store):
+    prefetch_device_infos([LAMP])
+    prefetch_device_infos([LAMP])
+
+    assert spec_site.count(LAMP) == 1
+
+
+def test_prefetch_partial_failure(spec_site, store):
+    with pytest.raises(PartialFailureError) as exc_info:
+        prefetch_device_infos([LAMP, "unknown.model.v1", FAN], store)
+
+    assert sorted(exc_info.value.results) == [LAMP, FAN]
+    assert list(exc_info.value.errors) == ["unknown.model.v1"]
+    assert store.get(FAN, device_info_version) is not None
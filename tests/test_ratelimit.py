@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+from mijiaAPI.ratelimit import RateLimiter
+
+
+def run_threads(limiter, limits_list, hold):
+    spans = [None] * len(limits_list)
+
+    def run(i):
+        with limiter.limit(limits_list[i]):
+            start = time.monotonic()
+            time.sleep(hold)
+            spans[i] = (start, time.monotonic())
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(limits_list))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(5)
+    return spans
+
+
+def test_same_key_is_serialised_with_interval_after_completion():
+    limiter = RateLimiter()
+    spans = run_threads(limiter, [[("d1", 0.1)]] * 3, hold=0.15)
+    for (_, previous_end), (start, _) in zip(spans, spans[1:]):
+        assert start >= previous_end + 0.09
+    stats = limiter.stats()
+    assert stats["calls"] == 3
+    assert stats["delayed"] == 2
+
+
+def test_different_keys_do_not_wait():
+    limiter = RateLimiter()
+    spans = run_threads(limiter, [[("d1", 1)], [("d2", 1)]], hold=0.2)
+    assert spans[1][0] < spans[0][1]
+    assert limiter.stats()["delayed"] == 0
+
+
+def test_shared_gateway_key_serialises_sub_devices():
+    limiter = RateLimiter()
+    spans = run_threads(limiter, [[("d1", 0), ("gw", 0.05)], [("d2", 0), ("gw", 0.05)]], hold=0.1)
+    assert spans[1][0] >= spans[0][1] + 0.04
+
+
+def test_async_cancelled_waiter_keeps_order():
+    async def main():
+        limiter = RateLimiter()
+        spans = {}
+
+        async def call(name, hold):
+            async with limiter.alimit([("d1", 0.05)]):
+                start = time.monotonic()
+                await asyncio.sleep(hold)
+                spans[name] = (start, time.monotonic())
+
+        first = asyncio.ensure_future(call("first", 0.2))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.ensure_future(call("cancelled", 0))
+        await asyncio.sleep(0.01)
+        last = asyncio.ensure_future(call("last", 0))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.gather(first, last, cancelled, return_exceptions=True)
+        return spans
+
+    spans = asyncio.run(main())
+    assert "cancelled" not in spans
+    assert spans["last"][0] >= spans["first"][1] + 0.04
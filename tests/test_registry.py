@@ -0,0 +1,108 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from conftest import LAMP_MODEL, LAMP_SPEC
+
+from mijiaAPI import (
+    DeviceNotFoundError,
+    DeviceRegistry,
+    MultipleDevicesFoundError,
+    SpecStore,
+    registry,
+)
+
+
+HOMES_URI = "/v2/homeroom/gethome_merged"
+DEVICES_URI = "/home/home_device_list"
+HOMES = [{"id": "1", "uid": 100, "name": "家", "roomlist": [
+    {"id": "r1", "name": "卧室", "dids": ["lamp1", "lamp2"]},
+    {"id": "r2", "name": "客厅", "dids": ["plug1"]},
+]}]
+DEVICES = [
+    {"did": "lamp1", "name": "台灯", "model": LAMP_MODEL},
+    {"did": "lamp2", "name": "床头灯", "model": LAMP_MODEL},
+    {"did": "plug1", "name": "插座", "model": "xiaomi.plug.v1"},
+]
+
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(registry, "time", SimpleNamespace(**{**vars(time), "monotonic": clock}))
+    return clock
+
+
+@pytest.fixture
+def api(make_api, fake_request):
+    api = make_api()
+    api.fake = fake_request(api)
+    api.devices = [dict(device) for device in DEVICES]
+    api.fake.routes[HOMES_URI] = lambda data: {"homelist": HOMES}
+    api.fake.routes[DEVICES_URI] = lambda data: {
+        "device_info": [dict(device) for device in api.devices], "max_did": "", "has_more": False,
+    }
+    return api
+
+
+def test_lookups_share_one_snapshot(api, clock):
+    reg = DeviceRegistry(api, ttl=60)
+    assert reg.get(did="lamp2")["name"] == "床头灯"
+    assert reg.get(dev_name="插座")["did"] == "plug1"
+    assert [device["did"] for device in reg.find(model=LAMP_MODEL)] == ["lamp1", "lamp2"]
+    assert [device["did"] for device in reg.find(room="卧室", name="台灯")] == ["lamp1"]
+    assert [device["did"] for device in reg.find(room="r2")] == ["plug1"]
+    assert reg.room_of("lamp1") == ("1", "r1", "卧室")
+    assert "plug1" in reg and len(reg) == 3
+    assert api.fake.count(DEVICES_URI) == 1
+    assert api.fake.count(HOMES_URI) == 1
+
+
+def test_device_is_built_without_listing_devices(api, clock):
+    SpecStore.open(api.spec_cache_path).put(LAMP_MODEL, LAMP_SPEC)
+    reg = DeviceRegistry(api)
+    lamps = [reg.device(did="lamp1"), reg.device(dev_name="床头灯")]
+    assert [lamp.did for lamp in lamps] == ["lamp1", "lamp2"]
+    assert api.fake.count(DEVICES_URI) == 1
+
+
+def test_snapshot_refreshes_after_ttl(api, clock):
+    reg = DeviceRegistry(api, ttl=60)
+    reg.get(did="lamp1")
+    api.devices.append({"did": "lamp3", "name": "新台灯", "model": LAMP_MODEL})
+    clock.now += 59
+    assert "lamp3" not in reg
+    clock.now += 2
+    assert "lamp3" in reg
+    assert api.fake.count(DEVICES_URI) == 2
+
+
+def test_missing_device_refreshes_at_most_once_per_interval(api, clock):
+    reg = DeviceRegistry(api, ttl=None)
+    reg.get(did="lamp1")
+    # 快照刚获取，查找不到时不刷新
+    with pytest.raises(DeviceNotFoundError):
+        reg.get(did="lamp3")
+    assert api.fake.count(DEVICES_URI) == 1
+
+    api.devices.append({"did": "lamp3", "name": "新台灯", "model": LAMP_MODEL})
+    clock.now += DeviceRegistry.miss_refresh_interval
+    assert reg.get(did="lamp3")["name"] == "新台灯"
+    assert api.fake.count(DEVICES_URI) == 2
+
+
+def test_duplicate_names_are_rejected(api, clock):
+    api.devices.append({"did": "lamp9", "name": "台灯", "model": LAMP_MODEL})
+    reg = DeviceRegistry(api)
+    with pytest.raises(MultipleDevicesFoundError):
+        reg.get(dev_name="台灯")
+    with pytest.raises(ValueError):
+        reg.get()
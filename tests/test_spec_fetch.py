@@ -0,0 +1,122 @@
+import re
+
+import pytest
+from conftest import make_spec_page
+
+from mijiaAPI import SpecStore
+from mijiaAPI.devices import _extract_page_data, _load_device_info, device_info_version
+
+
+LAMP = "yeelink.light.lamp4"
+PAGE_DATA = re.compile(r"<script data-page=\"app\" type=\"application/json\">(.*?)</script>")
+
+
+def old_extract(page: bytes):
+    """修改前对整个页面执行正则的提取方式。"""
+    match = PAGE_DATA.search(page.decode("utf-8"))
+    return match.group(1) if match else None
+
+
+@pytest.fixture
+def store(tmp_path, spec_site):
+    spec_site.pages[LAMP] = make_spec_page(LAMP)
+    return SpecStore.open(tmp_path)
+
+
+def test_fetch_stores_validators(spec_site, store):
+    result = _load_device_info(LAMP, store)
+
+    assert result["model"] == LAMP
+    assert [p["name"] for p in result["properties"]] == ["on", "brightness"]
+    assert result["properties"][0]["description"] == "Switch Status / 开关"
+    assert store.validators(LAMP) == (spec_site.etag(LAMP), None, device_info_version, True)
+    assert "If-None-Match" not in spec_site.requests[0][1]
+
+
+def test_not_modified_reuses_stored_spec(spec_site, store):
+    result = _load_device_info(LAMP, store)
+    store.touch(LAMP, fetched_at=0)
+
+    assert _load_device_info(LAMP, store, refresh=True) == result
+    assert spec_site.requests[-1][1]["If-None-Match"] == spec_site.etag(LAMP)
+    assert store.metadata(LAMP)["fetched_at"] > 0
+    assert store.validators(LAMP)[0] == spec_site.etag(LAMP)
+
+
+def test_not_modified_reparses_stored_source_after_format_change(spec_site, store):
+    result = _load_device_info(LAMP, store)
+    store.put(
+        LAMP, {**result, "version": device_info_version - 1},
+        etag=spec_site.etag(LAMP), source=store.source(LAMP),
+    )
+
+    assert _load_device_info(LAMP, store) == result
+    assert spec_site.requests[-1][1]["If-None-Match"] == spec_site.etag(LAMP)
+    assert store.validators(LAMP) == (spec_site.etag(LAMP), None, device_info_version, True)
+
+
+def test_changed_page_replaces_spec_and_validators(spec_site, store):
+    _load_device_info(LAMP, store)
+    spec_site.revision += 1
+    spec_site.pages[LAMP] = make_spec_page(LAMP, "新台灯")
+
+    result = _load_device_info(LAMP, store, refresh=True)
+
+    assert result["name"] == "新台灯"
+    assert store.validators(LAMP)[0] == spec_site.etag(LAMP)
+    assert store.get(LAMP, device_info_version) == result
+
+
+def test_outdated_format_without_source_is_not_revalidated(spec_site, store):
+    result = _load_device_info(LAMP, store)
+    store.put(LAMP, {**result, "version": device_info_version - 1}, etag=spec_site.etag(LAMP))
+
+    assert _load_device_info(LAMP, store) == result
+    assert "If-None-Match" not in spec_site.requests[-1][1]
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_extract_matches_old_regex_for_any_chunking():
+    page = make_spec_page(LAMP)
+    expected = old_extract(page)
+    assert expected is not None
+
+    for size in range(1, 64):
+        assert _extract_page_data(chunked(page, size)) == expected, size
+
+
+def test_extract_matches_old_regex_with_markers_split():
+    page = make_spec_page(LAMP)
+    expected = old_extract(page)
+    start = page.index(b"<script data-page")
+    end = page.index(b"</script>", start)
+
+    for split in [*range(start, start + 50), *range(end - 1, end + 10)]:
+        assert _extract_page_data([page[:split], page[split:]]) == expected, split
+        assert _extract_page_data([page[:split], b"", page[split:split + 3], page[split + 3:]]) == expected, split
+
+
+def test_extract_without_page_data():
+    page = make_spec_page(LAMP)
+    no_start = page.replace(b'data-page="app"', b'data-page="other"')
+    no_end = page[:page.index(b"</script>")]
+
+    for broken in (no_start, no_end, b""):
+        assert old_extract(broken) is None
+        assert _extract_page_data(chunked(broken, 7)) is None
+
+
+def test_extract_stops_after_end_tag():
+    page = make_spec_page(LAMP)
+    read = []
+
+    def chunks():
+        for chunk in chunked(page, 16):
+            read.append(chunk)
+            yield chunk
+
+    assert _extract_page_data(chunks()) == old_extract(page)
+    assert len(b"".join(read)) < len(page)
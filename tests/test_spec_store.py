@@ -0,0 +1,89 @@
+import pytest
+import requests
+from conftest import LAMP_MODEL, LAMP_SPEC
+
+from mijiaAPI import SpecBundle, SpecStore, clear_device_info_cache, get_device_info
+
+
+OTHER_MODEL = "xiaomi.plug.v1"
+OTHER_SPEC = dict(LAMP_SPEC, name="插座", model=OTHER_MODEL, actions=[])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SpecStore.open(tmp_path / "cache")
+    store.put(LAMP_MODEL, LAMP_SPEC, etag='"v1"')
+    store.put(OTHER_MODEL, OTHER_SPEC)
+    yield store
+    store.close()
+
+
+def test_store_round_trip(store):
+    assert store.get(LAMP_MODEL) == LAMP_SPEC
+    assert store.get(LAMP_MODEL, version=LAMP_SPEC["version"] + 1) is None
+    assert store.models() == sorted([LAMP_MODEL, OTHER_MODEL])
+    assert store.validators(LAMP_MODEL)[0] == '"v1"'
+    assert store.delete(OTHER_MODEL)
+    assert OTHER_MODEL not in store
+
+
+def test_bundle_round_trip(store, tmp_path):
+    path = tmp_path / "specs.bundle"
+    assert store.export_bundle(path) == 2
+    bundle = SpecBundle(path)
+    try:
+        assert bundle.models() == sorted([LAMP_MODEL, OTHER_MODEL])
+        assert bundle.get(LAMP_MODEL) == LAMP_SPEC
+        assert bundle.get(OTHER_MODEL) == OTHER_SPEC
+        assert bundle.get("missing.model") is None
+        assert bundle.metadata(LAMP_MODEL)["source_hash"] == store.metadata(LAMP_MODEL)["source_hash"]
+
+        imported = SpecStore.open(tmp_path / "imported")
+        assert imported.import_bundle(bundle) == 2
+        assert imported.import_bundle(bundle) == 0
+        assert imported.get(OTHER_MODEL) == OTHER_SPEC
+        imported.close()
+    finally:
+        bundle.close()
+
+
+def test_export_selected_models(store, tmp_path):
+    path = tmp_path / "lamp.bundle"
+    assert store.export_bundle(path, models=[LAMP_MODEL]) == 1
+    bundle = SpecBundle(path)
+    assert LAMP_MODEL in bundle and OTHER_MODEL not in bundle
+    bundle.close()
+
+
+def test_invalid_bundle_is_rejected(tmp_path):
+    path = tmp_path / "broken.bundle"
+    path.write_bytes(b"NOTABUNDLE" + bytes(32))
+    with pytest.raises(ValueError):
+        SpecBundle(path)
+
+
+def test_get_device_info_reads_bundle_offline(store, tmp_path, monkeypatch):
+    path = tmp_path / "specs.bundle"
+    store.export_bundle(path)
+
+    def offline(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(requests, "get", offline)
+    clear_device_info_cache()
+    try:
+        assert get_device_info(LAMP_MODEL, cache_path=tmp_path / "empty", bundle=path) == LAMP_SPEC
+    finally:
+        clear_device_info_cache()
+        SpecBundle.open(path).close()
+
+
+def test_open_and_constructor_agree_on_new_directory(tmp_path):
+    path = tmp_path / "specs"
+    direct = SpecStore(path)
+    assert direct.path == path / "device_specs.db"
+    direct.close()
+    shared = SpecStore.open(str(path))
+    assert shared.path.resolve() == (path / "device_specs.db").resolve()
+    shared.close()
+    assert SpecStore(tmp_path / "specs.db").path == tmp_path / "specs.db"
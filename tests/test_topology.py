@@ -0,0 +1,87 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mijiaAPI import APIError, apis
+
+
+HOMES_URI = "/v2/homeroom/gethome_merged"
+SCENES_URI = "/appgateway/miot/appsceneservice/AppSceneService/GetSimpleSceneList"
+HOMES = [{"id": "1", "uid": 100, "name": "家1", "roomlist": []},
+         {"id": "2", "uid": 200, "name": "家2", "roomlist": []}]
+
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(apis, "time", SimpleNamespace(**{**vars(time), "monotonic": clock}))
+    return clock
+
+
+@pytest.fixture
+def api(make_api, fake_request):
+    api = make_api(topology_ttl=60)
+    api.fake = fake_request(api)
+    api.fake.routes[HOMES_URI] = lambda data: {"homelist": [dict(home) for home in HOMES]}
+    return api
+
+
+def test_homes_list_is_cached_until_ttl(api, clock):
+    assert api.get_homes_list() == HOMES
+    clock.now += 59
+    assert api.get_homes_list() == HOMES
+    assert api.fake.count(HOMES_URI) == 1
+    clock.now += 2
+    api.get_homes_list()
+    assert api.fake.count(HOMES_URI) == 2
+
+
+def test_refresh_and_invalidate_refetch(api, clock):
+    api.get_homes_list()
+    api.get_homes_list(refresh=True)
+    assert api.fake.count(HOMES_URI) == 2
+    api.invalidate_topology()
+    api.get_homes_list()
+    assert api.fake.count(HOMES_URI) == 3
+
+
+def test_cached_homes_are_copied(api, clock):
+    api.get_homes_list()[0]["name"] = "已修改"
+    assert api.get_homes_list()[0]["name"] == "家1"
+
+
+def test_home_owner_uses_cache_and_refreshes_unknown_home(api, clock):
+    api.fake.routes[SCENES_URI] = lambda data: {"manual_scene_info_list": []}
+    api.get_scenes_list("1")
+    api.get_scenes_list("2")
+    assert api.fake.count(HOMES_URI) == 1
+    assert [data["owner_uid"] for uri, data in api.fake.calls if uri == SCENES_URI] == [100, 200]
+
+    # 缓存中没有的家庭会重新获取一次家庭列表，仍找不到时抛出异常
+    with pytest.raises(APIError):
+        api.get_scenes_list("3")
+    assert api.fake.count(HOMES_URI) == 2
+
+
+def test_concurrent_loads_fetch_once(api):
+    def slow_homes(data):
+        time.sleep(0.1)
+        return {"homelist": [dict(home) for home in HOMES]}
+
+    api.fake.routes[HOMES_URI] = slow_homes
+    threads = [threading.Thread(target=api.get_homes_list) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert api.fake.count(HOMES_URI) == 1
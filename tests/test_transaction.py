@@ -0,0 +1,65 @@
+import pytest
+import requests
+from conftest import make_lamp
+
+from mijiaAPI import TransactionError
+
+
+PROP_SET = "/miotspec/prop/set"
+
+
+def set_ok(data):
+    return [dict(param, code=0) for param in data["params"]]
+
+
+def test_transaction_merges_writes_into_one_request(make_api, cloud):
+    cloud.routes[PROP_SET] = set_ok
+    api = make_api()
+    lamp, strip = make_lamp(api, "lamp1", sleep_time=0), make_lamp(api, "lamp2", sleep_time=0)
+    with api.transaction():
+        lamp.on = True
+        lamp.brightness = 20
+        lamp.brightness = 60
+        strip.set("brightness", 30)
+    assert cloud.uris() == [PROP_SET]
+    params = cloud.calls[0][1]["params"]
+    assert [(param["did"], param["piid"], param["value"]) for param in params] == [
+        ("lamp1", 1, True), ("lamp1", 2, 60), ("lamp2", 2, 30),
+    ]
+
+
+def test_failed_send_keeps_queue_for_retry(make_api, cloud):
+    attempts = []
+
+    def flaky_set(data):
+        attempts.append(len(data["params"]))
+        if len(attempts) == 1:
+            raise requests.ConnectionError("network down")
+        return set_ok(data)
+
+    cloud.routes[PROP_SET] = flaky_set
+    api = make_api()
+    lamp = make_lamp(api, sleep_time=0)
+    transaction = api.transaction()
+    with pytest.raises(requests.ConnectionError):
+        with transaction:
+            lamp.on = True
+            lamp.brightness = 60
+    assert len(transaction) == 2
+    assert transaction.flush() == {"lamp1": {"on": 0, "brightness": 0}}
+    assert len(transaction) == 0
+    assert attempts == [2, 2]
+
+
+def test_device_errors_raise_transaction_error(make_api, cloud):
+    cloud.routes[PROP_SET] = lambda data: [
+        dict(param, code=-704030023 if param["did"] == "lamp2" else 0) for param in data["params"]
+    ]
+    api = make_api()
+    lamp, strip = make_lamp(api, "lamp1", sleep_time=0), make_lamp(api, "lamp2", sleep_time=0)
+    with pytest.raises(TransactionError) as info:
+        with api.transaction():
+            lamp.on = True
+            strip.on = True
+    assert set(info.value.errors) == {"lamp2"}
+    assert info.value.results["lamp1"] == {"on": 0}